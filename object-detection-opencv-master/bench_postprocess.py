@@ -0,0 +1,80 @@
+"""
+YOLOv3 post-processing: the original per-detection loop versus the
+vectorized NumPy decode in yolo_opencv.py.
+
+Uses the real network outputs when yolov3.weights is present, otherwise
+synthetic outputs with the shapes of the three 416x416 YOLOv3 heads
+(507 + 2028 + 8112 rows of 85 values). Both decoders must return the same
+detections; the script checks that before timing them.
+
+    python bench_postprocess.py --runs 200
+    python bench_postprocess.py --image dog.jpg --weights yolov3.weights
+"""
+
+import argparse
+import os
+import time
+
+import cv2
+import numpy as np
+
+import yolo_opencv
+
+
+def synthetic_outs(objects=20, seed=0):
+    rng = np.random.default_rng(seed)
+    outs = []
+    for grid in (13, 26, 52):
+        out = np.zeros((grid * grid * 3, 85), dtype=np.float32)
+        out[:, :4] = rng.uniform(0.02, 0.98, size=(len(out), 4)).astype(np.float32) * [1, 1, 0.3, 0.3]
+        out[:, 4] = rng.uniform(0, 0.05, size=len(out))
+        out[:, 5:] = rng.uniform(0, 0.05, size=(len(out), 80))
+        hits = rng.choice(len(out), size=objects, replace=False)
+        out[hits, rng.integers(0, 80, size=objects) + 5] = rng.uniform(0.3, 1.0, size=objects)
+        outs.append(out)
+    return outs
+
+
+def timed(decode, outs, width, height, runs):
+    latencies = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        decode(outs, width, height)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return float(np.median(latencies)), float(np.percentile(latencies, 95))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--image', default=os.path.join(yolo_opencv.HERE, 'dog.jpg'))
+    ap.add_argument('--config', default=yolo_opencv.DEFAULT_CONFIG)
+    ap.add_argument('--weights', default=yolo_opencv.DEFAULT_WEIGHTS)
+    ap.add_argument('--runs', type=int, default=100)
+    args = ap.parse_args()
+
+    image = cv2.imread(args.image)
+    height, width = image.shape[:2]
+    if os.path.exists(args.weights):
+        outs = yolo_opencv.forward(yolo_opencv.load_net(args.config, args.weights), image)
+        print(f"Real YOLOv3 outputs for {args.image}")
+    else:
+        outs = synthetic_outs()
+        print("yolov3.weights not found, using synthetic outputs")
+
+    loop = yolo_opencv.postprocess_loop(outs, width, height)
+    vectorized = yolo_opencv.postprocess(outs, width, height)
+    loop = (list(map(int, loop[0])), loop[1], loop[2])
+    assert loop[0] == vectorized[0] and loop[2] == vectorized[2] and np.allclose(loop[1], vectorized[1]), \
+        "decoders disagree"
+    print(f"Both decoders return the same {len(vectorized[0])} detections\n")
+
+    loop_ms = timed(yolo_opencv.postprocess_loop, outs, width, height, args.runs)
+    vector_ms = timed(yolo_opencv.postprocess, outs, width, height, args.runs)
+    print(f"{'decoder':<12}{'p50_ms':>10}{'p95_ms':>10}")
+    print(f"{'loop':<12}{loop_ms[0]:>10.2f}{loop_ms[1]:>10.2f}")
+    print(f"{'vectorized':<12}{vector_ms[0]:>10.2f}{vector_ms[1]:>10.2f}")
+    print(f"\nSpeedup: {loop_ms[0] / max(vector_ms[0], 1e-6):.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -5,24 +5,24 @@
 ############################################
 
 
+import os
 import cv2
 import argparse
 import numpy as np
 
-ap = argparse.ArgumentParser()
-ap.add_argument('-i', '--image', required=True,
-                help = 'path to input image')
-ap.add_argument('-c', '--config', required=True,
-                help = 'path to yolo config file')
-ap.add_argument('-w', '--weights', required=True,
-                help = 'path to yolo pre-trained weights')
-ap.add_argument('-cl', '--classes', required=True,
-                help = 'path to text file containing class names')
-args = ap.parse_args()
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CONFIG = os.path.join(HERE, 'yolov3.cfg')
+DEFAULT_WEIGHTS = os.path.join(HERE, 'yolov3.weights')
+DEFAULT_CLASSES = os.path.join(HERE, 'yolov3.txt')
+
+scale = 0.00392
+input_size = (416, 416)
+
+_default_net = None
 
 
 def get_output_layers(net):
-    
+
     layer_names = net.getLayerNames()
     try:
         output_layers = [layer_names[i - 1] for i in net.getUnconnectedOutLayers()]
@@ -32,7 +32,163 @@ def get_output_layers(net):
     return output_layers
 
 
-def draw_prediction(img, class_id, confidence, x, y, x_plus_w, y_plus_h):
+def load_net(config=DEFAULT_CONFIG, weights=DEFAULT_WEIGHTS):
+
+    return cv2.dnn.readNet(weights, config)
+
+
+def load_classes(path=DEFAULT_CLASSES):
+
+    with open(path, 'r') as f:
+        return [line.strip() for line in f.readlines()]
+
+
+def forward(net, image):
+
+    blob = cv2.dnn.blobFromImage(image, scale, input_size, (0,0,0), True, crop=False)
+
+    net.setInput(blob)
+
+    return net.forward(get_output_layers(net))
+
+
+def postprocess_loop(outs, Width, Height, conf_threshold=0.5, nms_threshold=0.4):
+    # original per-detection loop, kept as the reference for bench_postprocess.py
+
+    class_ids = []
+    confidences = []
+    boxes = []
+
+    for out in outs:
+        for detection in out:
+            scores = detection[5:]
+            class_id = np.argmax(scores)
+            confidence = scores[class_id]
+            if confidence > conf_threshold:
+                center_x = int(detection[0] * Width)
+                center_y = int(detection[1] * Height)
+                w = int(detection[2] * Width)
+                h = int(detection[3] * Height)
+                x = center_x - w / 2
+                y = center_y - h / 2
+                class_ids.append(class_id)
+                confidences.append(float(confidence))
+                boxes.append([x, y, w, h])
+
+    indices = cv2.dnn.NMSBoxes(boxes, confidences, conf_threshold, nms_threshold)
+    indices = np.array(indices, dtype=int).reshape(-1)
+
+    return [class_ids[i] for i in indices], [confidences[i] for i in indices], [boxes[i] for i in indices]
+
+
+def postprocess(outs, Width, Height, conf_threshold=0.5, nms_threshold=0.4, classes=None):
+    # same decode as postprocess_loop, done on whole arrays:
+    # all output layers stacked into one (N, 5 + classes) array.
+    # `classes` (ids) drops every other class before NMS
+
+    detections = np.concatenate([out.reshape(-1, out.shape[-1]) for out in outs])
+    scores = detections[:, 5:]
+    class_ids = scores.argmax(axis=1)
+    confidences = scores[np.arange(len(scores)), class_ids]
+
+    keep = confidences > conf_threshold
+    if classes is not None:
+        keep &= np.isin(class_ids, classes)
+    detections, class_ids, confidences = detections[keep], class_ids[keep], confidences[keep]
+
+    # int() truncation of the loop version, then top-left corner
+    sizes = (detections[:, :4] * [Width, Height, Width, Height]).astype(np.int64)
+    boxes = np.column_stack([sizes[:, 0] - sizes[:, 2] / 2, sizes[:, 1] - sizes[:, 3] / 2, sizes[:, 2], sizes[:, 3]])
+
+    indices = cv2.dnn.NMSBoxes(boxes.tolist(), confidences.tolist(), conf_threshold, nms_threshold)
+    indices = np.array(indices, dtype=int).reshape(-1)
+
+    return class_ids[indices].tolist(), confidences[indices].astype(float).tolist(), boxes[indices].tolist()
+
+
+def detect(image, net=None, conf_threshold=0.5, nms_threshold=0.4):
+    """
+    Runs YOLOv3 on a BGR image and returns (class_ids, confidences, boxes)
+    after NMS, with boxes as [x, y, w, h] in image pixels.
+
+    Without `net` the yolov3.cfg / yolov3.weights next to this file are
+    loaded once and reused. For batches or a non-default DNN backend use
+    Yolov3Detector.
+    """
+    global _default_net
+
+    if net is None:
+        if _default_net is None:
+            _default_net = load_net()
+        net = _default_net
+
+    outs = forward(net, image)
+
+    return postprocess(outs, image.shape[1], image.shape[0], conf_threshold, nms_threshold)
+
+
+DNN_BACKENDS = {
+    'opencv': cv2.dnn.DNN_BACKEND_OPENCV,
+    'openvino': cv2.dnn.DNN_BACKEND_INFERENCE_ENGINE
+}
+
+DNN_TARGETS = {
+    'cpu': cv2.dnn.DNN_TARGET_CPU,
+    'opencl': cv2.dnn.DNN_TARGET_OPENCL,
+    'opencl_fp16': cv2.dnn.DNN_TARGET_OPENCL_FP16
+}
+
+
+class Yolov3Detector:
+    """
+    YOLOv3 network loaded once, for repeated and batched detection.
+
+    `backend` picks the cv2.dnn backend ('opencv', or 'openvino' for the
+    Inference Engine when OpenCV is built with it) and `target` the device.
+    Output layer names are resolved once; `detect()` runs a list of images
+    through a single blobFromImages batch.
+    """
+
+    def __init__(self, config=DEFAULT_CONFIG, weights=DEFAULT_WEIGHTS, classes=DEFAULT_CLASSES,
+                 backend='opencv', target='cpu', size=416, threads=0):
+        if backend not in DNN_BACKENDS:
+            raise ValueError(f"Unknown DNN backend '{backend}', expected one of {', '.join(DNN_BACKENDS)}")
+        if target not in DNN_TARGETS:
+            raise ValueError(f"Unknown DNN target '{target}', expected one of {', '.join(DNN_TARGETS)}")
+        if DNN_TARGETS[target] not in cv2.dnn.getAvailableTargets(DNN_BACKENDS[backend]):
+            raise RuntimeError(f"This OpenCV build cannot run the '{backend}' backend on '{target}'")
+        if threads:
+            cv2.setNumThreads(threads)
+
+        self.net = load_net(config, weights)
+        self.net.setPreferableBackend(DNN_BACKENDS[backend])
+        self.net.setPreferableTarget(DNN_TARGETS[target])
+        self.output_layers = get_output_layers(self.net)
+        self.classes = load_classes(classes)
+        self.size = (size, size)
+        self.backend = backend
+        self.target = target
+
+    def forward(self, images):
+        """Raw YOLO outputs per layer, each shaped (len(images), rows, 5 + classes)."""
+        blob = cv2.dnn.blobFromImages(images, scale, self.size, (0,0,0), True, crop=False)
+        self.net.setInput(blob)
+        outs = self.net.forward(self.output_layers)
+        return [out.reshape(len(images), -1, out.shape[-1]) for out in outs]
+
+    def detect(self, images, conf_threshold=0.5, nms_threshold=0.4, classes=None):
+        """(class_ids, confidences, boxes) for each image, as in detect(); `classes` keeps only those ids."""
+        if not images:
+            return []
+        outs = self.forward(images)
+        return [
+            postprocess([out[i] for out in outs], image.shape[1], image.shape[0], conf_threshold, nms_threshold,
+                        classes)
+            for i, image in enumerate(images)
+        ]
+
+
+def draw_prediction(img, class_id, confidence, x, y, x_plus_w, y_plus_h, classes, COLORS):
 
     label = str(classes[class_id])
 
@@ -42,69 +198,40 @@ def draw_prediction(img, class_id, confidence, x, y, x_plus_w, y_plus_h):
 
     cv2.putText(img, label, (x-10,y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
 
-    
-image = cv2.imread(args.image)
 
-Width = image.shape[1]
-Height = image.shape[0]
-scale = 0.00392
-
-classes = None
-
-with open(args.classes, 'r') as f:
-    classes = [line.strip() for line in f.readlines()]
+def main():
 
-COLORS = np.random.uniform(0, 255, size=(len(classes), 3))
+    ap = argparse.ArgumentParser()
+    ap.add_argument('-i', '--image', required=True,
+                    help = 'path to input image')
+    ap.add_argument('-c', '--config', required=True,
+                    help = 'path to yolo config file')
+    ap.add_argument('-w', '--weights', required=True,
+                    help = 'path to yolo pre-trained weights')
+    ap.add_argument('-cl', '--classes', required=True,
+                    help = 'path to text file containing class names')
+    args = ap.parse_args()
 
-net = cv2.dnn.readNet(args.weights, args.config)
+    image = cv2.imread(args.image)
 
-blob = cv2.dnn.blobFromImage(image, scale, (416,416), (0,0,0), True, crop=False)
+    classes = load_classes(args.classes)
 
-net.setInput(blob)
+    COLORS = np.random.uniform(0, 255, size=(len(classes), 3))
 
-outs = net.forward(get_output_layers(net))
+    net = load_net(args.config, args.weights)
 
-class_ids = []
-confidences = []
-boxes = []
-conf_threshold = 0.5
-nms_threshold = 0.4
+    class_ids, confidences, boxes = detect(image, net)
 
+    for class_id, confidence, box in zip(class_ids, confidences, boxes):
+        x, y, w, h = box
+        draw_prediction(image, class_id, confidence, round(x), round(y), round(x+w), round(y+h), classes, COLORS)
 
-for out in outs:
-    for detection in out:
-        scores = detection[5:]
-        class_id = np.argmax(scores)
-        confidence = scores[class_id]
-        if confidence > 0.5:
-            center_x = int(detection[0] * Width)
-            center_y = int(detection[1] * Height)
-            w = int(detection[2] * Width)
-            h = int(detection[3] * Height)
-            x = center_x - w / 2
-            y = center_y - h / 2
-            class_ids.append(class_id)
-            confidences.append(float(confidence))
-            boxes.append([x, y, w, h])
+    cv2.imshow("object detection", image)
+    cv2.waitKey()
 
+    cv2.imwrite("object-detection.jpg", image)
+    cv2.destroyAllWindows()
 
-indices = cv2.dnn.NMSBoxes(boxes, confidences, conf_threshold, nms_threshold)
 
-for i in indices:
-    try:
-        box = boxes[i]
-    except:
-        i = i[0]
-        box = boxes[i]
-    
-    x = box[0]
-    y = box[1]
-    w = box[2]
-    h = box[3]
-    draw_prediction(image, class_ids[i], confidences[i], round(x), round(y), round(x+w), round(y+h))
-
-cv2.imshow("object detection", image)
-cv2.waitKey()
-    
-cv2.imwrite("object-detection.jpg", image)
-cv2.destroyAllWindows()
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Adaptive per-session frame-rate and resolution controller.
+
+The HUD sends frames on a fixed timer at whatever size its canvas is. The
+controller watches each session's measured server latency and drop rate
+plus the pipeline's estimated capacity, and once per interval adjusts a
+per-session budget:
+
+- over the SLO (p95) or dropping frames: lower the target fps (never above
+  the session's fair share of capacity), then the max input side, then the
+  JPEG quality;
+- comfortably under the SLO: restore in the reverse order.
+
+Changed budgets are pushed to the client as a `throttle` event
+({target_fps, max_side, jpeg_quality}) and `max_side` is also applied
+server-side, so oversized frames are downscaled before inference even if
+the client ignores the hint. It is a cap on top of any `max_side` the
+client set itself, which is never changed.
+"""
+
+import collections
+import time
+
+import numpy as np
+
+
+class AdaptiveController:
+    SIDES = (None, 640, 480, 320)
+    QUALITIES = (0.5, 0.4, 0.3)
+
+    def __init__(self, emit_throttle, slo_ms=250, max_fps=15, min_fps=2, window=30, interval_s=1.0):
+        self.emit_throttle = emit_throttle
+        self.slo_ms = slo_ms
+        self.max_fps = max_fps
+        self.min_fps = min_fps
+        self.window = window
+        self.interval_s = interval_s
+
+    def observe(self, pipeline, session, latency_ms):
+        """Records one result for a session and re-evaluates its budget once per interval."""
+        control = session.control
+        if control is None:
+            control = session.control = {
+                "latencies": collections.deque(maxlen=self.window),
+                "fps": float(self.max_fps),
+                "side": 0,
+                "quality": 0,
+                "evaluated_at": time.monotonic(),
+                "received": session.received,
+                "dropped": session.dropped,
+                "hint": None
+            }
+        control["latencies"].append(latency_ms)
+
+        now = time.monotonic()
+        if now - control["evaluated_at"] < self.interval_s:
+            return
+        self._evaluate(pipeline, session, control)
+        control["evaluated_at"] = now
+
+    def _evaluate(self, pipeline, session, control):
+        slo = float(session.options.get("slo_ms", self.slo_ms))
+        p95 = float(np.percentile(control["latencies"], 95))
+        received = session.received - control["received"]
+        drop_rate = (session.dropped - control["dropped"]) / received if received else 0.0
+        control["received"], control["dropped"] = session.received, session.dropped
+
+        capacity = pipeline.capacity_fps()
+        clients = max(1, len(pipeline.sessions))
+        fair_fps = max(self.min_fps, 0.9 * capacity / clients) if capacity else self.max_fps
+
+        if p95 > slo or drop_rate > 0.2:
+            if control["fps"] > self.min_fps:
+                control["fps"] = max(self.min_fps, min(control["fps"] * 0.7, fair_fps))
+            elif control["side"] < len(self.SIDES) - 1:
+                control["side"] += 1
+            elif control["quality"] < len(self.QUALITIES) - 1:
+                control["quality"] += 1
+        elif p95 < 0.6 * slo and drop_rate < 0.05:
+            if control["quality"] > 0:
+                control["quality"] -= 1
+            elif control["side"] > 0:
+                control["side"] -= 1
+            elif control["fps"] < self.max_fps:
+                control["fps"] = min(self.max_fps, control["fps"] + 1)
+        control["fps"] = min(control["fps"], fair_fps, self.max_fps)
+
+        # Kept apart from the client's own max_side option; the session applies the smaller
+        max_side = self.SIDES[control["side"]]
+        control["max_side"] = max_side
+
+        hint = {
+            "target_fps": round(control["fps"], 1),
+            "max_side": max_side,
+            "jpeg_quality": self.QUALITIES[control["quality"]]
+        }
+        if hint != control["hint"]:
+            control["hint"] = hint
+            self.emit_throttle(session.sid, dict(hint, p95_ms=round(p95, 1), slo_ms=slo))
@@ -1,26 +1,473 @@
 
-from flask import Flask, request, jsonify
+import time
+STARTED_AT = time.time()
+
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit
-from ultralytics import YOLO
 import cv2
 import numpy as np
 import base64
 import os
-from deepface import DeepFace
+import argparse
+import json
+import queue
 from nura_engine import NuraEngine
+import threading
+from vision_pipeline import DetectionPipeline, LocalDetector, decode_frame
+from face_index import FaceIndex, DEFAULT_MODEL as DEFAULT_FACE_MODEL, embed_image
+from identity_cascade import IdentityCascade
+from adaptive import AdaptiveController
+from process_workers import ProcessInferencePool, parse_cpu_sets
+from inference_backends import load_model
+from metrics import REGISTRY, Gauge
 
 app = Flask(__name__)
 CORS(app)
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
+# 'threading' for app.py and serve.py's gthread workers; serve.py sets 'gevent' for its gevent worker
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode=os.environ.get('VISION_ASYNC_MODE', 'threading'))
 
 # Initialize NURA Engine
 nura = NuraEngine()
 
-# Load YOLOv8 model
-model = YOLO('yolov8n.pt')
+MODEL_PATH = 'yolov8n.pt'
+# torch | onnxruntime | openvino; exported artifacts are cached next to the weights
+VISION_BACKEND = os.environ.get('VISION_BACKEND', 'torch')
+# INT8 model (python app.py --quantized), calibrated on dog.jpg plus VISION_CALIBRATION images
+VISION_QUANTIZED = os.environ.get('VISION_QUANTIZED', '0') == '1'
+VISION_CALIBRATION = os.environ.get('VISION_CALIBRATION')
+
+# Vision backend, loaded by init_vision() in a background thread so the HTTP
+# and NURA routes answer immediately; /health reports when it is ready. With
+# VISION_WORKERS > 0 inference runs in separate processes and the web process
+# only does I/O.
+model = None
+worker_pool = None
+pipeline = None
+vision_status = {"state": "loading", "error": None, "timings": {}}
+vision_lock = threading.Lock()
+pending_modes = {}  # set_mode messages received before the pipeline was up
+WARMUP_IMAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'object-detection-opencv-master', 'dog.jpg')
+
+# --- FACE INDEX ---
+
+FACE_MODEL = os.environ.get('FACE_MODEL', DEFAULT_FACE_MODEL)
+FACE_RECOGNIZE_EVERY = int(os.environ.get('FACE_RECOGNIZE_EVERY', 15))
+face_index = None
+face_index_lock = threading.Lock()
+
+def get_face_index():
+    """Loads the on-disk face index once (building it from known_faces/ if missing)."""
+    global face_index
+    with face_index_lock:
+        if face_index is None:
+            index = FaceIndex(model_name=FACE_MODEL)
+            face_index = index.load() if index.exists() else index.build()
+        return face_index
+
+# --- VISION STREAM (Socket.IO) ---
+
+def emit_detection(sid, result):
+    socketio.emit('detection_result', result, to=sid)
+
+def emit_throttle(sid, hint):
+    socketio.emit('throttle', hint, to=sid)
+
+def warmup_frame():
+    """JPEG bytes for the warm-up inference: dog.jpg if present, else a blank frame."""
+    image = cv2.imread(WARMUP_IMAGE)
+    if image is None:
+        image = np.zeros((480, 640, 3), dtype=np.uint8)
+    return cv2.imencode('.jpg', image)[1].tobytes()
+
+def init_vision():
+    """Loads and warms up the detector, then starts the frame pipeline. Failures are reported by /health."""
+    timings = vision_status["timings"]
+    started = time.time()
+    try:
+        detectors = load_detectors()
+        timings["model_load_s"] = round(time.time() - started, 2)
+        start_pipeline(detectors)
+        vision_status["state"] = "ready"
+        timings["vision_ready_s"] = round(time.time() - STARTED_AT, 2)
+        print(f"✅ Vision ready {timings['vision_ready_s']}s after start "
+              f"(load {timings['model_load_s']}s, first warm-up frame {timings['warmup_first_ms']} ms)")
+    except Exception as e:
+        vision_status.update(state="error", error=str(e))
+        print(f"❌ Vision startup failed: {e}")
+
+def load_detectors():
+    global model, worker_pool
+    workers = int(os.environ.get('VISION_WORKERS', 0))
+    if workers > 0:
+        worker_pool = ProcessInferencePool(
+            MODEL_PATH,
+            workers=workers,
+            # One call per batch: as many slots as the pipeline's largest batch
+            slots_per_job=int(os.environ.get('VISION_WORKER_SLOTS', os.environ.get('VISION_MAX_BATCH', 8))),
+            queue_depth=int(os.environ.get('VISION_WORKER_QUEUE_DEPTH', 2)),
+            cpu_sets=parse_cpu_sets(os.environ.get('VISION_CPU_PINNING', ''), workers),
+            threads_per_worker=int(os.environ.get('VISION_THREADS_PER_WORKER', 1)),
+            face_model=FACE_MODEL,
+            recognize_every=FACE_RECOGNIZE_EVERY,
+            backend=VISION_BACKEND,
+            quantized=VISION_QUANTIZED,
+            calibration=VISION_CALIBRATION
+        )
+        detectors = worker_pool.start()
+    else:
+        model = load_model(MODEL_PATH, VISION_BACKEND, threads=int(os.environ.get('VISION_THREADS', 0)),
+                           quantized=VISION_QUANTIZED, calibration=VISION_CALIBRATION)
+        # The index is loaded (or built from known_faces/) on the first face-mode frame
+        cascade = IdentityCascade(get_face_index, recognize_every=FACE_RECOGNIZE_EVERY)
+        detectors = LocalDetector(model, cascade=cascade,
+                                  decode_threads=int(os.environ.get('VISION_DECODE_THREADS', 4)))
+    return detectors
+
+def start_pipeline(detectors):
+    global pipeline
+    # Class names seed the compact encoding's result_header; workers report theirs once loaded
+    names = model.names if model is not None else worker_pool.names
+    controller = None
+    if os.environ.get('VISION_ADAPTIVE', '1') != '0':
+        controller = AdaptiveController(emit_throttle, slo_ms=float(os.environ.get('VISION_SLO_MS', 250)))
+
+    new_pipeline = DetectionPipeline(
+        detectors,
+        emit_detection,
+        max_batch=int(os.environ.get('VISION_MAX_BATCH', 8)),
+        batch_deadline_ms=float(os.environ.get('VISION_BATCH_DEADLINE_MS', 10)),
+        default_options={
+            "detect_every": int(os.environ.get('VISION_DETECT_EVERY', 1)),
+            "static_threshold": float(os.environ.get('VISION_STATIC_THRESHOLD', 1.0)),
+            "static_max_skip": int(os.environ.get('VISION_STATIC_MAX_SKIP', 30)),
+            "tiled": os.environ.get('VISION_TILED', '0') == '1',
+            "tile_size": int(os.environ.get('VISION_TILE_SIZE', 640)),
+            "tile_overlap": float(os.environ.get('VISION_TILE_OVERLAP', 0.2))
+        },
+        controller=controller,
+        labels=list(names.values()) if names else None
+    )
+    first_ms = new_pipeline.warm_up(warmup_frame())
+    vision_status["timings"]["warmup_first_ms"] = round(max(first_ms), 1)
+    new_pipeline.start()
+    with vision_lock:
+        for sid, mode in pending_modes.items():
+            apply_mode(new_pipeline, sid, mode)
+        pending_modes.clear()
+        pipeline = new_pipeline
+
+@socketio.on('connect')
+def handle_connect():
+    if pipeline:
+        pipeline.open_session(request.sid)
+
+@socketio.on('disconnect')
+def handle_disconnect():
+    pending_modes.pop(request.sid, None)
+    if pipeline:
+        pipeline.close_session(request.sid)
+
+@socketio.on('set_mode')
+def handle_set_mode(mode):
+    with vision_lock:
+        if not pipeline:
+            pending_modes[request.sid] = mode
+            return
+    apply_mode(pipeline, request.sid, mode)
+
+def apply_mode(vision_pipeline, sid, mode):
+    """Applies a set_mode message; compact-encoding sessions get the class-name table first."""
+    vision_pipeline.set_mode(sid, mode)
+    header = vision_pipeline.result_header(sid)
+    if header:
+        socketio.emit('result_header', header, to=sid)
+
+@socketio.on('detect_frame')
+def handle_detect_frame(data):
+    if not isinstance(data, dict) or not data.get('image'):
+        return
+    if not pipeline:
+        emit('detection_result', {"detections": [], "timestamp": data.get('timestamp'),
+                                  "error": "Vision models are still loading"})
+        return
+    pipeline.submit(request.sid, data)
+
+# --- FACE ENROLLMENT ---
+
+@app.route('/register-face', methods=['POST'])
+def register_face():
+    try:
+        data = request.json
+        name = (data.get('name') or '').strip()
+        if not name or not data.get('image'):
+            return jsonify({"error": "Name and image required"}), 400
+        frame = decode_frame(data['image'])
+        if frame is None:
+            return jsonify({"error": "Could not decode image"}), 400
+        embedding = embed_image(frame, FACE_MODEL)
+        index = get_face_index()
+        samples = index.enroll(name, embedding, replace=bool(data.get('replace')))
+        return jsonify({"status": "success", "name": name, "samples": samples, "total_faces": len(index)})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/faces', methods=['GET'])
+def list_faces():
+    try:
+        return jsonify(get_face_index().names())
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/faces/<name>', methods=['DELETE'])
+def delete_face(name):
+    try:
+        removed = get_face_index().delete(name)
+        if not removed:
+            return jsonify({"error": "Face not found"}), 404
+        return jsonify({"status": "success", "name": name, "removed": removed})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# --- HEALTH / READINESS ---
+
+@app.after_request
+def record_first_response(response):
+    vision_status["timings"].setdefault("first_response_s", round(time.time() - STARTED_AT, 2))
+    return response
+
+@app.route('/health', methods=['GET'])
+def health():
+    return jsonify({
+        "status": "active",
+        "ready": vision_status["state"] == "ready",
+        "vision": vision_status["state"],
+        "error": vision_status["error"],
+        "model": "yolov3" if VISION_BACKEND.startswith("yolov3") else os.path.splitext(MODEL_PATH)[0],
+        "backend": VISION_BACKEND,
+        "quantized": VISION_QUANTIZED,
+        "workers": worker_pool.workers if worker_pool else 0,
+        "startup": vision_status["timings"]
+    })
+
+@app.route('/vision/stats', methods=['GET'])
+def vision_stats():
+    if not pipeline:
+        return jsonify({"error": "Vision pipeline not started"}), 503
+    return jsonify(pipeline.stats())
+
+# --- PROMETHEUS METRICS ---
+# Stage histograms and frame counters are recorded by the pipeline as frames
+# pass; the gauges below are read only when /metrics is scraped.
+
+def queue_depth_values():
+    if not pipeline:
+        return None
+    depths, _ = pipeline.queue_depths()
+    return {(queue,): depth for queue, depth in depths.items()}
 
-# ... (Existing init code) ...
+def session_values():
+    if not pipeline:
+        return None
+    _, modes = pipeline.queue_depths()
+    return {(mode,): count for mode, count in modes.items()}
+
+def startup_values():
+    timings = dict(vision_status["timings"])
+    if "warmup_first_ms" in timings:
+        timings["warmup_first_s"] = timings.pop("warmup_first_ms") / 1000
+    return {(step[:-2],): seconds for step, seconds in timings.items()}
+
+REGISTRY.register(Gauge("vision_queue_depth", "Live frames and jobs waiting or running, by queue",
+                        ("queue",), queue_depth_values))
+REGISTRY.register(Gauge("vision_sessions", "Connected vision clients by scan mode", ("mode",), session_values))
+REGISTRY.register(Gauge("vision_startup_seconds", "Model load, first warm-up frame and readiness times",
+                        ("step",), startup_values))
+REGISTRY.register(Gauge("vision_ready", "1 once the detector is loaded and warmed up",
+                        callback=lambda: vision_status["state"] == "ready"))
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    try:
+        return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# --- HTTP DETECTION ---
+# Still images share the stream's detectors and batches through pipeline
+# jobs, which fill batches after live frames and are never dropped.
+
+HTTP_DETECT_TIMEOUT = float(os.environ.get('VISION_HTTP_TIMEOUT', 30))
+
+def http_detections(output):
+    """Detections of a single still image; track ids mean nothing outside a stream."""
+    return [{k: v for k, v in d.items() if k not in ('id', 'track_id')} for d in output["detections"]]
+
+def detect_image(image, timeout=HTTP_DETECT_TIMEOUT):
+    """Runs one JPEG through the pipeline and waits for its detection output."""
+    done = threading.Event()
+    result = {}
+
+    def callback(output):
+        result.update(output)
+        done.set()
+
+    if not pipeline.submit_job(image, callback, timeout=timeout) or not done.wait(timeout):
+        raise TimeoutError("Detection timed out")
+    return result
+
+def ndjson_lines(stream, chunk_size=1 << 16):
+    """Non-empty lines of a request body, read in large chunks (stream line iteration is slow)."""
+    pending = b''
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        lines = (pending + chunk).split(b'\n')
+        pending = lines.pop()
+        for line in lines:
+            if line.strip():
+                yield line
+    if pending.strip():
+        yield pending
+
+def read_batch_item(item, line):
+    """Sets line["id"] and returns the image of a multipart upload (JPEG bytes) or an NDJSON line (base64)."""
+    if hasattr(item, 'read'):
+        line["id"] = item.filename or line["index"]
+        return item.read()
+    data = json.loads(item)
+    line["id"] = data.get('id', line["index"])
+    return data['image']
+
+@app.route('/detect', methods=['POST'])
+def detect():
+    if not pipeline:
+        return jsonify({"error": "Vision models are still loading"}), 503
+    try:
+        data = request.json
+        if not data or not data.get('image'):
+            return jsonify({"error": "Image required"}), 400
+        output = detect_image(data['image'])
+        if output["error"]:
+            return jsonify({"error": output["error"]}), 500
+        return jsonify({"detections": http_detections(output)})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# /test-image paths are relative to python_server/ and must resolve inside one of
+# these folders (the server and the bundled sample images), never elsewhere on disk
+SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+TEST_IMAGE_DIRS = [os.path.realpath(folder) for folder in (SERVER_DIR, os.path.dirname(WARMUP_IMAGE))]
+
+def resolve_test_image(image_path):
+    """Real path of a /test-image file, or None if it resolves outside TEST_IMAGE_DIRS."""
+    full_path = os.path.realpath(os.path.join(SERVER_DIR, image_path))
+    if any(os.path.commonpath([full_path, folder]) == folder for folder in TEST_IMAGE_DIRS):
+        return full_path
+    return None
+
+@app.route('/test-image', methods=['POST'])
+def test_image():
+    if not pipeline:
+        return jsonify({"error": "Vision models are still loading"}), 503
+    try:
+        image_path = (request.json or {}).get('image_path')
+        if not image_path:
+            return jsonify({"error": "image_path required"}), 400
+        full_path = resolve_test_image(image_path)
+        if full_path is None:
+            return jsonify({"error": "image_path must be inside the server or sample image folders"}), 403
+        if not os.path.isfile(full_path):
+            return jsonify({"error": "Image not found"}), 404
+        with open(full_path, 'rb') as f:
+            data = f.read()
+        image = decode_frame(data)
+        if image is None:
+            return jsonify({"error": "Could not decode image"}), 400
+        output = detect_image(data)
+        if output["error"]:
+            return jsonify({"error": output["error"]}), 500
+        detections = http_detections(output)
+        return jsonify({
+            "detections": detections,
+            "image_path": image_path,
+            "image_size": {"width": image.shape[1], "height": image.shape[0]},
+            "num_detections": len(detections)
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/detect/batch', methods=['POST'])
+def detect_batch():
+    """
+    Detects many images per request: multipart files, or NDJSON lines of
+    {"id": ..., "image": <base64 or data-URL>}. Streams one NDJSON result per
+    image as it finishes (completion order, match on "id"), then a summary.
+    """
+    if not pipeline:
+        return jsonify({"error": "Vision models are still loading"}), 503
+
+    # Captured here: the body is read by the producer thread. stream_with_context
+    # below keeps the request, and so the uploaded files, open until the last line is sent.
+    if request.files:
+        items = [upload for _, upload in request.files.items(multi=True)]
+    else:
+        items = ndjson_lines(request.stream)
+    results = queue.Queue()
+    started = time.perf_counter()
+
+    def produce():
+        count = 0
+        try:
+            for index, item in enumerate(items):
+                count += 1
+                line = {"index": index, "id": index}
+                try:
+                    image = read_batch_item(item, line)
+                except Exception as e:
+                    results.put(dict(line, detections=[], error=str(e)))
+                    continue
+
+                def done(output, line=line, submitted=time.perf_counter()):
+                    results.put(dict(line, detections=http_detections(output), error=output["error"],
+                                     latency_ms=round((time.perf_counter() - submitted) * 1000, 1)))
+
+                if not pipeline.submit_job(image, done, timeout=HTTP_DETECT_TIMEOUT):
+                    results.put(dict(line, detections=[], error="Detection queue timed out"))
+        except Exception as e:
+            results.put({"index": count, "id": None, "detections": [], "error": f"Request aborted: {e}"})
+            count += 1
+        finally:
+            results.put(count)
+
+    producer = threading.Thread(target=produce, name="detect-batch-reader", daemon=True)
+    producer.start()
+
+    def generate():
+        total, sent, errors = None, 0, 0
+        while total is None or sent < total:
+            try:
+                result = results.get(timeout=HTTP_DETECT_TIMEOUT)
+            except queue.Empty:
+                break
+            if isinstance(result, int):
+                total = result
+                continue
+            sent += 1
+            errors += bool(result["error"])
+            yield json.dumps(result) + "\n"
+        elapsed = time.perf_counter() - started
+        yield json.dumps({"summary": {
+            "images": sent,
+            "errors": errors,
+            "elapsed_s": round(elapsed, 3),
+            "images_per_s": round(sent / elapsed, 2) if elapsed else 0.0
+        }}) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
 
 # --- NURA SYSTEM ENDPOINTS ---
 
@@ -123,11 +570,30 @@ def editor_automation():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-if __name__ == '__main__':
-    port = int(os.environ.get('PORT', 5001))
+def print_banner(port, server):
     print(f"🚀 NEXORA Vision Core Starting on port {port}")
-    print(f"📦 Model: YOLOv8 Nano + OpenCV Face + DeepFace")
-    print(f"⚡ Protocol: WebSockets (SocketIO)")
+    model_name = "YOLOv3 (OpenCV DNN)" if VISION_BACKEND.startswith("yolov3") else "YOLOv8 Nano"
+    print(f"📦 Model: {model_name} ({VISION_BACKEND}{', INT8' if VISION_QUANTIZED else ''}) + OpenCV Face + DeepFace")
+    print(f"⚡ Protocol: WebSockets (SocketIO, {server})")
     print(f"🤖 NURA Engine: Active (System Automation Ready)")
-    print(f"✅ Ready for real-time detection & recognition")
-    socketio.run(app, host='0.0.0.0', port=port, debug=True, allow_unsafe_werkzeug=True)
+
+def start_vision():
+    """Starts loading the vision models in the background (used by app.py and serve.py)."""
+    socketio.start_background_task(init_vision)
+    print(f"⏳ Loading vision models in the background (GET /health reports readiness)")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="NEXORA Vision Core (development server; see serve.py for production)")
+    parser.add_argument('--quantized', action='store_true', help="serve the INT8-quantized detector")
+    parser.add_argument('--calibration', help="image folder/glob/video for INT8 calibration")
+    args = parser.parse_args()
+    VISION_QUANTIZED = VISION_QUANTIZED or args.quantized
+    VISION_CALIBRATION = args.calibration or VISION_CALIBRATION
+
+    port = int(os.environ.get('PORT', 5001))
+    debug = os.environ.get('FLASK_DEBUG', '1') == '1'
+    print_banner(port, "Werkzeug development server")
+    # The debug reloader runs this block in a watcher process too; only the serving child loads models
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_vision()
+    socketio.run(app, host='0.0.0.0', port=port, debug=debug, allow_unsafe_werkzeug=True)
@@ -0,0 +1,65 @@
+"""
+Per-frame CPU latency of the YOLOv8 inference backends.
+
+Runs single-frame `predict` calls (what one HUD client costs) through each
+backend and reports p50/p95 latency and frames/sec. The first run exports
+the ONNX / OpenVINO artifacts next to the weights; later runs reuse them.
+
+    python bench_backends.py --backends torch onnxruntime openvino --threads 1 4
+"""
+
+import argparse
+import os
+import time
+
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+
+from bench_utils import load_images, percentile, print_table
+from inference_backends import load_model
+
+
+def run_case(model, images, iterations, warmup):
+    for i in range(warmup):
+        model.predict(images[i % len(images)], conf=0.5, verbose=False)
+    latencies = []
+    for i in range(iterations):
+        started = time.perf_counter()
+        model.predict(images[i % len(images)], conf=0.5, verbose=False)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--model", default="yolov8n.pt")
+    ap.add_argument("--source", help="image, folder, glob or video (default: dog.jpg)")
+    ap.add_argument("--backends", nargs="+", default=["torch", "onnxruntime", "openvino"])
+    ap.add_argument("--threads", type=int, nargs="+", default=[0], help="0 = runtime default")
+    ap.add_argument("--iterations", type=int, default=100)
+    ap.add_argument("--warmup", type=int, default=10)
+    args = ap.parse_args()
+
+    images = load_images(args.source, limit=32)
+    print(f"Corpus: {len(images)} frames, {os.cpu_count()} CPUs")
+
+    rows = []
+    for backend in args.backends:
+        for threads in args.threads:
+            model = load_model(args.model, backend, threads=threads)
+            latencies = run_case(model, images, args.iterations, args.warmup)
+            p50 = percentile(latencies, 50)
+            rows.append({
+                "backend": backend,
+                "threads": threads or "default",
+                "p50_ms": p50,
+                "p95_ms": percentile(latencies, 95),
+                "fps": 1000.0 / p50 if p50 else 0.0
+            })
+            print(f"{backend} threads={threads or 'default'}: p50 {p50:.1f} ms")
+
+    print()
+    print_table(rows, ["backend", "threads", "p50_ms", "p95_ms", "fps"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark for cross-client micro-batching in the vision pipeline.
+
+Simulates N HUD clients pushing frames at a fixed rate into an in-process
+DetectionPipeline (no sockets) and reports aggregate frames/sec and p50/p99
+latency for unbatched (max_batch=1) versus batched scheduling on CPU.
+
+    python bench_batching.py --clients 1 2 4 8 --max-batch 8 --deadline-ms 10
+"""
+
+import argparse
+import os
+import threading
+import time
+
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+
+from ultralytics import YOLO
+
+from bench_utils import encode_jpeg, load_images, percentile, print_table, to_data_url
+from vision_pipeline import DetectionPipeline, LocalDetector
+
+
+def run_case(model, frames, clients, max_batch, deadline_ms, fps, duration):
+    latencies = []
+    sent_at = {}
+    lock = threading.Lock()
+
+    def on_result(sid, result):
+        now = time.perf_counter()
+        with lock:
+            start = sent_at.pop((sid, result["timestamp"]), None)
+            if start is not None and "error" not in result:
+                latencies.append((now - start) * 1000)
+
+    pipeline = DetectionPipeline(LocalDetector(model), on_result, max_batch=max_batch, batch_deadline_ms=deadline_ms)
+    pipeline.start()
+
+    def client(sid):
+        pipeline.open_session(sid)
+        interval = 1.0 / fps
+        end = time.perf_counter() + duration
+        i = 0
+        while time.perf_counter() < end:
+            with lock:
+                sent_at[(sid, i)] = time.perf_counter()
+            pipeline.submit(sid, {"image": frames[i % len(frames)], "timestamp": i})
+            i += 1
+            time.sleep(interval)
+
+    threads = [threading.Thread(target=client, args=(f"client-{n}",)) for n in range(clients)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    time.sleep(0.5)  # let the last in-flight batch finish
+    elapsed = time.perf_counter() - started
+    stats = pipeline.stats()
+    pipeline.stop()
+
+    return {
+        "clients": clients,
+        "max_batch": max_batch,
+        "fps_total": stats["processed"] / elapsed,
+        "drop_rate": stats["dropped"] / stats["received"] if stats["received"] else 0.0,
+        "p50_ms": percentile(latencies, 50),
+        "p99_ms": percentile(latencies, 99)
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--model", default="yolov8n.pt")
+    ap.add_argument("--source", help="image, folder, glob or video (default: dog.jpg)")
+    ap.add_argument("--clients", type=int, nargs="+", default=[1, 2, 4, 8])
+    ap.add_argument("--max-batch", type=int, default=8)
+    ap.add_argument("--deadline-ms", type=float, default=10)
+    ap.add_argument("--fps", type=float, default=15, help="per-client send rate")
+    ap.add_argument("--duration", type=float, default=10, help="seconds per case")
+    args = ap.parse_args()
+
+    model = YOLO(args.model)
+    frames = [to_data_url(encode_jpeg(img)) for img in load_images(args.source, limit=32)]
+    model.predict(load_images(args.source, limit=1), verbose=False)  # warm-up
+
+    rows = []
+    for clients in args.clients:
+        for max_batch in sorted({1, args.max_batch}):
+            row = run_case(model, frames, clients, max_batch, args.deadline_ms, args.fps, args.duration)
+            rows.append(row)
+            print(f"clients={clients} max_batch={max_batch}: {row['fps_total']:.1f} fps, p99 {row['p99_ms']:.1f} ms")
+
+    print()
+    print_table(rows, ["clients", "max_batch", "fps_total", "drop_rate", "p50_ms", "p99_ms"])
+
+
+if __name__ == "__main__":
+    main()
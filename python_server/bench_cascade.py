@@ -0,0 +1,70 @@
+"""
+Benchmark: recognition (`face`) mode cost versus detection-only (`object`) mode.
+
+Replays a recorded clip frame by frame through LocalDetector, threading the
+per-session track state exactly like the live pipeline, and reports mean and
+p95 ms/frame for both modes plus how many DeepFace lookups the cascade ran.
+The target is face mode costing less than 2x object mode.
+
+    python bench_cascade.py --source clip.mp4 --recognize-every 15
+"""
+
+import argparse
+import os
+import time
+
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+
+from ultralytics import YOLO
+
+from bench_utils import encode_jpeg, load_images, percentile, print_table
+from face_index import DEFAULT_MODEL, FaceIndex
+from identity_cascade import IdentityCascade
+from vision_pipeline import LocalDetector
+
+
+def run_mode(detector, frames, mode):
+    state, samples = None, []
+    for jpeg in frames:
+        start = time.perf_counter()
+        output = detector.detect([{"image": jpeg, "mode": mode, "state": state}])[0]
+        samples.append((time.perf_counter() - start) * 1000)
+        state = output["state"]
+    return samples
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--model", default="yolov8n.pt")
+    ap.add_argument("--face-model", default=DEFAULT_MODEL)
+    ap.add_argument("--source", required=True, help="recorded clip, folder or glob of frames")
+    ap.add_argument("--limit", type=int, default=300)
+    ap.add_argument("--recognize-every", type=int, default=15)
+    args = ap.parse_args()
+
+    frames = [encode_jpeg(img) for img in load_images(args.source, limit=args.limit)]
+    face_index = FaceIndex(model_name=args.face_model)
+    face_index = face_index.load() if face_index.exists() else face_index.build()
+    cascade = IdentityCascade(face_index, recognize_every=args.recognize_every)
+    detector = LocalDetector(YOLO(args.model), cascade=cascade)
+    run_mode(detector, frames[:5], "face")  # warm-up, loads the DeepFace model
+    cascade.recognitions = 0
+
+    rows = []
+    for mode in ("object", "face"):
+        samples = run_mode(detector, frames, mode)
+        rows.append({
+            "mode": mode,
+            "frames": len(samples),
+            "mean_ms": sum(samples) / len(samples),
+            "p95_ms": percentile(samples, 95)
+        })
+
+    print_table(rows, ["mode", "frames", "mean_ms", "p95_ms"])
+    ratio = rows[1]["mean_ms"] / rows[0]["mean_ms"]
+    print(f"\nface/object cost ratio: {ratio:.2f}x ({'OK' if ratio < 2 else 'over'} the 2x target), "
+          f"{cascade.recognitions} DeepFace lookups for {len(frames)} frames")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Server-side class filtering and confidence floor versus unfiltered results.
+
+Runs every frame through LocalDetector with no filter, then with each
+filter as it would arrive in a `set_mode` message. The filter is passed to
+the model as `classes=` / a higher `conf`, so the rejected boxes are masked
+out before NMS. Reports per-frame latency, detections per frame and the
+JSON `detection_result` payload size, which is what a client-side filter
+would still have had to receive and parse.
+
+    python bench_filtering.py --source clip.mp4 --exclude person --allow "cell phone" cup --min-conf 0.5
+"""
+
+import argparse
+import json
+import os
+import time
+
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+
+import cv2
+
+from bench_utils import load_images, percentile, print_table
+from inference_backends import BACKENDS, load_model
+from vision_pipeline import LocalDetector
+
+
+def run(detector, payloads, options, warmup=2):
+    frames = [{"image": data, "mode": "object", "state": None, "options": options} for data in payloads]
+    for frame in frames[:warmup]:
+        detector.detect([frame])
+    latencies, outputs = [], []
+    for frame in frames:
+        started = time.perf_counter()
+        outputs.append(detector.detect([frame])[0])
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies, outputs
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--model", default="yolov8n.pt")
+    ap.add_argument("--backend", default="torch", choices=BACKENDS)
+    ap.add_argument("--source", help="image, folder, glob or video (default: dog.jpg)")
+    ap.add_argument("--exclude", nargs="*", default=["person"], help="deny list (exclude_classes)")
+    ap.add_argument("--allow", nargs="*", default=[], help="allow list (classes)")
+    ap.add_argument("--min-conf", type=float, default=0.5, help="confidence floor (min_conf)")
+    ap.add_argument("--conf", type=float, default=0.25, help="server confidence threshold")
+    ap.add_argument("--limit", type=int, default=20)
+    args = ap.parse_args()
+
+    images = load_images(args.source, limit=args.limit)
+    payloads = [cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 80])[1].tobytes() for image in images]
+    print(f"Corpus: {len(images)} frames at {images[0].shape[1]}x{images[0].shape[0]}")
+
+    detector = LocalDetector(load_model(args.model, args.backend), conf=args.conf)
+    cases = [("none", {})]
+    if args.exclude:
+        cases.append((f"exclude {', '.join(args.exclude)}", {"exclude_classes": args.exclude}))
+    if args.allow:
+        cases.append((f"allow {', '.join(args.allow)}", {"classes": args.allow}))
+    if args.min_conf > args.conf:
+        cases.append((f"min_conf {args.min_conf}", {"min_conf": args.min_conf}))
+
+    rows = []
+    for name, options in cases:
+        latencies, outputs = run(detector, payloads, options)
+        errors = [o["error"] for o in outputs if o["error"]]
+        if errors:
+            raise SystemExit(f"{name}: {errors[0]}")
+        sizes = [len(json.dumps(o["detections"])) for o in outputs]
+        rows.append({"filter": name, "p50_ms": percentile(latencies, 50), "p95_ms": percentile(latencies, 95),
+                     "dets_per_frame": sum(len(o["detections"]) for o in outputs) / len(outputs),
+                     "payload_bytes": sum(sizes) / len(sizes)})
+        print(f"{name}: p50 {percentile(latencies, 50):.1f} ms, {sum(sizes) / len(sizes):.0f} bytes/frame")
+
+    print()
+    print_table(rows, ["filter", "p50_ms", "p95_ms", "dets_per_frame", "payload_bytes"])
+
+
+if __name__ == "__main__":
+    main()
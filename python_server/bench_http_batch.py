@@ -0,0 +1,92 @@
+"""
+HTTP throughput of /detect/batch versus one /detect request per image.
+
+Needs a running server (python app.py). Sends the corpus once as individual
+base64 /detect posts, once as a single streamed NDJSON /detect/batch
+request and once as a single multipart /detect/batch upload, then reports
+images/sec and per-image errors for each. Multipart files are read while
+results stream back, so errors there usually mean the uploads were closed
+too early. That only shows once the server's job queue (64 pending images)
+fills and the reader waits, so send more images than that (`--repeat`).
+
+    python bench_http_batch.py --source path/to/photos --repeat 4  # 100+ images
+"""
+
+import argparse
+import json
+import time
+
+import requests
+
+from bench_utils import encode_jpeg, load_images, print_table, to_data_url
+
+
+def run_single(url, payloads):
+    started = time.perf_counter()
+    errors = 0
+    with requests.Session() as http:
+        for payload in payloads:
+            response = http.post(f"{url}/detect", json={"image": payload})
+            errors += response.status_code != 200
+    return len(payloads), errors, time.perf_counter() - started
+
+
+def run_batch(url, payloads):
+    def body():
+        for n, payload in enumerate(payloads):
+            yield (json.dumps({"id": n, "image": payload}) + "\n").encode()
+
+    started = time.perf_counter()
+    response = requests.post(f"{url}/detect/batch", data=body(), stream=True,
+                             headers={"Content-Type": "application/x-ndjson"})
+    return read_results(response, started)
+
+
+def run_multipart(url, jpegs):
+    files = [("images", (f"{n}.jpg", data, "image/jpeg")) for n, data in enumerate(jpegs)]
+    started = time.perf_counter()
+    response = requests.post(f"{url}/detect/batch", files=files, stream=True)
+    return read_results(response, started)
+
+
+def read_results(response, started):
+    """(images, errors, seconds) from a streamed /detect/batch response; prints the first error."""
+    images = errors = 0
+    for line in response.iter_lines():
+        result = json.loads(line)
+        if "summary" in result:
+            continue
+        images += 1
+        if result.get("error"):
+            if not errors:
+                print(f"  first error (image {result.get('index')}): {result['error']}")
+            errors += 1
+    return images, errors, time.perf_counter() - started
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--url", default="http://localhost:5001")
+    ap.add_argument("--source", help="image, folder, glob or video (default: dog.jpg)")
+    ap.add_argument("--limit", type=int, default=200)
+    ap.add_argument("--repeat", type=int, default=1, help="send the corpus this many times")
+    args = ap.parse_args()
+
+    jpegs = [encode_jpeg(img, quality=90) for img in load_images(args.source, limit=args.limit)] * args.repeat
+    payloads = [to_data_url(data) for data in jpegs]
+    print(f"Corpus: {len(payloads)} images")
+
+    rows = []
+    for name, run, corpus in (("/detect", run_single, payloads), ("/detect/batch ndjson", run_batch, payloads),
+                              ("/detect/batch multipart", run_multipart, jpegs)):
+        images, errors, elapsed = run(args.url, corpus)
+        rows.append({"endpoint": name, "images": images, "errors": errors,
+                     "seconds": elapsed, "images_per_s": images / elapsed if elapsed else 0.0})
+        print(f"{name}: {images / elapsed:.1f} images/s")
+
+    print()
+    print_table(rows, ["endpoint", "images", "errors", "seconds", "images_per_s"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Per-frame preprocessing cost: decode + letterbox + normalize.
+
+Compares the previous path (full-resolution decode, fresh canvas and
+tensor every frame) with the current one (reduced-scale JPEG decode for
+large frames, reused InputBuffers). Reports p50/p95 latency and the new
+memory allocated per frame (traced peak above the baseline), plus what
+that means as an allocation rate at 15 fps.
+
+    python bench_preprocess.py --resolutions 640x480 1920x1080 3840x2160
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import cv2
+
+from bench_utils import load_images, percentile, print_table
+from inference_backends import ExportedModel, InputBuffers
+from vision_pipeline import decode_reduced
+
+CLIENT_FPS = 15
+
+
+def make_paths(imgsz):
+    fresh = ExportedModel(imgsz)
+    fresh.buffers = InputBuffers(max_shapes=0)
+    reused = ExportedModel(imgsz)
+    return {
+        "fresh": lambda data: fresh._preprocess([decode_reduced(data)[0]]),
+        "reduced+reused": lambda data: reused._preprocess([decode_reduced(data, imgsz)[0]])
+    }
+
+
+def time_path(run, payloads, iterations):
+    latencies = []
+    for i in range(iterations):
+        started = time.perf_counter()
+        run(payloads[i % len(payloads)])
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+def allocated_per_frame(run, payloads, iterations):
+    run(payloads[0])  # buffers of the reused path are allocated on first use
+    tracemalloc.start()
+    peaks = []
+    for i in range(iterations):
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        run(payloads[i % len(payloads)])
+        peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    tracemalloc.stop()
+    return sum(peaks) / len(peaks) / 1e6
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--source", help="image, folder, glob or video (default: dog.jpg)")
+    ap.add_argument("--resolutions", nargs="+", default=["640x480", "1280x720", "1920x1080", "3840x2160"])
+    ap.add_argument("--imgsz", type=int, default=640, help="model input size")
+    ap.add_argument("--quality", type=int, default=80, help="JPEG quality of the test frames")
+    ap.add_argument("--iterations", type=int, default=50)
+    args = ap.parse_args()
+
+    images = load_images(args.source, limit=8)
+    paths = make_paths(args.imgsz)
+    rows = []
+    for resolution in args.resolutions:
+        size = tuple(int(v) for v in resolution.split("x"))
+        payloads = [cv2.imencode(".jpg", cv2.resize(image, size), [cv2.IMWRITE_JPEG_QUALITY, args.quality])[1]
+                    .tobytes() for image in images]
+        for name, run in paths.items():
+            time_path(run, payloads, 5)  # warm-up
+            latencies = time_path(run, payloads, args.iterations)
+            alloc_mb = allocated_per_frame(run, payloads, min(args.iterations, 20))
+            rows.append({"resolution": resolution, "path": name,
+                         "p50_ms": percentile(latencies, 50), "p95_ms": percentile(latencies, 95),
+                         "alloc_MB_per_frame": alloc_mb, "alloc_MB_per_s": alloc_mb * CLIENT_FPS})
+            print(f"{resolution} {name}: p50 {percentile(latencies, 50):.2f} ms, {alloc_mb:.1f} MB/frame")
+
+    print()
+    print_table(rows, ["resolution", "path", "p50_ms", "p95_ms", "alloc_MB_per_frame", "alloc_MB_per_s"])
+    print(f"\nalloc_MB_per_s assumes one client at {CLIENT_FPS} fps")
+
+
+if __name__ == "__main__":
+    main()
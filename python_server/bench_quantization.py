@@ -0,0 +1,123 @@
+"""
+INT8 vs fp32 report for the quantized detector.
+
+Runs a corpus through the fp32 model (the reference) and the INT8 model on
+the same backend. The fp32 detections are treated as ground truth, giving a
+mAP-proxy without labelled data:
+
+- AP50: per-class average precision of the INT8 detections (ranked by
+  confidence, matched at IoU >= 0.5), averaged over the classes fp32 found
+- precision / recall / mean IoU at the serving confidence threshold
+- p50 / p95 per-frame latency and the speedup
+
+    python bench_quantization.py --source test_images/ --calibration test_images/
+"""
+
+import argparse
+import os
+import time
+
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+
+import numpy as np
+
+from bench_utils import load_images, percentile, print_table
+from inference_backends import load_model
+from tracking import greedy_match, iou_matrix
+from vision_pipeline import result_arrays
+
+
+def run(model, images, conf, warmup=3):
+    for image in images[:warmup]:
+        model.predict(image, conf=conf, verbose=False)
+    results, latencies = [], []
+    for image in images:
+        started = time.perf_counter()
+        results.append(model.predict(image, conf=conf, verbose=False)[0])
+        latencies.append((time.perf_counter() - started) * 1000)
+    return [result_arrays(r) for r in results], latencies
+
+
+def match(reference, candidate, threshold):
+    """Same-class greedy IoU matches {candidate index: (reference index, iou)}."""
+    ref_boxes, _, ref_classes = reference
+    boxes, _, classes = candidate
+    iou = iou_matrix(boxes, ref_boxes)
+    if iou.size:
+        iou[classes[:, None] != ref_classes[None, :]] = 0.0
+    return {i: (j, float(iou[i, j])) for i, j in greedy_match(iou, threshold).items()}
+
+
+def ap50(references, candidates):
+    """Mean over reference classes of the all-point interpolated AP at IoU 0.5."""
+    scored = {}  # class -> list of (confidence, is_true_positive)
+    totals = {}
+    for reference, candidate in zip(references, candidates):
+        for cls in reference[2]:
+            totals[cls] = totals.get(cls, 0) + 1
+        matches = match(reference, candidate, 0.5)
+        for i, (conf, cls) in enumerate(zip(candidate[1], candidate[2])):
+            scored.setdefault(cls, []).append((conf, i in matches))
+
+    aps = []
+    for cls, total in totals.items():
+        hits = sorted(scored.get(cls, []), key=lambda s: -s[0])
+        tp = np.cumsum([hit for _, hit in hits]) if hits else np.zeros(0)
+        recall = np.concatenate([[0.0], tp / total, [1.0]])
+        precision = np.concatenate([[1.0], tp / np.arange(1, len(hits) + 1), [0.0]])
+        precision = np.maximum.accumulate(precision[::-1])[::-1]
+        aps.append(float(np.sum((recall[1:] - recall[:-1]) * precision[1:])))
+    return float(np.mean(aps)) if aps else 1.0
+
+
+def agreement(references, candidates):
+    matched, mean_iou = 0, []
+    for reference, candidate in zip(references, candidates):
+        matches = match(reference, candidate, 0.5)
+        matched += len(matches)
+        mean_iou.extend(iou for _, iou in matches.values())
+    n_ref = sum(len(r[1]) for r in references)
+    n_cand = sum(len(c[1]) for c in candidates)
+    return {
+        "precision": matched / n_cand if n_cand else 1.0,
+        "recall": matched / n_ref if n_ref else 1.0,
+        "mean_iou": float(np.mean(mean_iou)) if mean_iou else 0.0
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--model", default="yolov8n.pt")
+    ap.add_argument("--source", help="image, folder, glob or video (default: dog.jpg)")
+    ap.add_argument("--calibration", help="extra calibration images for the INT8 model")
+    ap.add_argument("--backend", default="onnxruntime", help="onnxruntime or openvino")
+    ap.add_argument("--threads", type=int, default=0)
+    ap.add_argument("--conf", type=float, default=0.5, help="serving confidence threshold")
+    ap.add_argument("--limit", type=int, default=200)
+    args = ap.parse_args()
+
+    images = load_images(args.source, limit=args.limit)
+    print(f"Corpus: {len(images)} frames, {os.cpu_count()} CPUs")
+
+    fp32 = load_model(args.model, args.backend, threads=args.threads)
+    int8 = load_model(args.model, args.backend, threads=args.threads, quantized=True, calibration=args.calibration)
+
+    references, fp32_ms = run(fp32, images, args.conf)
+    served, int8_ms = run(int8, images, args.conf)
+    ranked, _ = run(int8, images, min(0.001, args.conf), warmup=0)
+
+    stats = agreement(references, served)
+    rows = [
+        {"model": "fp32", "p50_ms": percentile(fp32_ms, 50), "p95_ms": percentile(fp32_ms, 95),
+         "speedup": 1.0, "ap50_proxy": 1.0, "precision": 1.0, "recall": 1.0, "mean_iou": 1.0},
+        dict(stats, model="int8", p50_ms=percentile(int8_ms, 50), p95_ms=percentile(int8_ms, 95),
+             speedup=percentile(fp32_ms, 50) / max(percentile(int8_ms, 50), 1e-6),
+             ap50_proxy=ap50(references, ranked))
+    ]
+
+    print(f"\nfp32 reference: {sum(len(r[1]) for r in references)} detections at conf >= {args.conf}\n")
+    print_table(rows, ["model", "p50_ms", "p95_ms", "speedup", "ap50_proxy", "precision", "recall", "mean_iou"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+JSON versus compact binary `detection_result` messages.
+
+Builds realistic tracked results (COCO labels, 1280x720 boxes) with a given
+number of detections, then lets `--clients` threads serialize their own
+stream of results at the same time, as the server does for simultaneous
+HUD clients. Serialization is what happens per emit: ResultCodec.encode()
+for compact sessions, then the Socket.IO packet encode (JSON text, or a
+placeholder plus one binary attachment). Reports bytes on the wire per
+frame, server CPU per frame and the share of one core that `--clients`
+clients at `--fps` would cost.
+
+    python bench_result_encoding.py --clients 20 --detections 5 20 50
+"""
+
+import argparse
+import random
+import threading
+import time
+
+from socketio import packet
+
+from bench_utils import SAMPLE_IMAGE, print_table
+from result_codec import ResultCodec
+
+LABELS_FILE = SAMPLE_IMAGE.parent / "yolov3.txt"
+
+
+def make_results(labels, detections, frames, seed=0):
+    rng = random.Random(seed)
+    results = []
+    for i in range(frames):
+        dets = []
+        for track_id in range(detections):
+            x, y = rng.uniform(0, 1100), rng.uniform(0, 560)
+            dets.append({
+                "bbox": [round(x, 1), round(y, 1), round(x + rng.uniform(20, 180), 1),
+                         round(y + rng.uniform(20, 160), 1)],
+                "confidence": round(rng.uniform(0.25, 0.99), 3),
+                "label": labels[rng.randrange(len(labels))],
+                "id": track_id,
+                "track_id": track_id
+            })
+        results.append({"detections": dets, "timestamp": 1700000000000.0 + i * 66.7, "mode": "object",
+                        "server_latency_ms": round(rng.uniform(20, 60), 1), "batch_size": 4})
+    return results
+
+
+def serialize(payload, codec):
+    """Bytes on the wire for one emit, as the Socket.IO server encodes it."""
+    data = codec.encode(payload) if codec else payload
+    encoded = packet.Packet(packet.EVENT, data=["detection_result", data], namespace="/").encode()
+    parts = encoded if isinstance(encoded, list) else [encoded]
+    return sum(len(p.encode("utf-8")) if isinstance(p, str) else len(p) for p in parts)
+
+
+def run_clients(results, clients, encoding, labels):
+    sizes = []
+    lock = threading.Lock()
+    start = threading.Barrier(clients + 1)
+
+    def client():
+        codec = ResultCodec(labels) if encoding == "compact" else None
+        start.wait()
+        local_sizes = [serialize(payload, codec) for payload in results]
+        with lock:
+            sizes.extend(local_sizes)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    cpu_started, wall_started = time.process_time(), time.perf_counter()
+    for thread in threads:
+        thread.join()
+    cpu_s, wall_s = time.process_time() - cpu_started, time.perf_counter() - wall_started
+    return sizes, cpu_s, wall_s
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--clients", type=int, default=20)
+    ap.add_argument("--fps", type=float, default=15, help="frames per second per client")
+    ap.add_argument("--detections", type=int, nargs="+", default=[0, 5, 20, 50], help="detections per frame")
+    ap.add_argument("--frames", type=int, default=300, help="results serialized per client")
+    args = ap.parse_args()
+
+    with open(LABELS_FILE) as f:
+        labels = [line.strip() for line in f if line.strip()]
+
+    rows = []
+    for count in args.detections:
+        results = make_results(labels, count, args.frames)
+        for encoding in ("json", "compact"):
+            run_clients(results[:20], args.clients, encoding, labels)  # warm-up
+            sizes, cpu_s, wall_s = run_clients(results, args.clients, encoding, labels)
+            cpu_us = cpu_s / len(sizes) * 1e6
+            rows.append({"detections": count, "encoding": encoding,
+                         "bytes_per_frame": sum(sizes) / len(sizes),
+                         "cpu_us_per_frame": cpu_us,
+                         "core_share": cpu_us * 1e-6 * args.fps * args.clients,
+                         "frames_per_s": len(sizes) / wall_s})
+            print(f"{count} dets, {encoding}: {sum(sizes) / len(sizes):.0f} bytes, {cpu_us:.1f} us CPU per frame")
+
+    print()
+    print_table(rows, ["detections", "encoding", "bytes_per_frame", "cpu_us_per_frame", "core_share", "frames_per_s"])
+    print(f"\ncore_share: fraction of one core spent serializing for {args.clients} clients at {args.fps:g} fps")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Region-of-interest inference versus the usual full-frame pass.
+
+Runs each frame once without an ROI (downscaled to the model input) and
+then with a centred ROI covering each requested fraction of the frame
+(cropped and tiled at native resolution). Reports per-frame latency and how
+many detections fall inside the ROI in each mode. On high-resolution
+frames the ROI run is expected to find more small objects.
+
+    python bench_roi.py --source clip_4k.mp4 --areas 0.05 0.1 0.25 1.0
+"""
+
+import argparse
+import math
+import os
+import time
+
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+
+import cv2
+import numpy as np
+
+from bench_utils import load_images, percentile, print_table
+from inference_backends import BACKENDS, load_model
+from vision_pipeline import LocalDetector
+
+
+def centred_roi(area):
+    half = math.sqrt(area) / 2
+    return [0.5 - half, 0.5 - half, 0.5 + half, 0.5 + half]
+
+
+def run(detector, payloads, options, warmup=2):
+    frames = [{"image": data, "mode": "object", "state": None, "options": options} for data in payloads]
+    for frame in frames[:warmup]:
+        detector.detect([frame])
+    latencies, outputs = [], []
+    for frame in frames:
+        started = time.perf_counter()
+        outputs.append(detector.detect([frame])[0])
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies, outputs
+
+
+def inside(outputs, roi, size):
+    """Detections whose centre lies in the (fractional) ROI, summed over frames."""
+    width, height = size
+    x1, y1, x2, y2 = roi[0] * width, roi[1] * height, roi[2] * width, roi[3] * height
+    count = 0
+    for output in outputs:
+        for det in output["detections"]:
+            cx = (det["bbox"][0] + det["bbox"][2]) / 2
+            cy = (det["bbox"][1] + det["bbox"][3]) / 2
+            count += x1 <= cx <= x2 and y1 <= cy <= y2
+    return count
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--model", default="yolov8n.pt")
+    ap.add_argument("--backend", default="torch", choices=BACKENDS)
+    ap.add_argument("--source", help="image, folder, glob or video (default: dog.jpg)")
+    ap.add_argument("--resize", default="1920x1080", help="resize frames to WxH first ('' keeps them)")
+    ap.add_argument("--areas", type=float, nargs="+", default=[0.05, 0.1, 0.25, 0.5, 1.0])
+    ap.add_argument("--conf", type=float, default=0.25)
+    ap.add_argument("--limit", type=int, default=20)
+    args = ap.parse_args()
+
+    images = load_images(args.source, limit=args.limit)
+    if args.resize:
+        size = tuple(int(v) for v in args.resize.split("x"))
+        images = [cv2.resize(image, size) for image in images]
+    size = (images[0].shape[1], images[0].shape[0])
+    payloads = [cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes() for image in images]
+    print(f"Corpus: {len(images)} frames at {size[0]}x{size[1]}")
+
+    detector = LocalDetector(load_model(args.model, args.backend), conf=args.conf)
+    full_ms, full_outputs = run(detector, payloads, {})
+    rows = [{"roi_area": "full frame", "p50_ms": percentile(full_ms, 50), "p95_ms": percentile(full_ms, 95),
+             "relative_cost": 1.0, "full_frame_dets_in_roi": None, "roi_dets": None}]
+    for area in args.areas:
+        roi = centred_roi(area)
+        roi_ms, roi_outputs = run(detector, payloads, {"roi": roi})
+        rows.append({
+            "roi_area": area,
+            "p50_ms": percentile(roi_ms, 50),
+            "p95_ms": percentile(roi_ms, 95),
+            "relative_cost": percentile(roi_ms, 50) / max(percentile(full_ms, 50), 1e-6),
+            "full_frame_dets_in_roi": inside(full_outputs, roi, size),
+            "roi_dets": int(np.sum([len(o["detections"]) for o in roi_outputs]))
+        })
+        print(f"ROI {area:.0%}: p50 {percentile(roi_ms, 50):.1f} ms")
+
+    print()
+    print_table(rows, ["roi_area", "p50_ms", "p95_ms", "relative_cost", "full_frame_dets_in_roi", "roi_dets"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Cold-start benchmark for the vision server.
+
+Launches `python app.py` (debug reloader off) and polls GET /health, then
+reports wall-clock time to the first HTTP response and to vision readiness,
+plus the server's own startup breakdown (model load, first warm-up frame).
+
+    python bench_startup.py --runs 3
+    python bench_startup.py --env VISION_BACKEND=openvino VISION_WORKERS=2
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import requests
+
+from bench_utils import BASE_DIR, print_table
+
+
+def run_once(port, env, timeout):
+    env = dict(os.environ, PORT=str(port), FLASK_DEBUG="0", PYTHONUNBUFFERED="1", **env)
+    started = time.perf_counter()
+    server = subprocess.Popen([sys.executable, "app.py"], cwd=BASE_DIR, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    first_response = ready = None
+    health = {}
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                health = requests.get(f"http://127.0.0.1:{port}/health", timeout=1).json()
+                if first_response is None:
+                    first_response = time.perf_counter() - started
+                if health.get("ready") or health.get("vision") == "error":
+                    ready = time.perf_counter() - started
+                    break
+            except requests.RequestException:
+                pass
+            time.sleep(0.05)
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+    timings = health.get("startup", {})
+    return {
+        "first_response_s": first_response,
+        "ready_s": ready if health.get("ready") else None,
+        "model_load_s": timings.get("model_load_s"),
+        "warmup_first_ms": timings.get("warmup_first_ms"),
+        "vision": health.get("vision", "no response")
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--runs", type=int, default=3)
+    ap.add_argument("--port", type=int, default=5099)
+    ap.add_argument("--timeout", type=float, default=300)
+    ap.add_argument("--env", nargs="*", default=[], help="extra KEY=VALUE settings for the server")
+    args = ap.parse_args()
+
+    env = dict(item.split("=", 1) for item in args.env)
+    rows = []
+    for run in range(args.runs):
+        row = dict(run_once(args.port, env, args.timeout), run=run + 1)
+        rows.append(row)
+        print(f"run {run + 1}: first response {row['first_response_s']}s, ready {row['ready_s']}s ({row['vision']})")
+
+    print()
+    print_table(rows, ["run", "first_response_s", "ready_s", "model_load_s", "warmup_first_ms", "vision"])
+
+
+if __name__ == "__main__":
+    main()
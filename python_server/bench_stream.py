@@ -0,0 +1,137 @@
+"""
+Latency and throughput of the vision socket under N simultaneous cameras.
+
+Replays a folder or video of frames over M concurrent Socket.IO clients,
+each sending `detect_frame` at `--fps` like VisionHUD (JPEG as a binary
+attachment). Each client starts at a different frame. Every result is
+matched to its frame by `timestamp`, giving the client-side round trip.
+Frames that never get a result were replaced in the server's
+latest-frame-wins slot and count as dropped.
+
+For each client count, the report gives offered and delivered frames per
+second, the drop rate and p50/p95/p99 round-trip latency. It is printed as
+a table and, with `--json`, written to a file. Pass an earlier report as
+`--baseline` to fail (exit 1) when p95 latency or throughput regresses by
+more than `--tolerance`:
+
+    python serve.py &
+    python bench_stream.py --source clip.mp4 --clients 1 2 4 8 --fps 15 --json before.json
+    # ... change the detector ...
+    python bench_stream.py --source clip.mp4 --clients 1 2 4 8 --fps 15 --baseline before.json
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+
+import cv2
+
+from bench_utils import encode_jpeg, load_images, percentile, print_table
+from load_test import StreamClient, wait_ready
+
+COLUMNS = ["clients", "target_fps", "offered_fps", "throughput_fps", "drop_rate", "cached", "errors",
+           "p50_ms", "p95_ms", "p99_ms", "max_ms"]
+
+
+def run_clients(url, frames, clients, fps, set_mode, duration):
+    """Streams from `clients` clients at once; returns one report row."""
+    stride = max(1, len(frames) // clients)
+    streams = [StreamClient(url, frames[i * stride:] + frames[:i * stride], fps, set_mode) for i in range(clients)]
+    threads = [threading.Thread(target=s.run, args=(duration,)) for s in streams]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies = [ms for s in streams for ms in s.latencies]
+    sent = sum(s.sent for s in streams)
+    received = sum(s.received for s in streams)
+    return {
+        "clients": clients,
+        "target_fps": fps,
+        "offered_fps": sent / elapsed,
+        "throughput_fps": received / elapsed,
+        "drop_rate": (sent - received) / sent if sent else 0.0,
+        "cached": sum(s.cached for s in streams),
+        "errors": sum(s.errors for s in streams),
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": max(latencies, default=0.0),
+        "sent": sent,
+        "received": received
+    }
+
+
+def regressions(rows, baseline, tolerance):
+    """Messages for client counts whose p95 latency or throughput got worse than the baseline allows."""
+    previous = {row["clients"]: row for row in baseline["runs"]}
+    messages = []
+    for row in rows:
+        base = previous.get(row["clients"])
+        if base is None:
+            continue
+        if base["p95_ms"] and row["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            messages.append(f"{row['clients']} clients: p95 {base['p95_ms']:.1f} -> {row['p95_ms']:.1f} ms")
+        if row["throughput_fps"] < base["throughput_fps"] * (1 - tolerance):
+            messages.append(f"{row['clients']} clients: throughput "
+                            f"{base['throughput_fps']:.2f} -> {row['throughput_fps']:.2f} fps")
+    return messages
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--url", default="http://127.0.0.1:5001")
+    ap.add_argument("--source", help="image, folder, glob or video to replay (default: dog.jpg)")
+    ap.add_argument("--limit", type=int, default=300, help="max frames loaded from the source")
+    ap.add_argument("--resize", help="resize frames to WxH before encoding")
+    ap.add_argument("--quality", type=int, default=50, help="JPEG quality (the HUD sends 0.5)")
+    ap.add_argument("--clients", type=int, nargs="+", default=[1, 2, 4, 8], help="concurrent clients per run")
+    ap.add_argument("--fps", type=float, default=15, help="frames per second per client (0 = closed loop)")
+    ap.add_argument("--duration", type=float, default=20, help="seconds per run")
+    ap.add_argument("--set-mode", default='{"mode": "object"}', help="set_mode message sent on connect")
+    ap.add_argument("--json", help="write the report to this file")
+    ap.add_argument("--baseline", help="earlier --json report to compare against")
+    ap.add_argument("--tolerance", type=float, default=0.1, help="allowed relative regression")
+    args = ap.parse_args()
+
+    health = wait_ready(args.url)
+    images = load_images(args.source, limit=args.limit)
+    if args.resize:
+        size = tuple(int(v) for v in args.resize.split("x"))
+        images = [cv2.resize(image, size) for image in images]
+    frames = [encode_jpeg(image, args.quality) for image in images]
+    print(f"Server: {health.get('model')} ({health.get('backend')}), replaying {len(frames)} frames at "
+          f"{images[0].shape[1]}x{images[0].shape[0]}, {sum(map(len, frames)) // len(frames)} bytes each")
+
+    rows = []
+    for clients in args.clients:
+        row = run_clients(args.url, frames, clients, args.fps, json.loads(args.set_mode), args.duration)
+        rows.append(row)
+        print(f"{clients} clients: {row['throughput_fps']:.1f} fps delivered, drop rate {row['drop_rate']:.1%}, "
+              f"p95 {row['p95_ms']:.1f} ms")
+
+    print()
+    print_table(rows, COLUMNS)
+    report = {"config": vars(args), "server": health, "runs": rows}
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.json}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(rows, json.load(f), args.tolerance)
+        for message in found:
+            print(f"❌ Regression: {message}")
+        if found:
+            sys.exit(1)
+        print(f"✅ Within {args.tolerance:.0%} of {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Tiled inference versus single-pass full-frame inference on large frames.
+
+Without labelled data, the reference is one pass at the frame's native
+size (`--reference-imgsz`, the quadratically expensive option). For each
+mode, the table reports per-frame latency and recall against that
+reference, both overall and for small objects (reference boxes under
+`--small` px on their longer side):
+
+- single:  one pass, frame letterboxed down to 640
+- tiled:   overlapping native-resolution tiles, one predict call, global NMS
+
+    python bench_tiling.py --source clip_4k.mp4 --tile-sizes 640 960 --overlaps 0.1 0.2
+"""
+
+import argparse
+import os
+import time
+
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+
+import cv2
+import numpy as np
+
+from bench_utils import load_images, percentile, print_table
+from inference_backends import BACKENDS, load_model
+from tiling import crop_tiles, merge_parts
+from tracking import greedy_match, iou_matrix
+from vision_pipeline import predict_by_size, result_arrays
+
+
+def single_pass(model, image, conf, imgsz=None):
+    kwargs = {"imgsz": imgsz} if imgsz else {}
+    return result_arrays(model.predict(image, conf=conf, verbose=False, **kwargs)[0])
+
+
+def tiled_pass(model, image, conf, tile, overlap):
+    tiles = crop_tiles(image, [(0, 0, image.shape[1], image.shape[0])], tile, overlap)
+    results = predict_by_size(model, [crop for crop, _, _ in tiles], [size for _, _, size in tiles], conf)
+    placements = [(1.0, offset, crop.shape[1::-1]) for crop, offset, _ in tiles]
+    return merge_parts([result_arrays(r) for r in results], placements)
+
+
+def timed(run, images):
+    run(images[0])  # warm-up for this input size
+    outputs, latencies = [], []
+    for image in images:
+        started = time.perf_counter()
+        outputs.append(run(image))
+        latencies.append((time.perf_counter() - started) * 1000)
+    return outputs, latencies
+
+
+def recall(references, candidates, small):
+    """(overall recall, small-object recall) of same-class matches at IoU >= 0.5."""
+    found = total = small_found = small_total = 0
+    for (ref_boxes, _, ref_classes), (boxes, _, classes) in zip(references, candidates):
+        iou = iou_matrix(ref_boxes, boxes)
+        if iou.size:
+            iou[ref_classes[:, None] != classes[None, :]] = 0.0
+        matched = greedy_match(iou, 0.5)
+        is_small = np.max(ref_boxes[:, 2:] - ref_boxes[:, :2], axis=1) < small if len(ref_boxes) else []
+        total += len(ref_boxes)
+        found += len(matched)
+        small_total += int(np.sum(is_small))
+        small_found += sum(1 for row in matched if is_small[row])
+    return (found / total if total else 1.0), (small_found / small_total if small_total else 1.0)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--model", default="yolov8n.pt")
+    ap.add_argument("--backend", default="torch", choices=BACKENDS)
+    ap.add_argument("--source", help="image, folder, glob or video (default: dog.jpg)")
+    ap.add_argument("--resize", default="1920x1080", help="resize frames to WxH first ('' keeps them)")
+    ap.add_argument("--tile-sizes", type=int, nargs="+", default=[640])
+    ap.add_argument("--overlaps", type=float, nargs="+", default=[0.2])
+    ap.add_argument("--reference-imgsz", type=int, help="reference input size (default: frame's longer side)")
+    ap.add_argument("--small", type=int, default=64, help="small-object size threshold in px")
+    ap.add_argument("--conf", type=float, default=0.25)
+    ap.add_argument("--limit", type=int, default=20)
+    args = ap.parse_args()
+
+    images = load_images(args.source, limit=args.limit)
+    if args.resize:
+        size = tuple(int(v) for v in args.resize.split("x"))
+        images = [cv2.resize(image, size) for image in images]
+    reference_imgsz = args.reference_imgsz or -(-max(images[0].shape[:2]) // 32) * 32
+    print(f"Corpus: {len(images)} frames at {images[0].shape[1]}x{images[0].shape[0]}, "
+          f"reference pass at imgsz {reference_imgsz}")
+
+    model = load_model(args.model, args.backend)
+    references, reference_ms = timed(lambda image: single_pass(model, image, args.conf, reference_imgsz), images)
+    cases = [("single 640", lambda image: single_pass(model, image, args.conf))]
+    for tile in args.tile_sizes:
+        for overlap in args.overlaps:
+            cases.append((f"tiled {tile} / {overlap:.0%}",
+                          lambda image, tile=tile, overlap=overlap: tiled_pass(model, image, args.conf, tile, overlap)))
+
+    rows = [{"mode": f"reference {reference_imgsz}", "p50_ms": percentile(reference_ms, 50),
+             "p95_ms": percentile(reference_ms, 95), "recall": 1.0, "small_recall": 1.0,
+             "detections": sum(len(r[1]) for r in references)}]
+    for name, run in cases:
+        outputs, latencies = timed(run, images)
+        overall, small = recall(references, outputs, args.small)
+        rows.append({"mode": name, "p50_ms": percentile(latencies, 50), "p95_ms": percentile(latencies, 95),
+                     "recall": overall, "small_recall": small, "detections": sum(len(o[1]) for o in outputs)})
+        print(f"{name}: p50 {percentile(latencies, 50):.1f} ms, recall {overall:.2f} (small {small:.2f})")
+
+    print()
+    print_table(rows, ["mode", "p50_ms", "p95_ms", "recall", "small_recall", "detections"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Skip-frame tracking benchmark: throughput gain versus accuracy loss.
+
+Replays a clip through LocalDetector with `detect_every` = 1 (reference) and
+each k, and reports frames/sec, speedup, and how well the tracked boxes agree
+with full per-frame detection (recall at IoU >= 0.5 and mean matched IoU).
+
+    python bench_tracking.py --source clip.mp4 --k 2 3 5
+"""
+
+import argparse
+import os
+import time
+
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+
+import numpy as np
+from ultralytics import YOLO
+
+from bench_utils import encode_jpeg, load_images, print_table
+from tracking import greedy_match, iou_matrix
+from vision_pipeline import LocalDetector
+
+
+def replay(detector, frames, k):
+    state, results = None, []
+    start = time.perf_counter()
+    for jpeg in frames:
+        output = detector.detect([{"image": jpeg, "mode": "object", "options": {"detect_every": k}, "state": state}])[0]
+        state = output["state"]
+        results.append(output["detections"])
+    return results, len(frames) / (time.perf_counter() - start)
+
+
+def agreement(reference, candidate):
+    hits, total, ious = 0, 0, []
+    for ref, cand in zip(reference, candidate):
+        total += len(ref)
+        if not ref or not cand:
+            continue
+        iou = iou_matrix([d["bbox"] for d in ref], [d["bbox"] for d in cand])
+        for r, c in greedy_match(iou, 0.5).items():
+            if ref[r]["label"] == cand[c]["label"]:
+                hits += 1
+                ious.append(iou[r, c])
+    return (hits / total if total else 1.0), (float(np.mean(ious)) if ious else 0.0)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--model", default="yolov8n.pt")
+    ap.add_argument("--source", required=True, help="recorded clip, folder or glob of frames")
+    ap.add_argument("--limit", type=int, default=300)
+    ap.add_argument("--k", type=int, nargs="+", default=[2, 3, 5])
+    args = ap.parse_args()
+
+    frames = [encode_jpeg(img) for img in load_images(args.source, limit=args.limit)]
+    detector = LocalDetector(YOLO(args.model))
+    replay(detector, frames[:5], 1)  # warm-up
+
+    reference, base_fps = replay(detector, frames, 1)
+    rows = [{"k": 1, "fps": base_fps, "speedup": 1.0, "recall": 1.0, "mean_iou": 1.0}]
+    for k in args.k:
+        tracked, fps = replay(detector, frames, k)
+        recall, mean_iou = agreement(reference, tracked)
+        rows.append({"k": k, "fps": fps, "speedup": fps / base_fps, "recall": recall, "mean_iou": mean_iou})
+
+    print_table(rows, ["k", "fps", "speedup", "recall", "mean_iou"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Microbenchmark: binary JPEG attachments vs base64 data-URLs on the vision socket.
+
+Encodes frames at the HUD's JPEG quality (0.5 -> 50) and compares bytes on the
+wire and server-side decode time (strip + b64decode + imdecode versus
+np.frombuffer + imdecode) for both `detect_frame` payload formats.
+
+    python bench_transport.py --source path/to/frames --iterations 200
+"""
+
+import argparse
+import time
+
+from bench_utils import encode_jpeg, load_images, percentile, print_table, to_data_url
+from vision_pipeline import decode_frame
+
+
+def time_decode(payloads, iterations):
+    samples = []
+    for i in range(iterations):
+        payload = payloads[i % len(payloads)]
+        start = time.perf_counter()
+        decode_frame(payload)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--source", help="image, folder, glob or video (default: dog.jpg)")
+    ap.add_argument("--quality", type=int, default=50)
+    ap.add_argument("--iterations", type=int, default=200)
+    args = ap.parse_args()
+
+    jpegs = [encode_jpeg(img, args.quality) for img in load_images(args.source, limit=64)]
+    data_urls = [to_data_url(j) for j in jpegs]
+
+    rows = []
+    for name, payloads in (("base64", data_urls), ("binary", jpegs)):
+        time_decode(payloads, 10)  # warm-up
+        samples = time_decode(payloads, args.iterations)
+        rows.append({
+            "transport": name,
+            "bytes_per_frame": sum(len(p) for p in payloads) // len(payloads),
+            "decode_p50_ms": percentile(samples, 50),
+            "decode_p99_ms": percentile(samples, 99)
+        })
+
+    print_table(rows, ["transport", "bytes_per_frame", "decode_p50_ms", "decode_p99_ms"])
+    saved = 1 - rows[1]["bytes_per_frame"] / rows[0]["bytes_per_frame"]
+    print(f"\nBinary transport saves {saved:.1%} bytes per frame")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Shared helpers for the NEXORA Vision Core benchmark scripts.
+"""
+
+import base64
+import glob
+import os
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+BASE_DIR = Path(__file__).parent
+SAMPLE_IMAGE = BASE_DIR.parent / "object-detection-opencv-master" / "dog.jpg"
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+
+
+def load_images(source=None, limit=None):
+    """Loads BGR images from a file, directory, glob or video (defaults to dog.jpg)."""
+    source = str(source or SAMPLE_IMAGE)
+    if os.path.isdir(source):
+        paths = sorted(p for p in glob.glob(os.path.join(source, '*'))
+                       if p.lower().endswith(IMAGE_EXTENSIONS))
+    elif any(ch in source for ch in '*?['):
+        paths = sorted(glob.glob(source))
+    elif source.lower().endswith(IMAGE_EXTENSIONS):
+        paths = [source]
+    else:
+        return _load_video(source, limit)
+
+    images = []
+    for path in paths[:limit]:
+        img = cv2.imread(path)
+        if img is not None:
+            images.append(img)
+    return images
+
+
+def _load_video(path, limit=None):
+    cap = cv2.VideoCapture(path)
+    images = []
+    while limit is None or len(images) < limit:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        images.append(frame)
+    cap.release()
+    return images
+
+
+def encode_jpeg(image, quality=50):
+    """Encodes like the HUD does: canvas.toDataURL('image/jpeg', 0.5)."""
+    ok, buffer = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise ValueError("JPEG encode failed")
+    return buffer.tobytes()
+
+
+def to_data_url(jpeg_bytes):
+    return "data:image/jpeg;base64," + base64.b64encode(jpeg_bytes).decode('ascii')
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    return float(np.percentile(np.asarray(values, dtype=np.float64), pct))
+
+
+def print_table(rows, columns):
+    """Prints a list of dicts as an aligned plain-text table."""
+    widths = [max(len(col), *(len(_fmt(r.get(col))) for r in rows)) for col in columns]
+    print("  ".join(col.ljust(w) for col, w in zip(columns, widths)))
+    print("  ".join("-" * w for w in widths))
+    for row in rows:
+        print("  ".join(_fmt(row.get(col)).ljust(w) for col, w in zip(columns, widths)))
+
+
+def _fmt(value):
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    return str(value)
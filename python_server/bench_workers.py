@@ -0,0 +1,90 @@
+"""
+Throughput scaling benchmark for the process-pool inference workers.
+
+Runs a test corpus of JPEG frames through ProcessInferencePool with 1..N
+workers (each pinned to its own cores, one inference thread per worker by
+default) and reports frames/sec and scaling efficiency versus one worker.
+
+    python bench_workers.py --workers 1 2 4 --source path/to/frames
+"""
+
+import argparse
+import os
+import threading
+import time
+
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+
+from bench_utils import encode_jpeg, load_images, print_table
+from process_workers import ProcessInferencePool, parse_cpu_sets
+
+
+def run_case(model_path, frames, workers, slots_per_job, queue_depth, threads, pinning, duration, backend):
+    pool = ProcessInferencePool(
+        model_path,
+        workers=workers,
+        slots_per_job=slots_per_job,
+        queue_depth=queue_depth,
+        cpu_sets=parse_cpu_sets(pinning, workers),
+        threads_per_worker=threads,
+        backend=backend
+    )
+    handles = pool.start()  # each worker queue_depth times: one driver thread per entry
+    counts = [0] * workers
+    lock = threading.Lock()
+
+    def drive(handle):
+        batch = [{"image": frames[i % len(frames)]} for i in range(slots_per_job)]
+        handle.detect(batch)  # warm-up
+        end = time.perf_counter() + duration
+        while time.perf_counter() < end:
+            handle.detect(batch)
+            with lock:
+                counts[handle.index] += len(batch)
+
+    drivers = [threading.Thread(target=drive, args=(h,)) for h in handles]
+    started = time.perf_counter()
+    for t in drivers:
+        t.start()
+    for t in drivers:
+        t.join()
+    elapsed = time.perf_counter() - started
+    pool.stop()
+    return sum(counts) / elapsed
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--model", default="yolov8n.pt")
+    ap.add_argument("--source", help="image, folder, glob or video (default: dog.jpg)")
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    ap.add_argument("--slots-per-job", type=int, default=4, help="frames sent to a worker per call")
+    ap.add_argument("--queue-depth", type=int, default=2, help="jobs in flight per worker (1 = no queueing)")
+    ap.add_argument("--threads-per-worker", type=int, default=1)
+    ap.add_argument("--pinning", default="auto", help='"auto", "" (off) or "0-1;2-3"')
+    ap.add_argument("--duration", type=float, default=15)
+    ap.add_argument("--backend", default="torch", help="torch, onnxruntime or openvino")
+    args = ap.parse_args()
+
+    frames = [encode_jpeg(img) for img in load_images(args.source, limit=64)]
+    print(f"Corpus: {len(frames)} frames, {os.cpu_count()} CPUs")
+
+    rows = []
+    for workers in args.workers:
+        fps = run_case(args.model, frames, workers, args.slots_per_job, args.queue_depth,
+                       args.threads_per_worker, args.pinning, args.duration, args.backend)
+        base = rows[0]["fps"] / rows[0]["workers"] if rows else fps / workers
+        rows.append({
+            "workers": workers,
+            "fps": fps,
+            "speedup": fps / base,
+            "efficiency": fps / (base * workers)
+        })
+        print(f"workers={workers}: {fps:.1f} fps")
+
+    print()
+    print_table(rows, ["workers", "fps", "speedup", "efficiency"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Multi-image throughput of the OpenCV DNN YOLOv3 detector.
+
+Loads Yolov3Detector once per DNN backend/target and pushes the corpus
+through it in blobFromImages batches of each size, reporting images/sec
+and per-batch latency. Needs yolov3.weights (see
+object-detection-opencv-master/README_INTEGRATION.md).
+
+    python bench_yolov3.py --batch-sizes 1 4 8 --dnn opencv:cpu openvino:cpu
+"""
+
+import argparse
+import os
+import time
+
+from bench_utils import load_images, percentile, print_table
+from inference_backends import YOLOV3_DIR, Yolov3Model
+
+
+def run_case(detector, images, batch_size, iterations):
+    def batch(i):
+        return [images[(i * batch_size + j) % len(images)] for j in range(batch_size)]
+
+    detector.detect(batch(0))  # warm-up: the first forward allocates the network
+    latencies = []
+    started = time.perf_counter()
+    for i in range(iterations):
+        batch_started = time.perf_counter()
+        detector.detect(batch(i))
+        latencies.append((time.perf_counter() - batch_started) * 1000)
+    return iterations * batch_size / (time.perf_counter() - started), latencies
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--weights", default=os.path.join(YOLOV3_DIR, "yolov3.weights"))
+    ap.add_argument("--source", help="image, folder, glob or video (default: dog.jpg)")
+    ap.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8])
+    ap.add_argument("--dnn", nargs="+", default=["opencv:cpu"], help="backend:target pairs")
+    ap.add_argument("--threads", type=int, default=0, help="OpenCV threads (0 = default)")
+    ap.add_argument("--iterations", type=int, default=10, help="batches per case")
+    args = ap.parse_args()
+
+    images = load_images(args.source, limit=32)
+    print(f"Corpus: {len(images)} frames, {os.cpu_count()} CPUs")
+
+    rows = []
+    for dnn in args.dnn:
+        backend, _, target = dnn.partition(":")
+        try:
+            detector = Yolov3Model(args.weights, backend, target or "cpu", threads=args.threads).detector
+        except Exception as e:
+            print(f"❌ {dnn}: {e}")
+            continue
+        for batch_size in args.batch_sizes:
+            images_per_s, latencies = run_case(detector, images, batch_size, args.iterations)
+            rows.append({"dnn": dnn, "batch": batch_size, "images_per_s": images_per_s,
+                         "batch_p50_ms": percentile(latencies, 50), "batch_p95_ms": percentile(latencies, 95)})
+            print(f"{dnn} batch={batch_size}: {images_per_s:.1f} images/s")
+
+    print()
+    print_table(rows, ["dnn", "batch", "images_per_s", "batch_p50_ms", "batch_p95_ms"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+"""
+Headless detection over a video file, an image folder or a glob.
+
+Runs as a three-stage pipeline joined by bounded queues:
+
+    reader (decode) -> inference (batched predict) -> writer (JSONL/Parquet, video)
+
+Each stage is its own thread. OpenCV decode/encode and model inference
+release the GIL, so the stages overlap on separate cores. The bounded
+queues cap memory and make the slowest stage set the pace. Video frames go
+through the SORT tracker, so detections carry stable `track_id`s.
+
+With --tile, each frame is split into overlapping tiles inferred at native
+resolution (all tiles of a batch in one predict call) and merged with a
+global NMS, which finds small objects in 1080p/4K footage.
+
+    python detect_offline.py footage.mp4 --out detections.jsonl --annotate annotated.mp4
+    python detect_offline.py "photos/*.jpg" --out detections.parquet --backend openvino
+    python detect_offline.py footage_4k.mp4 --tile --tile-size 640 --tile-overlap 0.2
+"""
+
+import argparse
+import glob
+import json
+import os
+import queue
+import threading
+import time
+
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+
+import cv2
+
+from inference_backends import BACKENDS, load_model
+from tiling import crop_tiles, merge_parts
+from tracking import SortTracker
+from vision_pipeline import array_detections, predict_by_size, result_arrays, tracked_detections
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+_DONE = object()
+
+
+def open_source(source):
+    """Returns (frame iterator of (name, image, timestamp_ms), fps or None, is_video)."""
+    if os.path.isdir(source):
+        paths = sorted(p for p in glob.glob(os.path.join(source, '*')) if p.lower().endswith(IMAGE_EXTENSIONS))
+    elif any(ch in source for ch in '*?['):
+        paths = sorted(glob.glob(source))
+    elif source.lower().endswith(IMAGE_EXTENSIONS):
+        paths = [source]
+    else:
+        cap = cv2.VideoCapture(source)
+        if not cap.isOpened():
+            raise ValueError(f"Could not open video {source}")
+        return _video_frames(cap, source), cap.get(cv2.CAP_PROP_FPS) or None, True
+    return _image_frames(paths), None, False
+
+
+def _video_frames(cap, source):
+    name = os.path.basename(source)
+    try:
+        while True:
+            ok, image = cap.read()
+            if not ok:
+                break
+            yield name, image, cap.get(cv2.CAP_PROP_POS_MSEC)
+    finally:
+        cap.release()
+
+
+def _image_frames(paths):
+    for path in paths:
+        image = cv2.imread(path)
+        if image is not None:
+            yield path, image, None
+
+
+class JsonlWriter:
+    """One line per frame: {"frame", "source", "timestamp_ms", "detections": [...]}."""
+
+    def __init__(self, path):
+        self.file = open(path, "w")
+
+    def write(self, record):
+        self.file.write(json.dumps(record) + "\n")
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    """One row per detection, flushed in row groups so memory stays flat."""
+
+    COLUMNS = ("frame", "source", "timestamp_ms", "label", "confidence", "x1", "y1", "x2", "y2", "track_id")
+
+    def __init__(self, path, rows_per_group=50000):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise SystemExit("Parquet output needs pyarrow: pip install pyarrow")
+        self.pa = pyarrow
+        self.schema = pyarrow.schema([
+            ("frame", pyarrow.int64()), ("source", pyarrow.string()), ("timestamp_ms", pyarrow.float64()),
+            ("label", pyarrow.string()), ("confidence", pyarrow.float32()),
+            ("x1", pyarrow.float32()), ("y1", pyarrow.float32()), ("x2", pyarrow.float32()), ("y2", pyarrow.float32()),
+            ("track_id", pyarrow.int64())
+        ])
+        self.writer = pyarrow.parquet.ParquetWriter(path, self.schema)
+        self.rows_per_group = rows_per_group
+        self.columns = {name: [] for name in self.COLUMNS}
+
+    def write(self, record):
+        for det in record["detections"]:
+            x1, y1, x2, y2 = det["bbox"]
+            track_id = det.get("track_id")
+            values = (record["frame"], record["source"], record["timestamp_ms"], det["label"], det["confidence"],
+                      x1, y1, x2, y2, track_id if track_id is not None and track_id >= 0 else None)
+            for name, value in zip(self.COLUMNS, values):
+                self.columns[name].append(value)
+        if len(self.columns["frame"]) >= self.rows_per_group:
+            self._flush()
+
+    def _flush(self):
+        if self.columns["frame"]:
+            self.writer.write_table(self.pa.table(self.columns, schema=self.schema))
+            self.columns = {name: [] for name in self.COLUMNS}
+
+    def close(self):
+        self._flush()
+        self.writer.close()
+
+
+def annotate(image, detections):
+    """Draws boxes in the HUD's cyan, labelled with class, confidence and track id."""
+    for det in detections:
+        x1, y1, x2, y2 = map(int, det["bbox"])
+        track_id = det.get("track_id")
+        text = f"{det['label']} {det['confidence']:.0%}" + (f" #{track_id}" if track_id is not None else "")
+        cv2.rectangle(image, (x1, y1), (x2, y2), (0, 243, 255), 2)
+        cv2.putText(image, text, (x1, max(12, y1 - 5)), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 243, 255), 1)
+    return image
+
+
+class OfflineDetector:
+    """Reader -> inference -> writer threads joined by bounded queues."""
+
+    def __init__(self, model, conf=0.5, batch=8, queue_size=32, track=True, tile_size=0, tile_overlap=0.2):
+        self.model = model
+        self.conf = conf
+        self.tile_size = tile_size
+        self.tile_overlap = tile_overlap
+        self.batch = max(1, batch)
+        self.queue_size = queue_size
+        self.tracker = SortTracker() if track else None
+        self.busy = {"decode": 0.0, "infer": 0.0, "write": 0.0}
+        self.frames = 0
+        self.detections = 0
+        self.error = None
+
+    def run(self, frames, writers, video_path=None, video_fps=None):
+        decoded = queue.Queue(self.queue_size)
+        detected = queue.Queue(self.queue_size)
+        stages = [
+            threading.Thread(target=self._guard, args=(decoded, self._read, frames, decoded), name="offline-decode"),
+            threading.Thread(target=self._guard, args=(detected, self._infer, decoded, detected),
+                             name="offline-infer"),
+            threading.Thread(target=self._guard, args=(None, self._write, detected, writers, video_path, video_fps),
+                             name="offline-write")
+        ]
+        started = time.perf_counter()
+        for stage in stages:
+            stage.start()
+        for stage in stages:
+            stage.join()
+        if self.error:
+            raise self.error
+        return time.perf_counter() - started
+
+    def _guard(self, output, stage, *args):
+        """Runs a stage; on failure records the error and tells the next stage to stop."""
+        try:
+            stage(*args)
+        except BaseException as e:
+            self.error = self.error or e
+            if output is not None:
+                try:
+                    output.put_nowait(_DONE)
+                except queue.Full:
+                    pass  # the consumer is busy and will see self.error
+
+    def _put(self, q, item):
+        """Blocking put that gives up once another stage has failed."""
+        while self.error is None:
+            try:
+                q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def _get(self, q):
+        """Blocking get that returns _DONE once another stage has failed."""
+        while self.error is None:
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        return _DONE
+
+    def _read(self, frames, decoded):
+        iterator = iter(frames)
+        index = 0
+        while self.error is None:
+            started = time.perf_counter()
+            item = next(iterator, None)
+            self.busy["decode"] += time.perf_counter() - started
+            if item is None:
+                break
+            self._put(decoded, (index,) + item)
+            index += 1
+        self._put(decoded, _DONE)
+
+    def _infer(self, decoded, detected):
+        done = False
+        state = None
+        while not done:
+            batch = [self._get(decoded)]
+            while len(batch) < self.batch and not decoded.empty():
+                batch.append(decoded.get())
+            if batch[-1] is _DONE:
+                batch.pop()
+                done = True
+            if not batch:
+                break
+            if self.error is not None:
+                break
+
+            started = time.perf_counter()
+            images = [item[2] for item in batch]
+            if self.tile_size:
+                arrays = self._predict_tiled(images)
+            else:
+                results = self.model.predict(images, conf=self.conf, verbose=False)
+                arrays = [result_arrays(result) for result in results]
+            outputs = []
+            for xyxy, confs, classes in arrays:
+                if self.tracker:
+                    tracked, state = self.tracker.update(state, xyxy, confs, classes)
+                    outputs.append(tracked_detections(tracked, self.model.names))
+                else:
+                    outputs.append(array_detections(xyxy, confs, classes, self.model.names))
+            self.busy["infer"] += time.perf_counter() - started
+
+            for item, detections in zip(batch, outputs):
+                self._put(detected, item + (detections,))
+        self._put(detected, _DONE)
+
+    def _predict_tiled(self, images):
+        """Merged (xyxy, confs, class_ids) per image from its overlapping tiles."""
+        tiles = [crop_tiles(image, [(0, 0, image.shape[1], image.shape[0])], self.tile_size, self.tile_overlap)
+                 for image in images]
+        parts = [part for image_tiles in tiles for part in image_tiles]
+        results = predict_by_size(self.model, [crop for crop, _, _ in parts], [size for _, _, size in parts], self.conf)
+        arrays, start = [], 0
+        for image_tiles in tiles:
+            image_results = results[start:start + len(image_tiles)]
+            start += len(image_tiles)
+            placements = [(1.0, offset, crop.shape[1::-1]) for crop, offset, _ in image_tiles]
+            arrays.append(merge_parts([result_arrays(r) for r in image_results], placements))
+        return arrays
+
+    def _write(self, detected, writers, video_path, video_fps):
+        video = video_size = None
+        try:
+            while self.error is None:
+                item = self._get(detected)
+                if item is _DONE:
+                    break
+                index, name, image, timestamp_ms, detections = item
+                started = time.perf_counter()
+                record = {"frame": index, "source": name,
+                          "timestamp_ms": round(timestamp_ms, 1) if timestamp_ms is not None else None,
+                          "detections": detections}
+                for writer in writers:
+                    writer.write(record)
+                if video_path:
+                    if video is None:
+                        video_size = (image.shape[1], image.shape[0])
+                        video = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*"mp4v"), video_fps or 10, video_size)
+                    frame = annotate(image, detections)
+                    if (frame.shape[1], frame.shape[0]) != video_size:
+                        frame = cv2.resize(frame, video_size)  # image folders can mix sizes
+                    video.write(frame)
+                self.busy["write"] += time.perf_counter() - started
+                self.frames += 1
+                self.detections += len(detections)
+        finally:
+            if video is not None:
+                video.release()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("source", help="video file, image folder, glob or single image")
+    ap.add_argument("--out", default="detections.jsonl", help=".jsonl or .parquet (one row per detection)")
+    ap.add_argument("--annotate", help="write an annotated .mp4 here")
+    ap.add_argument("--model", default="yolov8n.pt")
+    ap.add_argument("--backend", default="torch", choices=BACKENDS)
+    ap.add_argument("--quantized", action="store_true", help="use the INT8 model")
+    ap.add_argument("--threads", type=int, default=0, help="inference threads (0 = runtime default)")
+    ap.add_argument("--conf", type=float, default=0.5)
+    ap.add_argument("--batch", type=int, default=8, help="frames per predict call")
+    ap.add_argument("--queue-size", type=int, default=32, help="frames buffered between stages")
+    ap.add_argument("--no-track", action="store_true", help="skip tracking on video sources")
+    ap.add_argument("--tile", action="store_true", help="infer overlapping native-resolution tiles")
+    ap.add_argument("--tile-size", type=int, default=640)
+    ap.add_argument("--tile-overlap", type=float, default=0.2, help="fraction of a tile shared with its neighbour")
+    args = ap.parse_args()
+
+    frames, fps, is_video = open_source(args.source)
+    model = load_model(args.model, args.backend, threads=args.threads, quantized=args.quantized)
+    writer = ParquetWriter(args.out) if args.out.endswith(".parquet") else JsonlWriter(args.out)
+    detector = OfflineDetector(model, conf=args.conf, batch=args.batch, queue_size=args.queue_size,
+                               track=is_video and not args.no_track,
+                               tile_size=args.tile_size if args.tile else 0, tile_overlap=args.tile_overlap)
+
+    print(f"🎬 {args.source} -> {args.out}" + (f" + {args.annotate}" if args.annotate else ""))
+    try:
+        elapsed = detector.run(frames, [writer], args.annotate, fps)
+    finally:
+        writer.close()
+
+    sustained = detector.frames / elapsed if elapsed else 0.0
+    print(f"✅ {detector.frames} frames, {detector.detections} detections in {elapsed:.1f}s "
+          f"({sustained:.1f} fps sustained)")
+    if is_video and fps:
+        print(f"⏩ {sustained / fps:.1f}x real time (source {fps:.1f} fps)")
+    print("⏱️  Stage busy time: " + ", ".join(
+        f"{stage} {busy:.1f}s ({busy / elapsed:.0%})" for stage, busy in detector.busy.items()))
+
+
+if __name__ == "__main__":
+    main()
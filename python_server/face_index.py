@@ -0,0 +1,351 @@
+"""
+Resident face-embedding index for NEXORA identity recognition.
+
+Embeddings live in a contiguous float32 `.npy` matrix of L2-normalized rows,
+memory-mapped read-only so cold start is instant and every worker process
+shares the same page-cache copy. A small JSON sidecar holds the labels and
+the number of valid rows. A lookup is a single matrix-vector product
+(cosine similarity) plus an optional top-k partition.
+
+Build it from DeepFace's `ds_model_*.pkl` cache or the raw images in
+`known_faces/`:
+
+    python face_index.py --build --model SFace
+"""
+
+import argparse
+import glob
+import json
+import ntpath
+import os
+import pickle
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+KNOWN_FACES_DIR = Path(__file__).parent / "known_faces"
+DEFAULT_MODEL = "SFace"
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+# DeepFace's cosine *distance* thresholds, expressed as minimum similarity.
+SIMILARITY_THRESHOLDS = {
+    "VGG-Face": 1 - 0.68,
+    "Facenet": 1 - 0.40,
+    "Facenet512": 1 - 0.30,
+    "ArcFace": 1 - 0.68,
+    "SFace": 1 - 0.593,
+}
+
+
+def normalize(vectors):
+    """L2-normalizes a vector or each row of a matrix (float32)."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def label_from_path(path):
+    """File name without extension. DeepFace pickles made on Windows store backslash paths."""
+    return os.path.splitext(ntpath.basename(path))[0]
+
+
+def read_deepface_pickle(path):
+    """Returns (labels, embeddings) from a DeepFace `ds_model_*.pkl` cache."""
+    with open(path, "rb") as f:
+        representations = pickle.load(f)
+    labels, embeddings = [], []
+    for rep in representations:
+        if isinstance(rep, dict):
+            identity, embedding = rep.get("identity"), rep.get("embedding")
+        else:
+            identity, embedding = rep[0], rep[1]
+        if identity is None or embedding is None:
+            continue
+        labels.append(label_from_path(identity))
+        embeddings.append(embedding)
+    return labels, embeddings
+
+
+def embed_image(image, model_name=DEFAULT_MODEL, enforce_detection=True, detector_backend="opencv"):
+    """
+    Returns the DeepFace embedding of the most prominent face in an image
+    (path or BGR array). Use detector_backend="skip" for an already-cropped face.
+    """
+    from deepface import DeepFace
+
+    reps = DeepFace.represent(
+        img_path=image,
+        model_name=model_name,
+        detector_backend=detector_backend,
+        enforce_detection=enforce_detection
+    )
+    if not reps:
+        raise ValueError("No face found")
+    best = max(reps, key=lambda r: r.get("facial_area", {}).get("w", 0) * r.get("facial_area", {}).get("h", 0))
+    return best["embedding"]
+
+
+class FaceIndex:
+    """
+    Memory-mapped gallery of normalized face embeddings with cosine lookup.
+
+    The matrix file is preallocated with spare rows, so enrolling a face
+    writes one row in place and then atomically replaces the JSON sidecar
+    with the new count. Readers in other processes pick the change up on
+    their next refresh() without rescanning the gallery. When the matrix is
+    full it is copied once into a new, twice-as-large generation file, so
+    appends cost amortized constant time. Deleted faces keep their row with
+    a null label until the next grow or rebuild compacts them away.
+    """
+
+    MIN_CAPACITY = 64
+
+    def __init__(self, folder=KNOWN_FACES_DIR, model_name=DEFAULT_MODEL):
+        self.folder = Path(folder)
+        self.model_name = model_name
+        self.threshold = SIMILARITY_THRESHOLDS.get(model_name, 0.4)
+        self.meta_path = self.folder / f"face_index_{model_name.lower()}.json"
+        self.matrix = np.zeros((0, 0), dtype=np.float32)
+        self.labels = np.array([], dtype=object)
+        self.count = 0
+        self.meta = {}
+        self._deleted = np.array([], dtype=np.int64)
+        self._meta_stamp = None
+        self._write_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+
+    def __len__(self):
+        return self.count - len(self._deleted)
+
+    @property
+    def matrix_path(self):
+        return self.folder / self.meta.get("matrix", f"face_index_{self.model_name.lower()}.0.npy")
+
+    def exists(self):
+        return self.meta_path.exists()
+
+    def load(self):
+        """Memory-maps the matrix and reads the labels. Returns self."""
+        stat = os.stat(self.meta_path)
+        with open(self.meta_path, "r") as f:
+            meta = json.load(f)
+        count = int(meta["count"])
+        labels = np.array(meta["labels"][:count], dtype=object)
+        matrix_path = self.folder / meta["matrix"]
+        matrix = np.load(matrix_path, mmap_mode="r") if count else np.zeros((0, 0), np.float32)
+        with self._state_lock:
+            self.meta = meta
+            self._meta_stamp = (stat.st_mtime_ns, stat.st_size)
+            self.matrix, self.labels, self.count = matrix, labels, count
+            self._deleted = np.flatnonzero([label is None for label in labels])
+        return self
+
+    def refresh(self):
+        """Reloads if another process updated the index. Returns True if reloaded."""
+        try:
+            stat = os.stat(self.meta_path)
+        except FileNotFoundError:
+            return False
+        if (stat.st_mtime_ns, stat.st_size) == self._meta_stamp:
+            return False
+        self.load()
+        return True
+
+    def save(self, labels, embeddings):
+        """Writes a fresh index generation from labels and raw embeddings."""
+        with self._write_lock:
+            if self.exists() and not self.meta:
+                self.load()
+            embeddings = normalize(embeddings) if len(embeddings) else np.zeros((0, 0), np.float32)
+            self._write_generation(list(labels), embeddings, len(labels))
+        return self.load()
+
+    def enroll(self, name, embedding, replace=False):
+        """
+        Appends one face without touching the rest of the gallery.
+
+        With replace=True any existing samples for the name are deleted
+        first (re-enrollment). Returns the number of samples now held for it.
+        """
+        row = normalize(embedding)
+        with self._write_lock:
+            if self.exists():
+                self.refresh()
+            labels = list(self.meta.get("labels", [])[:self.count])
+            if replace:
+                labels = [None if label == name else label for label in labels]
+
+            dim = self.meta.get("dim")
+            if self.count and dim != row.shape[0]:
+                raise ValueError(f"Embedding has {row.shape[0]} dims, index expects {dim}")
+            capacity = int(self.meta.get("capacity", 0))
+            if self.count >= capacity or not dim:
+                matrix = self.matrix[:self.count] if self.count else np.zeros((0, row.shape[0]), np.float32)
+                keep = [i for i, label in enumerate(labels) if label is not None]
+                self._write_generation(
+                    [labels[i] for i in keep] + [name],
+                    np.vstack([np.asarray(matrix)[keep], row[None, :]]),
+                    capacity=max(self.MIN_CAPACITY, 2 * (len(keep) + 1))
+                )
+            else:
+                writable = np.load(self.matrix_path, mmap_mode="r+")
+                writable[self.count] = row
+                writable.flush()
+                del writable
+                self._write_meta(dict(self.meta, count=self.count + 1, labels=labels + [name]))
+        self.load()
+        return self.names().get(name, 0)
+
+    def delete(self, name):
+        """Removes every sample enrolled under name. Returns how many were removed."""
+        with self._write_lock:
+            self.refresh()
+            labels = list(self.meta.get("labels", [])[:self.count])
+            removed = sum(1 for label in labels if label == name)
+            if removed:
+                labels = [None if label == name else label for label in labels]
+                self._write_meta(dict(self.meta, labels=labels))
+        self.load()
+        return removed
+
+    def names(self):
+        """Returns {name: sample_count} for all enrolled faces."""
+        names = {}
+        for label in self.labels:
+            if label is not None:
+                names[label] = names.get(label, 0) + 1
+        return names
+
+    def _write_generation(self, labels, rows, capacity=None):
+        """Writes rows into a new matrix file and points the sidecar at it."""
+        self.folder.mkdir(parents=True, exist_ok=True)
+        dim = rows.shape[1] if rows.ndim == 2 else 0
+        capacity = max(capacity or len(labels), self.MIN_CAPACITY if dim else 0)
+        generation = int(self.meta.get("generation", -1)) + 1
+        name = f"face_index_{self.model_name.lower()}.{generation}.npy"
+
+        matrix = np.zeros((capacity, dim), dtype=np.float32)
+        matrix[:len(labels)] = rows
+        tmp = self.folder / (name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.save(f, matrix)
+        os.replace(tmp, self.folder / name)
+
+        old_path = self.matrix_path if self.meta else None
+        self._write_meta({
+            "model_name": self.model_name,
+            "dim": dim,
+            "count": len(labels),
+            "capacity": capacity,
+            "generation": generation,
+            "matrix": name,
+            "labels": labels
+        })
+        if old_path and old_path.name != name:
+            try:
+                old_path.unlink()
+            except OSError:
+                pass  # still mapped by a reader (Windows); removed on a later generation
+
+    def _write_meta(self, meta):
+        tmp = self.meta_path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self.meta_path)
+        self.meta = meta
+
+    def build(self):
+        """
+        Builds the index from DeepFace's pickle cache for this model, or by
+        embedding the raw images in the folder when no cache exists.
+        """
+        pattern = str(self.folder / f"ds_model_{self.model_name.lower().replace('-', '')}_*.pkl")
+        pickles = glob.glob(pattern)
+        labels, embeddings = [], []
+        if pickles:
+            for path in pickles:
+                pkl_labels, pkl_embeddings = read_deepface_pickle(path)
+                labels.extend(pkl_labels)
+                embeddings.extend(pkl_embeddings)
+        else:
+            for path in sorted(self.folder.iterdir()):
+                if path.suffix.lower() not in IMAGE_EXTENSIONS:
+                    continue
+                try:
+                    embeddings.append(embed_image(str(path), self.model_name))
+                    labels.append(label_from_path(path))
+                except ValueError as e:
+                    print(f"⚠️  Skipping {path.name}: {e}")
+        return self.save(labels, embeddings)
+
+    def search(self, embedding, top_k=1):
+        """Returns up to top_k (label, similarity) pairs, best first."""
+        with self._state_lock:
+            matrix, labels, count, deleted = self.matrix, self.labels, self.count, self._deleted
+        if count - len(deleted) == 0:
+            return []
+        query = normalize(embedding)
+        scores = matrix[:count] @ query
+        if len(deleted):
+            scores[deleted] = -np.inf
+        top_k = min(top_k, count - len(deleted))
+        if top_k == 1:
+            best = [int(np.argmax(scores))]
+        else:
+            best = np.argpartition(-scores, top_k - 1)[:top_k]
+            best = best[np.argsort(-scores[best])]
+        return [(labels[i], float(scores[i])) for i in best]
+
+    def identify(self, embedding):
+        """Returns (name, similarity), with name "Unknown" below the model threshold."""
+        matches = self.search(embedding, top_k=1)
+        if not matches or matches[0][1] < self.threshold:
+            return "Unknown", matches[0][1] if matches else 0.0
+        return matches[0]
+
+
+def load_or_build(folder=KNOWN_FACES_DIR, model_name=DEFAULT_MODEL):
+    index = FaceIndex(folder, model_name)
+    return index.load() if index.exists() else index.build()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--folder", default=str(KNOWN_FACES_DIR))
+    ap.add_argument("--model", default=DEFAULT_MODEL)
+    ap.add_argument("--build", action="store_true", help="rebuild the index from pickles/images")
+    ap.add_argument("--bench", type=int, metavar="N", help="benchmark lookups against N synthetic faces")
+    args = ap.parse_args()
+
+    if args.bench:
+        bench(args.bench)
+        return
+
+    index = FaceIndex(args.folder, args.model)
+    index = index.build() if args.build or not index.exists() else index.load()
+    print(f"✅ {len(index)} faces indexed ({index.model_name}) -> {index.matrix_path}")
+
+
+def bench(n, dim=128, queries=2000):
+    """Times single lookups against a synthetic gallery of n faces."""
+    import tempfile
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as folder:
+        index = FaceIndex(folder, "bench")
+        index.save([f"person_{i}" for i in range(n)], rng.standard_normal((n, dim), dtype=np.float32))
+        probes = rng.standard_normal((queries, dim), dtype=np.float32)
+        samples = []
+        for probe in probes:
+            start = time.perf_counter()
+            index.search(probe, top_k=5)
+            samples.append((time.perf_counter() - start) * 1000)
+        print(f"{n} faces x {dim}-d: p50 {np.percentile(samples, 50):.3f} ms, "
+              f"p99 {np.percentile(samples, 99):.3f} ms per lookup (top-5)")
+        del index
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Detect-then-recognize cascade for the `face` scan mode.
+
+Running DeepFace on every full frame is the most expensive thing the vision
+server could do, so recognition is staged:
+
+1. YOLO (already run for the frame) proposes `person` boxes, which the
+   session's SortTracker turns into stable person tracks.
+2. A cheap OpenCV Haar face detector runs only inside each person crop.
+3. The DeepFace embedding + FaceIndex lookup runs only for tracks that have
+   no identity yet, or every `recognize_every` frames per track. In between,
+   the identity cached on the track is reused.
+
+Identities are kept in a plain dict keyed by track id so the state can be
+threaded through worker processes along with the frame.
+"""
+
+import time
+
+import cv2
+
+from face_index import embed_image
+
+
+class IdentityCascade:
+    """
+    Person -> face -> identity cascade with identities cached per track.
+
+    `face_index` is a FaceIndex, or a function returning one that is called
+    on the first face-mode frame, so object-only servers never load or build
+    the index.
+    """
+
+    def __init__(self, face_index, recognize_every=15, refresh_interval=1.0):
+        self._face_index = face_index
+        self.recognize_every = recognize_every
+        self.refresh_interval = refresh_interval
+        self.face_detector = cv2.CascadeClassifier(
+            cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
+        )
+        self.recognitions = 0
+        self._last_refresh = 0.0
+
+    @property
+    def face_index(self):
+        if callable(self._face_index):
+            self._face_index = self._face_index()
+        return self._face_index
+
+    def process(self, image, person_tracks, identities=None, timings=None, live_ids=None):
+        """
+        Returns (face detections, updated identities) for one frame.
+
+        person_tracks is a list of (track_id, box, conf) from the tracker.
+        live_ids are the ids of every track still held by the tracker: their
+        identities are kept through missed detections and only the others
+        are pruned (None keeps just this frame's tracks). If given, `timings`
+        receives the nanoseconds spent in face detection and in recognition
+        (`face_detect`, `face_recognition`).
+        """
+        identities = identities or {}
+        self._maybe_refresh()
+        detections = []
+        live = {tid: identity for tid, identity in identities.items() if tid in live_ids} if live_ids else {}
+        detect_ns = recognize_ns = 0
+
+        for track_id, box, conf in person_tracks:
+            identity = identities.get(track_id) or {"name": "Unknown", "similarity": 0.0, "since_recognition": None}
+            started = time.perf_counter_ns()
+            face = self._find_face(image, box)
+            detect_ns += time.perf_counter_ns() - started
+            if face is not None:
+                since = identity["since_recognition"]
+                if since is None or since >= self.recognize_every:
+                    started = time.perf_counter_ns()
+                    self._recognize(image, face, identity)
+                    recognize_ns += time.perf_counter_ns() - started
+                else:
+                    identity["since_recognition"] = since + 1
+                identity["face_rel"] = _relative(face, box)
+                detections.append(self._face_detection(face, conf, identity, track_id))
+            live[track_id] = identity
+
+        if timings is not None:
+            if person_tracks:
+                timings["face_detect"] = detect_ns
+            if recognize_ns:
+                timings["face_recognition"] = recognize_ns
+        return detections, live
+
+    def extrapolate(self, person_tracks, identities=None):
+        """
+        Places cached faces on extrapolated person boxes for skip-frames,
+        without touching the image or the face index.
+        """
+        identities = identities or {}
+        detections = []
+        for track_id, box, conf in person_tracks:
+            identity = identities.get(track_id)
+            if identity and identity.get("face_rel"):
+                face = _absolute(identity["face_rel"], box)
+                detections.append(self._face_detection(face, conf, identity, track_id))
+        return detections, identities
+
+    def _face_detection(self, face, conf, identity, track_id):
+        return {
+            "bbox": [round(float(v), 1) for v in face],
+            "confidence": round(float(conf), 3),
+            "label": "face",
+            "name": identity["name"],
+            "similarity": round(identity["similarity"], 3),
+            "id": track_id,
+            "track_id": track_id
+        }
+
+    def _maybe_refresh(self):
+        now = time.monotonic()
+        if now - self._last_refresh >= self.refresh_interval:
+            self._last_refresh = now
+            self.face_index.refresh()
+
+    def _find_face(self, image, box):
+        """
+        Runs the Haar detector inside a person box. Tall (standing) boxes are
+        only searched in their upper half; webcam close-ups are searched whole.
+        """
+        h, w = image.shape[:2]
+        x1, y1, x2, y2 = [int(round(v)) for v in box]
+        if y2 - y1 > 1.5 * (x2 - x1):
+            y2 = y1 + (y2 - y1) // 2
+        x1, y1, x2, y2 = max(0, x1), max(0, y1), min(w, x2), min(h, y2)
+        if x2 - x1 < 24 or y2 - y1 < 24:
+            return None
+
+        gray = cv2.equalizeHist(cv2.cvtColor(image[y1:y2, x1:x2], cv2.COLOR_BGR2GRAY))
+        min_side = max(24, (x2 - x1) // 8)
+        faces = self.face_detector.detectMultiScale(gray, 1.1, 5, minSize=(min_side, min_side))
+        if len(faces) == 0:
+            return None
+        fx, fy, fw, fh = max(faces, key=lambda f: f[2] * f[3])
+        return [float(x1 + fx), float(y1 + fy), float(x1 + fx + fw), float(y1 + fy + fh)]
+
+    def _recognize(self, image, face, identity):
+        h, w = image.shape[:2]
+        x1, y1, x2, y2 = face
+        mx, my = (x2 - x1) * 0.1, (y2 - y1) * 0.1
+        crop = image[max(0, int(y1 - my)):min(h, int(y2 + my)), max(0, int(x1 - mx)):min(w, int(x2 + mx))]
+        identity["since_recognition"] = 0
+        try:
+            embedding = embed_image(crop, self.face_index.model_name,
+                                    enforce_detection=False, detector_backend="skip")
+            name, similarity = self.face_index.identify(embedding)
+            identity["name"], identity["similarity"] = name, float(similarity)
+            self.recognitions += 1
+        except Exception:
+            pass  # keep the cached identity; retried after recognize_every frames
+
+
+def _relative(face, box):
+    """Face box as fractions of its person box."""
+    x1, y1, x2, y2 = box
+    w, h = max(x2 - x1, 1e-6), max(y2 - y1, 1e-6)
+    return [(face[0] - x1) / w, (face[1] - y1) / h, (face[2] - x1) / w, (face[3] - y1) / h]
+
+
+def _absolute(rel, box):
+    x1, y1, x2, y2 = box
+    w, h = x2 - x1, y2 - y1
+    return [x1 + rel[0] * w, y1 + rel[1] * h, x1 + rel[2] * w, y1 + rel[3] * h]
@@ -0,0 +1,398 @@
+"""
+Pluggable CPU inference backends for the YOLOv8 detector.
+
+`torch` runs the Ultralytics model as before. `onnxruntime` and `openvino`
+run an exported copy of the same weights. The export is cached next to the
+weights (yolov8n.onnx, yolov8n_openvino_model/) and reused across restarts;
+it is only redone when the weights are newer than the artifact.
+
+With `quantized=True` the ONNX export is additionally INT8-quantized
+(static, QDQ, calibrated on a few local images) and cached as
+yolov8n.int8.onnx. Both onnxruntime and openvino run that file; the torch
+backend has no INT8 CPU path here and falls back to onnxruntime.
+
+Exported models are wrapped in a small runner that does the Ultralytics
+letterbox, decode and class-aware NMS in NumPy/OpenCV, so the inference
+thread count is fully under our control. Its letterbox canvas and input
+tensor are preallocated and reused across calls (InputBuffers), so a frame
+costs no fresh full-size allocations. The runner's `predict()` returns
+results shaped like Ultralytics ones (`result.boxes.xyxy/conf/cls`,
+`result.names`), which is all LocalDetector and the benchmarks rely on.
+
+`yolov3` and `yolov3-openvino` swap in the OpenCV DNN YOLOv3 detector from
+object-detection-opencv-master/ (darknet weights, no export) behind the
+same interface, on the OpenCV CPU or OpenVINO Inference Engine backend.
+"""
+
+import ast
+import collections
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+BACKENDS = ("torch", "onnxruntime", "openvino", "yolov3", "yolov3-openvino")
+YOLOV3_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "object-detection-opencv-master")
+
+
+def export_path(weights, backend, quantized=False):
+    """Where the exported artifact for `weights` lives (Ultralytics' own naming)."""
+    stem = os.path.splitext(weights)[0]
+    if backend.startswith("yolov3"):
+        return weights if weights.endswith(".weights") else os.path.join(YOLOV3_DIR, "yolov3.weights")
+    if quantized:
+        return stem + ".int8.onnx"
+    if backend == "onnxruntime":
+        return stem + ".onnx"
+    if backend == "openvino":
+        return stem + "_openvino_model"
+    return weights
+
+
+def export_model(weights, backend, imgsz=640, quantized=False, calibration=None):
+    """
+    Exports `weights` for the backend once and returns the artifact path.
+
+    Exports use a dynamic batch/height/width so the pipeline's micro-batches
+    and rectangular letterboxing work without re-exporting.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}', expected one of {', '.join(BACKENDS)}")
+    if quantized and backend.startswith("yolov3"):
+        raise ValueError("The YOLOv3 backends have no INT8 model")
+    if quantized:
+        return quantize_model(weights, calibration, imgsz)
+    target = export_path(weights, backend)
+    if backend == "torch" or backend.startswith("yolov3") or _is_fresh(target, weights):
+        return target
+
+    from ultralytics import YOLO
+    fmt = "onnx" if backend == "onnxruntime" else "openvino"
+    print(f"📦 Exporting {weights} to {fmt} (cached at {target})")
+    exported = YOLO(weights).export(format=fmt, imgsz=imgsz, dynamic=True)
+    return str(exported).rstrip("/\\")
+
+
+def quantize_model(weights, calibration=None, imgsz=640):
+    """
+    Statically quantizes the ONNX export to INT8 once and returns its path.
+
+    Activations are calibrated on dog.jpg plus `calibration` (image, folder,
+    glob or video of deployment-like frames). The detection head's box/score decode stays in
+    float, since quantizing it costs far more accuracy than it saves time.
+    """
+    target = export_path(weights, "onnxruntime", quantized=True)
+    fp32 = export_model(weights, "onnxruntime", imgsz)
+    if _is_fresh(target, fp32):
+        return target
+
+    import onnx
+    from onnxruntime.quantization import (CalibrationDataReader, CalibrationMethod, QuantFormat, QuantType,
+                                          quantize_static)
+
+    from bench_utils import load_images
+
+    images = load_images() + (load_images(calibration, limit=64) if calibration else [])
+    letterbox = ExportedModel(imgsz)
+    graph = onnx.load(fp32, load_external_data=False).graph
+    input_name = graph.input[0].name
+
+    class Reader(CalibrationDataReader):
+        def __init__(self):
+            self.batches = iter(letterbox._preprocess([image])[0].copy() for image in images)
+
+        def get_next(self):
+            batch = next(self.batches, None)
+            return None if batch is None else {input_name: batch}
+
+    print(f"📦 Quantizing {fp32} to INT8 on {len(images)} calibration images (cached at {target})")
+    quantize_static(
+        fp32, target, Reader(),
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=True,
+        calibrate_method=CalibrationMethod.MinMax,
+        nodes_to_exclude=_decode_nodes(graph)
+    )
+    return target
+
+
+def load_model(weights, backend="torch", threads=0, imgsz=640, quantized=False, calibration=None):
+    """
+    Loads the detector for a backend, exporting first if needed.
+
+    threads=0 leaves the runtime default (usually all physical cores).
+    """
+    backend = backend or "torch"
+    if quantized and backend == "torch":
+        backend = "onnxruntime"
+    path = export_model(weights, backend, imgsz, quantized, calibration)
+    if backend == "torch":
+        import torch
+        from ultralytics import YOLO
+        if threads:
+            torch.set_num_threads(threads)
+        return YOLO(path)
+    if backend == "onnxruntime":
+        return OnnxRuntimeModel(path, threads=threads, imgsz=imgsz)
+    if backend.startswith("yolov3"):
+        return Yolov3Model(path, dnn_backend="openvino" if backend == "yolov3-openvino" else "opencv",
+                           threads=threads)
+    return OpenVinoModel(path, threads=threads, imgsz=imgsz)
+
+
+def _speed(images, **stages_ns):
+    """Results.speed-style dict: milliseconds per image for each stage of a batch."""
+    return {stage: ns / 1e6 / images for stage, ns in stages_ns.items()}
+
+
+def _is_fresh(target, source):
+    """True if target exists and is at least as new as source (or source is gone)."""
+    return os.path.exists(target) and (not os.path.exists(source) or os.path.getmtime(target) >= os.path.getmtime(source))
+
+
+def _decode_nodes(graph):
+    """Nodes of the final (Detect) module that are not part of its conv branches."""
+    modules = [n.name.split("/")[1] for n in graph.node if n.name.startswith("/model.")]
+    head = "/" + max(modules, key=lambda m: int(m.split(".")[1])) + "/"
+    return [n.name for n in graph.node
+            if n.name.startswith(head) and "/cv2." not in n.name and "/cv3." not in n.name]
+
+
+def _onnx_names(path):
+    import onnx
+    meta = {p.key: p.value for p in onnx.load(path, load_external_data=False).metadata_props}
+    return ast.literal_eval(meta["names"]) if "names" in meta else {}
+
+
+class ArrayBoxes:
+    """NumPy stand-in for ultralytics.engine.results.Boxes."""
+
+    def __init__(self, xyxy, conf, cls):
+        self.xyxy = xyxy
+        self.conf = conf
+        self.cls = cls
+
+    def __len__(self):
+        return len(self.conf)
+
+
+class ArrayResult:
+    def __init__(self, boxes, names, orig_shape, speed=None):
+        self.boxes = boxes
+        self.names = names
+        self.orig_shape = orig_shape
+        # ms per image by stage, like Ultralytics' Results.speed
+        self.speed = speed or {}
+
+
+class InputBuffers:
+    """
+    Letterbox canvas (uint8 NHWC) and input tensor (float32 NCHW) per batch
+    shape, reused across calls. Keeps the `max_shapes` most recent shapes;
+    max_shapes=0 allocates fresh buffers every time.
+
+    Not thread-safe: each model is driven by a single dispatch thread.
+    """
+
+    def __init__(self, max_shapes=8):
+        self.max_shapes = max_shapes
+        self.shapes = collections.OrderedDict()
+
+    def get(self, n, h, w):
+        key = (n, h, w)
+        buffers = self.shapes.get(key)
+        if buffers is not None:
+            self.shapes.move_to_end(key)
+            return buffers
+        buffers = (np.empty((n, h, w, 3), dtype=np.uint8), np.empty((n, 3, h, w), dtype=np.float32))
+        if self.max_shapes:
+            self.shapes[key] = buffers
+            while len(self.shapes) > self.max_shapes:
+                self.shapes.popitem(last=False)
+        return buffers
+
+
+class ExportedModel:
+    """Shared pre/post-processing for exported YOLOv8 detection models."""
+
+    stride = 32
+
+    def __init__(self, imgsz=640):
+        self.imgsz = imgsz
+        self.names = {}
+        self.buffers = InputBuffers()
+
+    def predict(self, images, conf=0.25, iou=0.7, max_det=300, verbose=False, imgsz=None, classes=None, **kwargs):
+        if not isinstance(images, (list, tuple)):
+            images = [images]
+        if not images:
+            return []
+        started = time.perf_counter_ns()
+        batch, letterboxes = self._preprocess(images, imgsz)
+        preprocessed = time.perf_counter_ns()
+        raw = self._infer(batch)
+        inferred = time.perf_counter_ns()
+        results = [
+            self._postprocess(pred, image.shape[:2], letterbox, conf, iou, max_det, classes)
+            for pred, image, letterbox in zip(raw, images, letterboxes)
+        ]
+        speed = _speed(len(images), preprocess=preprocessed - started, inference=inferred - preprocessed,
+                       postprocess=time.perf_counter_ns() - inferred)
+        for result in results:
+            result.speed = speed
+        return results
+
+    __call__ = predict
+
+    def _infer(self, batch):
+        raise NotImplementedError
+
+    def _preprocess(self, images, imgsz=None):
+        """
+        Letterboxes every image onto one canvas: the smallest stride-aligned
+        rectangle that fits all of them after scaling to `imgsz` (default:
+        the model's).
+        """
+        imgsz = imgsz or self.imgsz
+        sizes = []
+        for image in images:
+            h, w = image.shape[:2]
+            gain = min(imgsz / h, imgsz / w)
+            sizes.append((gain, int(round(w * gain)), int(round(h * gain))))
+        canvas_w = -(-max(s[1] for s in sizes) // self.stride) * self.stride
+        canvas_h = -(-max(s[2] for s in sizes) // self.stride) * self.stride
+
+        batch, tensor = self.buffers.get(len(images), canvas_h, canvas_w)
+        batch.fill(114)
+        letterboxes = []
+        for i, (image, (gain, w, h)) in enumerate(zip(images, sizes)):
+            left = int(round((canvas_w - w) / 2 - 0.1))
+            top = int(round((canvas_h - h) / 2 - 0.1))
+            target = batch[i, top:top + h, left:left + w]
+            if (w, h) != (image.shape[1], image.shape[0]):
+                cv2.resize(image, (w, h), dst=target, interpolation=cv2.INTER_LINEAR)
+            else:
+                target[...] = image
+            letterboxes.append((gain, left, top))
+
+        # BGR HWC uint8 -> RGB CHW float32 in [0, 1], written into the reused tensor
+        np.copyto(tensor, batch[..., ::-1].transpose(0, 3, 1, 2))
+        tensor *= 1.0 / 255.0
+        return tensor, letterboxes
+
+    def _postprocess(self, pred, orig_shape, letterbox, conf, iou, max_det, allowed=None):
+        """
+        Decodes one (4 + nc, anchors) prediction with class-aware NMS. Boxes
+        below `conf` or outside the `allowed` class ids are masked out first.
+        """
+        pred = pred.T
+        scores = pred[:, 4:]
+        classes = scores.argmax(axis=1)
+        confs = scores[np.arange(len(scores)), classes]
+        keep = confs > conf
+        if allowed is not None:
+            keep &= np.isin(classes, allowed)
+        boxes, confs, classes = pred[keep, :4], confs[keep], classes[keep]
+
+        if len(confs):
+            xywh = np.column_stack([boxes[:, 0] - boxes[:, 2] / 2, boxes[:, 1] - boxes[:, 3] / 2,
+                                    boxes[:, 2], boxes[:, 3]])
+            order = cv2.dnn.NMSBoxesBatched(xywh.tolist(), confs.tolist(), classes.tolist(), conf, iou, top_k=max_det)
+            order = np.asarray(order, dtype=np.int64).reshape(-1)[:max_det]
+            xywh, confs, classes = xywh[order], confs[order], classes[order]
+
+            gain, left, top = letterbox
+            xyxy = np.column_stack([xywh[:, 0], xywh[:, 1], xywh[:, 0] + xywh[:, 2], xywh[:, 1] + xywh[:, 3]])
+            xyxy = (xyxy - [left, top, left, top]) / gain
+            h, w = orig_shape
+            xyxy = np.clip(xyxy, 0, [w, h, w, h])
+        else:
+            xyxy = np.zeros((0, 4))
+
+        boxes = ArrayBoxes(xyxy.astype(np.float32), confs.astype(np.float32), classes.astype(np.float32))
+        return ArrayResult(boxes, self.names, orig_shape)
+
+
+class OnnxRuntimeModel(ExportedModel):
+    def __init__(self, path, threads=0, imgsz=640):
+        import onnxruntime as ort
+
+        super().__init__(imgsz)
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        names = self.session.get_modelmeta().custom_metadata_map.get("names")
+        self.names = ast.literal_eval(names) if names else {}
+
+    def _infer(self, batch):
+        return self.session.run(None, {self.input_name: batch})[0]
+
+
+class OpenVinoModel(ExportedModel):
+    def __init__(self, path, threads=0, imgsz=640):
+        import openvino as ov
+        import yaml
+
+        super().__init__(imgsz)
+        if path.endswith(".onnx"):
+            model_file, metadata = path, None
+            self.names = _onnx_names(path)
+        else:
+            model_file = next(os.path.join(path, f) for f in os.listdir(path) if f.endswith(".xml"))
+            metadata = os.path.join(path, "metadata.yaml")
+        config = {"PERFORMANCE_HINT": "LATENCY"}
+        if threads:
+            config["INFERENCE_NUM_THREADS"] = threads
+        core = ov.Core()
+        self.compiled = core.compile_model(core.read_model(model_file), "CPU", config)
+        if metadata and os.path.exists(metadata):
+            with open(metadata) as f:
+                self.names = (yaml.safe_load(f) or {}).get("names", {})
+
+    def _infer(self, batch):
+        return self.compiled(batch)[0]
+
+
+class Yolov3Model:
+    """Ultralytics-shaped wrapper around yolo_opencv.Yolov3Detector."""
+
+    def __init__(self, weights, dnn_backend="opencv", dnn_target="cpu", threads=0, size=416):
+        if YOLOV3_DIR not in sys.path:
+            sys.path.append(YOLOV3_DIR)
+        from yolo_opencv import Yolov3Detector, postprocess
+
+        self.detector = Yolov3Detector(weights=weights, backend=dnn_backend, target=dnn_target, size=size,
+                                       threads=threads)
+        self.names = dict(enumerate(self.detector.classes))
+        self._postprocess = postprocess
+
+    def predict(self, images, conf=0.25, iou=0.45, max_det=300, verbose=False, classes=None, **kwargs):
+        if not isinstance(images, (list, tuple)):
+            images = [images]
+        if not images:
+            return []
+        results = []
+        # Yolov3Detector.detect() in two timed steps; blobFromImages is part of forward()
+        started = time.perf_counter_ns()
+        outs = self.detector.forward(list(images))
+        inferred = time.perf_counter_ns()
+        detections = [self._postprocess([out[i] for out in outs], image.shape[1], image.shape[0], conf, iou, classes)
+                      for i, image in enumerate(images)]
+        speed = _speed(len(images), inference=inferred - started, postprocess=time.perf_counter_ns() - inferred)
+        for image, (class_ids, confidences, boxes) in zip(images, detections):
+            h, w = image.shape[:2]
+            xywh = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)[:max_det]
+            xyxy = np.clip(np.column_stack([xywh[:, :2], xywh[:, :2] + xywh[:, 2:]]), 0, [w, h, w, h])
+            boxes = ArrayBoxes(xyxy.astype(np.float32), np.asarray(confidences[:max_det], dtype=np.float32),
+                               np.asarray(class_ids[:max_det], dtype=np.float32))
+            results.append(ArrayResult(boxes, self.names, (h, w), speed))
+        return results
+
+    __call__ = predict
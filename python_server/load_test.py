@@ -0,0 +1,210 @@
+"""
+Load test for a running vision + NURA server (serve.py or app.py).
+
+Opens `--sockets` Socket.IO clients that stream `detect_frame` like the
+HUD, at `--fps` each (0 = closed loop: the next frame goes out as soon as
+the previous result is back). At the same time, `--http-workers` threads
+call HTTP endpoints in a loop over keep-alive connections. Socket latency is
+the round trip from emit to the `detection_result` carrying the same
+`timestamp`. The report gives throughput, errors and tail latency for each
+kind of traffic.
+
+The default HTTP mix only uses read-only endpoints: /health and the NURA
+battery query. Most /api/* routes launch apps or open browsers.
+
+    python serve.py &
+    python load_test.py --sockets 8 --http-workers 4 --duration 30
+    python load_test.py --http "GET /vision/stats" "POST /api/system/command {\\"action\\": \\"battery\\"}"
+"""
+
+import argparse
+import itertools
+import json
+import threading
+import time
+
+import requests
+import socketio
+
+from bench_utils import encode_jpeg, load_images, percentile, print_table
+from result_codec import decode
+
+DEFAULT_HTTP = ['POST /api/system/command {"action": "battery"}', "GET /health"]
+
+
+class StreamClient:
+    """
+    One HUD-like Socket.IO client that times each result by its `timestamp`.
+    Understands both JSON and compact (`encoding: "compact"`) results.
+    """
+
+    def __init__(self, url, frames, fps=15.0, mode=None, result_timeout=10.0):
+        self.url = url
+        self.frames = frames
+        self.fps = fps
+        self.mode = mode
+        self.result_timeout = result_timeout
+        self.sio = socketio.Client(reconnection=False)
+        self.sio.on("detection_result", self._on_result)
+        self.sio.on("result_header", self._on_header)
+        self.labels = []
+        self.pending = {}  # timestamp -> perf_counter at emit
+        self.latencies = []
+        self.sent = 0
+        self.received = 0
+        self.errors = 0
+        self.cached = 0
+        self._lock = threading.Lock()
+        self._answered = threading.Event()
+
+    def run(self, duration):
+        self.sio.connect(self.url, transports=["websocket"])
+        if self.mode:
+            self.sio.emit("set_mode", self.mode)
+        frames = itertools.cycle(self.frames)
+        deadline = time.perf_counter() + duration
+        next_send = time.perf_counter()
+        timestamp = None
+        while time.perf_counter() < deadline:
+            timestamp = round(time.time() * 1000, 3)
+            self._answered.clear()
+            with self._lock:
+                self.pending[timestamp] = time.perf_counter()
+                self.sent += 1
+            self.sio.emit("detect_frame", {"image": next(frames), "timestamp": timestamp})
+            if self.fps:
+                next_send += 1.0 / self.fps
+                time.sleep(max(0.0, next_send - time.perf_counter()))
+            else:
+                self._answered.wait(self.result_timeout)
+        # Earlier unanswered frames were replaced on the server; the last one never is
+        end = time.perf_counter() + self.result_timeout
+        while timestamp in self.pending and time.perf_counter() < end:
+            time.sleep(0.01)
+        self.sio.disconnect()
+
+    def _on_header(self, header):
+        self.labels = list(header.get("labels", []))
+
+    def _on_result(self, data):
+        now = time.perf_counter()
+        if isinstance(data, (bytes, bytearray)):
+            data = decode(data, self.labels)
+        with self._lock:
+            started = self.pending.pop(data.get("timestamp"), None)
+            if started is None:
+                return
+            self.latencies.append((now - started) * 1000)
+            self.received += 1
+            self.errors += bool(data.get("error"))
+            self.cached += bool(data.get("cached"))
+        self._answered.set()
+
+
+class HttpWorker:
+    """Calls a list of (method, path, json body) endpoints in turn over one keep-alive session."""
+
+    def __init__(self, url, calls):
+        self.url = url
+        self.calls = calls
+        self.session = requests.Session()
+        self.results = {f"{method} {path}": [] for method, path, _ in calls}  # (latency ms, ok)
+
+    def run(self, duration):
+        deadline = time.perf_counter() + duration
+        for method, path, body in itertools.cycle(self.calls):
+            if time.perf_counter() >= deadline:
+                break
+            started = time.perf_counter()
+            try:
+                ok = self.session.request(method, self.url + path, json=body, timeout=30).status_code < 500
+            except requests.RequestException:
+                ok = False
+            self.results[f"{method} {path}"].append(((time.perf_counter() - started) * 1000, ok))
+        self.session.close()
+
+
+def parse_call(spec):
+    """'METHOD /path [json body]' -> (method, path, body)."""
+    method, path, *body = spec.split(" ", 2)
+    return method.upper(), path, json.loads(body[0]) if body else None
+
+
+def wait_ready(url, timeout=180):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            health = requests.get(url + "/health", timeout=5).json()
+            if health.get("ready", True):
+                return health
+            if health.get("vision") == "error":
+                raise SystemExit(f"Vision failed to load: {health}")
+        except requests.RequestException:
+            pass
+        time.sleep(1)
+    raise SystemExit(f"{url} not ready after {timeout}s")
+
+
+def latency_row(traffic, latencies, count, errors, duration):
+    return {"traffic": traffic, "requests": count, "errors": errors, "per_s": count / duration,
+            "p50_ms": percentile(latencies, 50), "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99), "max_ms": max(latencies, default=0.0)}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--url", default="http://127.0.0.1:5001")
+    ap.add_argument("--source", help="image, folder, glob or video for the frames (default: dog.jpg)")
+    ap.add_argument("--sockets", type=int, default=8, help="concurrent detect_frame clients")
+    ap.add_argument("--fps", type=float, default=15, help="frames per second per socket (0 = closed loop)")
+    ap.add_argument("--set-mode", default='{"mode": "object"}',
+                    help='set_mode message sent on connect, e.g. \'{"mode": "object", "static_threshold": 0}\'')
+    ap.add_argument("--http-workers", type=int, default=4, help="concurrent HTTP callers")
+    ap.add_argument("--http", nargs="+", default=DEFAULT_HTTP, help='calls as "METHOD /path [json body]"')
+    ap.add_argument("--duration", type=float, default=20, help="seconds of load")
+    ap.add_argument("--quality", type=int, default=50, help="JPEG quality of the frames")
+    ap.add_argument("--json", help="also write the report to this file")
+    args = ap.parse_args()
+
+    health = wait_ready(args.url)
+    print(f"Server ready: {health.get('model')} ({health.get('backend', '')})")
+    frames = [encode_jpeg(image, args.quality) for image in load_images(args.source, limit=64)]
+    calls = [parse_call(spec) for spec in args.http]
+
+    clients = [StreamClient(args.url, frames[i % len(frames):] + frames[:i % len(frames)], args.fps,
+                            json.loads(args.set_mode)) for i in range(args.sockets)]
+    workers = [HttpWorker(args.url, calls) for _ in range(args.http_workers)]
+    threads = [threading.Thread(target=c.run, args=(args.duration,)) for c in clients + workers]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    rows = []
+    if clients:
+        latencies = [ms for c in clients for ms in c.latencies]
+        sent = sum(c.sent for c in clients)
+        received = sum(c.received for c in clients)
+        row = latency_row(f"detect_frame x{args.sockets}", latencies, received, sum(c.errors for c in clients),
+                          elapsed)
+        row.update(sent=sent, dropped=sent - received, cached=sum(c.cached for c in clients))
+        rows.append(row)
+    for name in (workers[0].results if workers else {}):
+        results = [r for w in workers for r in w.results[name]]
+        rows.append(latency_row(name, [ms for ms, _ in results], len(results),
+                                sum(1 for _, ok in results if not ok), elapsed))
+
+    print()
+    print_table(rows, ["traffic", "requests", "errors", "per_s", "p50_ms", "p95_ms", "p99_ms", "max_ms"])
+    if clients:
+        print(f"\ndetect_frame: {rows[0]['sent']} sent, {rows[0]['dropped']} dropped (latest-frame-wins), "
+              f"{rows[0]['cached']} cached results")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": vars(args), "elapsed_s": elapsed, "rows": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
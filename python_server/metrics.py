@@ -0,0 +1,166 @@
+"""
+Prometheus text-format metrics for the vision pipeline.
+
+A small in-process registry (no client library needed): counters and
+histograms are updated on the hot path with one lock and a bisect; gauges
+are read from callbacks only when /metrics is scraped. Stage timings are
+taken with time.perf_counter_ns() and recorded in seconds, the Prometheus
+base unit.
+
+Stages of a live frame (`vision_stage_seconds{stage=...}`):
+
+    queue_wait        received -> picked up by a dispatch thread
+    base64_decode     data-URL payloads only (binary frames skip it)
+    imdecode          JPEG decode, reduced-scale when possible
+    preprocess        letterbox + normalize   \\
+    inference         model forward            > per image, from the backend
+    postprocess       decode + NMS            /
+    face_detect       Haar face detector inside person boxes (face mode)
+    face_recognition  DeepFace embedding + index lookup (face mode)
+    serialize         compact result encoding (JSON is encoded inside emit)
+    emit              Socket.IO emit call
+"""
+
+import bisect
+import threading
+
+TIME_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self.values.items())
+        lines += [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}" for key, value in values]
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=TIME_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self.series = {}  # labels -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def observe_ns(self, nanoseconds, *labels):
+        self.observe(nanoseconds / 1e9, *labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((key, list(values)) for key, values in self.series.items())
+        for key, values in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), values):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _number(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames + ('le',), key + (le,))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(values[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """Values come from `callback()` at scrape time: a number, or {label tuple: number}."""
+
+    def __init__(self, name, documentation, labelnames=(), callback=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.callback = callback
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        values = self.callback() if self.callback else None
+        if values is None:
+            return lines
+        if not isinstance(values, dict):
+            values = {(): values}
+        lines += [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}"
+                  for key, value in sorted(values.items()) if value is not None]
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric in self.metrics:
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value):
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "vision_stage_seconds", "Time spent per frame in each pipeline stage", ("stage",)))
+FRAME_LATENCY_SECONDS = REGISTRY.register(Histogram(
+    "vision_frame_latency_seconds", "Server latency of live frames, received to result emitted", ("mode",)))
+BATCH_SIZE = REGISTRY.register(Histogram(
+    "vision_batch_size", "Frames per batched detector call", buckets=(1, 2, 4, 8, 16, 32)))
+FRAMES = REGISTRY.register(Counter(
+    "vision_frames_total", "Live frames by scan mode and outcome "
+    "(received, processed, error, dropped, cached)", ("mode", "outcome")))
+
+
+MODES = ("object", "face")
+
+
+def mode_label(mode):
+    """Maps a client-supplied scan mode onto a bounded label value."""
+    return mode if mode in MODES else "other"
+
+
+def observe_stages(timings):
+    """Records a {stage: nanoseconds} dict from a detector output."""
+    for stage, nanoseconds in timings.items():
+        STAGE_SECONDS.observe_ns(nanoseconds, stage)
@@ -2,15 +2,27 @@ import os
 import subprocess
 import webbrowser
 import psutil
-import pyautogui
 import platform
 import requests
 import time
+import importlib
+
+class _LazyPyAutoGUI:
+    """Imports pyautogui on first use; it needs a display and is slow to import."""
+    _module = None
+
+    def __getattr__(self, name):
+        if self._module is None:
+            module = importlib.import_module("pyautogui")
+            # Fail-safe to prevent mouse from taking over if things go wrong
+            module.FAILSAFE = True
+            type(self)._module = module
+        return getattr(self._module, name)
+
+pyautogui = _LazyPyAutoGUI()
 
 class NuraEngine:
     def __init__(self):
-        # Fail-safe to prevent mouse from taking over if things go wrong
-        pyautogui.FAILSAFE = True
         self.serpapi_key = "4506745ad63a241d0657fa7057da9f73e39f53e25eff92853649fe2923fa6b39"
 
     def get_news(self):
@@ -0,0 +1,262 @@
+"""
+Multi-process inference workers for the NEXORA Vision Core.
+
+Each worker process loads the YOLO model (any inference backend) once and owns a shared-memory
+block of `queue_depth` job regions, each split into `slots_per_job` frame
+slots. The web process only copies the received JPEG bytes into a slot and
+sends slot offsets and sizes (plus the session's mode, options and small
+track state) over a pipe; decoding, inference, post-processing and face
+recognition all happen in the worker, outside the web process's GIL.
+Results come back as small lists of detection dicts.
+
+Up to `queue_depth` jobs per worker are in flight at once: while the worker
+runs one, the next is already written to another region and waiting in the
+pipe, so the worker does not sit idle for the IPC round trip. The worker
+answers jobs in order.
+"""
+
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+
+from inference_backends import export_model
+from vision_pipeline import detection_output, frame_bytes
+
+DEFAULT_SLOT_BYTES = 4 * 1024 * 1024
+
+
+def parse_cpu_sets(spec, workers):
+    """
+    Parses a CPU pinning spec into one CPU list per worker.
+
+    "auto" splits the available cores evenly, "0-1;2-3" pins explicitly,
+    and an empty spec disables pinning.
+    """
+    if not spec:
+        return [None] * workers
+    if spec == "auto":
+        cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count() or 1))
+        per_worker = max(1, len(cpus) // workers)
+        return [cpus[i * per_worker:(i + 1) * per_worker] or None for i in range(workers)]
+
+    sets = []
+    for group in spec.split(";"):
+        cpus = []
+        for part in group.split(","):
+            part = part.strip()
+            if "-" in part:
+                lo, hi = part.split("-")
+                cpus.extend(range(int(lo), int(hi) + 1))
+            elif part:
+                cpus.append(int(part))
+        sets.append(cpus or None)
+    return [sets[i % len(sets)] for i in range(workers)]
+
+
+def _worker_main(index, model_path, shm_name, slot_bytes, conn, conf, cpus, threads, face_model, recognize_every,
+                 backend, quantized, index_lock):
+    """Worker process entry point: load the model once, then serve batches."""
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+
+    import cv2
+
+    from inference_backends import load_model
+    from vision_pipeline import LocalDetector
+
+    cv2.setNumThreads(threads or 0)
+
+    cascade = None
+    if face_model:
+        from face_index import FaceIndex
+        from identity_cascade import IdentityCascade
+
+        def load_face_index():
+            # On the first face-mode frame, like the in-process path. One worker at a
+            # time: the first builds a missing index from known_faces/, the rest load it.
+            face_index = FaceIndex(model_name=face_model)
+            with index_lock:
+                return face_index.load() if face_index.exists() else face_index.build()
+
+        cascade = IdentityCascade(load_face_index, recognize_every=recognize_every)
+
+    detector = LocalDetector(load_model(model_path, backend, threads, quantized=quantized), conf=conf, cascade=cascade)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    conn.send(("ready", index, dict(detector.model.names)))
+
+    try:
+        while True:
+            job = conn.recv()
+            if job is None:
+                break
+
+            frames, outputs = [], [None] * len(job)
+            for slot, meta in enumerate(job):
+                if meta["size"] < 0:
+                    outputs[slot] = detection_output(error=meta["error"], state=meta["state"])
+                    continue
+                offset = meta["offset"]
+                frames.append(dict(meta, image=shm.buf[offset:offset + meta["size"]], slot=slot))
+
+            for frame, output in zip(frames, detector.detect(frames)):
+                outputs[frame["slot"]] = output
+            frames = frame = None  # release views into shared memory
+            conn.send(outputs)
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        shm.close()
+
+
+class WorkerHandle:
+    """
+    Web-process side of one worker: fills a free job region of its shared
+    memory, sends the job and waits for its results. Safe to call from up to
+    `queue_depth` dispatch threads at once, which is what keeps jobs queued.
+    """
+
+    def __init__(self, index, process, conn, shm, slot_bytes, slots_per_job, queue_depth=1):
+        self.index = index
+        self.process = process
+        self.conn = conn
+        self.shm = shm
+        self.slot_bytes = slot_bytes
+        self.slots_per_job = slots_per_job
+        self.regions = queue.Queue()
+        for region in range(queue_depth):
+            self.regions.put(region * slots_per_job * slot_bytes)
+        self._send_lock = threading.Lock()
+        self._turn = threading.Condition()
+        self._sent = 0
+        self._received = 0
+
+    def detect(self, frames):
+        outputs = []
+        for start in range(0, len(frames), self.slots_per_job):
+            outputs.extend(self._run_job(frames[start:start + self.slots_per_job]))
+        return outputs
+
+    def _run_job(self, frames):
+        base = self.regions.get()
+        try:
+            job, unpacked = [], []
+            for slot, frame in enumerate(frames):
+                meta = {"mode": frame.get("mode"), "options": frame.get("options"), "state": frame.get("state")}
+                job.append(meta)
+                # base64 payloads are unpacked here, so the parent times that stage
+                started = time.perf_counter_ns()
+                try:
+                    data = frame_bytes(frame["image"])
+                except Exception as e:
+                    unpacked.append(None)
+                    meta.update(size=-1, error=str(e))
+                    continue
+                unpacked.append(time.perf_counter_ns() - started if isinstance(frame["image"], str) else None)
+                offset = base + slot * self.slot_bytes
+                meta.update(offset=offset, size=len(data))
+                if len(data) <= self.slot_bytes:
+                    self.shm.buf[offset:offset + len(data)] = data
+                else:
+                    meta.update(size=-1, error="Frame larger than worker slot")
+            try:
+                with self._send_lock:
+                    self.conn.send(job)
+                    ticket = self._sent
+                    self._sent += 1
+                # Results come back in send order; each caller receives its own in turn
+                with self._turn:
+                    self._turn.wait_for(lambda: self._received == ticket)
+                    try:
+                        # Wait in poll() (selectors), which yields to other greenlets under gevent
+                        self.conn.poll(None)
+                        outputs = self.conn.recv()
+                    finally:
+                        self._received += 1
+                        self._turn.notify_all()
+                for output, nanoseconds in zip(outputs, unpacked):
+                    if nanoseconds is not None:
+                        output.setdefault("timings", {})["base64_decode"] = nanoseconds
+                return outputs
+            except (EOFError, OSError) as e:
+                error = f"Worker {self.index} unavailable: {e}"
+                return [detection_output(error=error, state=frame.get("state")) for frame in frames]
+        finally:
+            self.regions.put(base)
+
+
+class ProcessInferencePool:
+    """
+    Starts N YOLO worker processes with one WorkerHandle each.
+
+    start() returns every handle `queue_depth` times. Pass that list to
+    DetectionPipeline: it runs one dispatch thread per entry, so each worker
+    has one job running and up to queue_depth - 1 waiting behind it.
+    """
+
+    def __init__(self, model_path, workers=2, slots_per_job=4, queue_depth=2, cpu_sets=None,
+                 threads_per_worker=1, conf=0.5, slot_bytes=DEFAULT_SLOT_BYTES, face_model=None,
+                 recognize_every=15, backend="torch", quantized=False, calibration=None):
+        self.model_path = model_path
+        self.workers = max(1, int(workers))
+        self.slots_per_job = max(1, int(slots_per_job))
+        self.queue_depth = max(1, int(queue_depth))
+        self.cpu_sets = cpu_sets or [None] * self.workers
+        self.threads_per_worker = threads_per_worker
+        self.conf = conf
+        self.slot_bytes = slot_bytes
+        self.face_model = face_model
+        self.recognize_every = recognize_every
+        self.backend = backend
+        self.quantized = quantized
+        self.calibration = calibration
+        self.handles = []
+        self.names = None  # class id -> name, reported by the workers once loaded
+
+    def start(self, timeout=120):
+        """Spawns the workers, blocks until each has loaded the model and returns the dispatch list."""
+        # export (and quantize) once here, not in every worker
+        export_model(self.model_path, self.backend, quantized=self.quantized, calibration=self.calibration)
+        ctx = mp.get_context("spawn")
+        index_lock = ctx.Lock()
+        for i in range(self.workers):
+            shm = shared_memory.SharedMemory(create=True, size=self.slot_bytes * self.slots_per_job * self.queue_depth)
+            parent_conn, child_conn = ctx.Pipe()
+            # Under gevent (serve.py) the socketpair comes out non-blocking; Connection expects blocking fds
+            os.set_blocking(parent_conn.fileno(), True)
+            os.set_blocking(child_conn.fileno(), True)
+            process = ctx.Process(
+                target=_worker_main,
+                args=(i, self.model_path, shm.name, self.slot_bytes, child_conn,
+                      self.conf, self.cpu_sets[i], self.threads_per_worker,
+                      self.face_model, self.recognize_every, self.backend, self.quantized, index_lock),
+                name=f"vision-worker-{i}",
+                daemon=True
+            )
+            process.start()
+            child_conn.close()
+            self.handles.append(WorkerHandle(i, process, parent_conn, shm, self.slot_bytes, self.slots_per_job,
+                                             self.queue_depth))
+
+        for handle in self.handles:
+            if not handle.conn.poll(timeout):
+                raise RuntimeError(f"Vision worker {handle.index} did not start within {timeout}s")
+            _, _, self.names = handle.conn.recv()
+        return self.handles * self.queue_depth
+
+    def stop(self):
+        for handle in self.handles:
+            try:
+                handle.conn.send(None)
+            except (EOFError, OSError):
+                pass
+        for handle in self.handles:
+            handle.process.join(timeout=5)
+            if handle.process.is_alive():
+                handle.process.terminate()
+            handle.conn.close()
+            handle.shm.close()
+            handle.shm.unlink()
+        self.handles = []
@@ -0,0 +1,161 @@
+"""
+Compact binary encoding of `detection_result` payloads.
+
+JSON results repeat every key, every label string and every float as text,
+15 times a second per client. A session that sends `set_mode` with
+`"encoding": "compact"` first receives a `result_header` event with the
+class-name table, then gets each `detection_result` as one binary message
+(little-endian):
+
+    header      19 bytes   version u8, flags u8, mode u8, batch_size u16,
+                           timestamp f64, server_latency_ms f32, count u16
+    detections  14 bytes   x1, y1, x2, y2 i16 (frame pixels, rounded),
+                each       label u8 (index in the table, 255 = see extra),
+                           confidence u8 (round(conf * 255)), id i32
+    extra       optional   UTF-8 JSON object, present when flags & 4
+
+Flags: 1 = predicted, 2 = cached, 4 = extra. `track_id` equals `id`
+whenever `id` >= 0. Anything the fixed layout cannot carry goes in
+`extra`: `error`, other payload keys, per-detection fields such as a face's
+`name` / `similarity` (`"detections"`: one object or null per detection),
+and `"labels"`, the full table again whenever a label outside it shows up.
+"""
+
+import json
+import math
+import struct
+import threading
+
+import numpy as np
+
+VERSION = 1
+HEADER = struct.Struct("<BBBHdfH")
+DETECTION = np.dtype([("box", "<i2", 4), ("label", "u1"), ("confidence", "u1"), ("id", "<i4")])
+FLAG_PREDICTED = 1
+FLAG_CACHED = 2
+FLAG_EXTRA = 4
+MODES = ("object", "face")
+NO_LABEL = 255
+MAX_LABELS = 255
+
+PACKED_KEYS = {"bbox", "confidence", "label", "id", "track_id"}
+PAYLOAD_KEYS = {"detections", "timestamp", "mode", "server_latency_ms", "batch_size", "predicted", "cached"}
+
+
+class ResultCodec:
+    """
+    Per-session encoder for compact results. `labels` seeds the class-name
+    table (e.g. model.names); labels first seen in a result are appended
+    and the new table is sent with that result.
+    """
+
+    def __init__(self, labels=()):
+        self.labels = list(dict.fromkeys(str(label) for label in labels))[:MAX_LABELS]
+        self.label_ids = {label: i for i, label in enumerate(self.labels)}
+        self._lock = threading.Lock()
+
+    def header(self):
+        """The `result_header` message sent when a session switches to compact results."""
+        return {"encoding": "compact", "version": VERSION, "labels": list(self.labels)}
+
+    def encode(self, payload):
+        """Packs one `detection_result` payload dict into bytes."""
+        detections = payload.get("detections") or []
+        records = np.zeros(len(detections), dtype=DETECTION)
+        extra = {key: value for key, value in payload.items() if key not in PAYLOAD_KEYS}
+        per_detection = [None] * len(detections)
+        table_grew = False
+
+        if detections:
+            records["box"] = np.clip(np.round([det["bbox"] for det in detections]), -32768, 32767)
+            records["confidence"] = np.clip(np.round([det["confidence"] * 255 for det in detections]), 0, 255)
+            records["id"] = [det.get("id", -1) for det in detections]
+        for i, det in enumerate(detections):
+            label_id, added = self._label_id(det["label"])
+            records["label"][i] = label_id
+            table_grew |= added
+            rest = {key: value for key, value in det.items() if key not in PACKED_KEYS}
+            if label_id == NO_LABEL:
+                rest["label"] = det["label"]
+            if rest:
+                per_detection[i] = rest
+
+        mode = payload.get("mode")
+        if mode not in MODES:
+            extra["mode"] = mode
+        if any(per_detection):
+            extra["detections"] = per_detection
+        if table_grew:
+            extra["labels"] = list(self.labels)
+
+        flags = (FLAG_PREDICTED if payload.get("predicted") else 0) | (FLAG_CACHED if payload.get("cached") else 0)
+        tail = b""
+        if extra:
+            flags |= FLAG_EXTRA
+            tail = json.dumps(extra, separators=(",", ":")).encode("utf-8")
+        timestamp = payload.get("timestamp")
+        latency = payload.get("server_latency_ms")
+        head = HEADER.pack(VERSION, flags, MODES.index(mode) if mode in MODES else 255,
+                           min(int(payload.get("batch_size") or 0), 65535),
+                           float(timestamp) if timestamp is not None else math.nan,
+                           float(latency) if latency is not None else math.nan, len(detections))
+        return head + records.tobytes() + tail
+
+    def _label_id(self, label):
+        """(table index, whether the table grew) for a label."""
+        label_id = self.label_ids.get(label)
+        if label_id is not None:
+            return label_id, False
+        with self._lock:
+            if label in self.label_ids:
+                return self.label_ids[label], False
+            if len(self.labels) >= MAX_LABELS:
+                return NO_LABEL, False
+            self.label_ids[label] = len(self.labels)
+            self.labels.append(label)
+            return self.label_ids[label], True
+
+
+def decode(data, labels):
+    """
+    Unpacks a compact result into the JSON payload shape. `labels` is the
+    client's table and is updated in place when the message carries one.
+    Boxes are whole pixels and confidences are quantized to 1/255.
+    """
+    version, flags, mode, batch_size, timestamp, latency, count = HEADER.unpack_from(data)
+    if version != VERSION:
+        raise ValueError(f"Unsupported compact result version {version}")
+    records = np.frombuffer(data, dtype=DETECTION, count=count, offset=HEADER.size)
+    extra = {}
+    if flags & FLAG_EXTRA:
+        extra = json.loads(bytes(data[HEADER.size + records.nbytes:]).decode("utf-8"))
+    if "labels" in extra:
+        labels[:] = extra.pop("labels")
+    per_detection = extra.pop("detections", None) or [None] * count
+
+    detections = []
+    for record, rest in zip(records, per_detection):
+        det = {
+            "bbox": [float(v) for v in record["box"]],
+            "confidence": round(int(record["confidence"]) / 255, 3),
+            "label": labels[record["label"]] if record["label"] != NO_LABEL else None,
+            "id": int(record["id"])
+        }
+        if det["id"] >= 0:
+            det["track_id"] = det["id"]
+        det.update(rest or {})
+        detections.append(det)
+
+    payload = {
+        "detections": detections,
+        "timestamp": None if math.isnan(timestamp) else timestamp,
+        "mode": MODES[mode] if mode < len(MODES) else None,
+        "server_latency_ms": None if math.isnan(latency) else round(latency, 1),
+        "batch_size": batch_size
+    }
+    if flags & FLAG_PREDICTED:
+        payload["predicted"] = True
+    if flags & FLAG_CACHED:
+        payload["cached"] = True
+    payload.update(extra)
+    return payload
@@ -0,0 +1,109 @@
+"""
+Production entry point for the vision + NURA API.
+
+`python app.py` runs the Werkzeug development server. In debug mode its
+reloader forks a watcher process, and it is not meant to face real
+traffic. This script serves the same Flask + Socket.IO app under gunicorn,
+with no reloader and no debugger, and with HTTP keep-alive.
+
+There is exactly one web worker process. Socket.IO sessions, the model and
+the frame pipeline all live in memory in that process, and a second one
+would need sticky sessions and a message queue. To scale inference, use
+VISION_WORKERS (inference processes behind the pipeline). Concurrency
+inside the web process is chosen with the worker class:
+
+- gthread (default): one OS thread per connection. A WebSocket holds its
+  thread for as long as it is open, so `--threads` must exceed the number
+  of HUD clients plus concurrent HTTP calls. Inference runs in real
+  threads, as with app.py.
+- gevent: greenlets, with thousands of cheap connections
+  (`--connections`). In-process inference would block the event loop, so
+  it runs in VISION_WORKERS processes (at least 1 is enforced).
+
+    python serve.py                                   # gthread, 64 threads, port 5001
+    python serve.py --worker-class gevent --connections 2000
+    SERVE_THREADS=128 SERVE_KEEPALIVE=15 python serve.py --quantized
+"""
+
+import argparse
+import os
+
+from gunicorn.app.base import BaseApplication
+
+WORKER_CLASSES = ("gthread", "gevent")
+
+
+class VisionServer(BaseApplication):
+    """gunicorn application that imports app.py inside the worker process."""
+
+    def __init__(self, options):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        # Imported here, after the gevent worker has monkey-patched the
+        # standard library, and never in the gunicorn arbiter process.
+        import app as vision_app
+        vision_app.print_banner(self.options["bind"].rsplit(":", 1)[-1], f"gunicorn {self.options['worker_class']}")
+        vision_app.start_vision()
+        return vision_app.app
+
+
+def worker_exit(server, worker):
+    """Stops the inference processes and frees their shared memory when the web worker exits."""
+    import app as vision_app
+    if vision_app.worker_pool:
+        vision_app.worker_pool.stop()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--bind", default=os.environ.get("SERVE_BIND", f"0.0.0.0:{os.environ.get('PORT', 5001)}"))
+    ap.add_argument("--worker-class", choices=WORKER_CLASSES, default=os.environ.get("SERVE_WORKER_CLASS", "gthread"))
+    ap.add_argument("--threads", type=int, default=int(os.environ.get("SERVE_THREADS", 64)),
+                    help="gthread: connection threads")
+    ap.add_argument("--connections", type=int, default=int(os.environ.get("SERVE_CONNECTIONS", 1000)),
+                    help="gevent: max simultaneous connections")
+    ap.add_argument("--keepalive", type=int, default=int(os.environ.get("SERVE_KEEPALIVE", 5)),
+                    help="seconds an idle HTTP keep-alive connection is held open")
+    ap.add_argument("--timeout", type=int, default=int(os.environ.get("SERVE_TIMEOUT", 120)),
+                    help="seconds before a silent worker is restarted")
+    ap.add_argument("--quantized", action="store_true", help="serve the INT8-quantized detector")
+    ap.add_argument("--calibration", help="image folder/glob/video for INT8 calibration")
+    args = ap.parse_args()
+
+    # app.py reads its configuration from the environment at import time
+    os.environ["FLASK_DEBUG"] = "0"
+    if args.quantized:
+        os.environ["VISION_QUANTIZED"] = "1"
+    if args.calibration:
+        os.environ["VISION_CALIBRATION"] = args.calibration
+    if args.worker_class == "gevent":
+        os.environ["VISION_ASYNC_MODE"] = "gevent"
+        if int(os.environ.get("VISION_WORKERS", 0)) < 1:
+            os.environ["VISION_WORKERS"] = "1"
+            print("⚠️ gevent: running inference in 1 worker process (set VISION_WORKERS for more)")
+    else:
+        os.environ["VISION_ASYNC_MODE"] = "threading"
+
+    VisionServer({
+        "bind": args.bind,
+        "workers": 1,
+        "worker_class": args.worker_class,
+        "threads": args.threads,
+        "worker_connections": args.connections,
+        "keepalive": args.keepalive,
+        "timeout": args.timeout,
+        "graceful_timeout": 10,
+        "reload": False,
+        "accesslog": None,
+        "worker_exit": worker_exit
+    }).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Parity test for the exported inference backends.
+
+Runs the same images through the torch model and each exported backend and
+checks that every torch detection has a same-class match (IoU >= --min-iou,
+confidence within --conf-tol) and that there are no extra detections.
+
+    python test_backends.py --backends onnxruntime openvino --source path/to/frames
+"""
+
+import argparse
+import os
+import sys
+
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+
+from bench_utils import load_images
+from inference_backends import load_model
+from tracking import greedy_match, iou_matrix
+from vision_pipeline import result_arrays
+
+
+def compare(reference, candidate, min_iou, conf_tol):
+    """Returns a list of human-readable mismatches between two results."""
+    ref_boxes, ref_confs, ref_classes = result_arrays(reference)
+    boxes, confs, classes = result_arrays(candidate)
+    iou = iou_matrix(ref_boxes, boxes)
+    if iou.size:
+        iou[ref_classes[:, None] != classes[None, :]] = 0.0
+    matches = greedy_match(iou, min_iou)
+
+    problems = []
+    for i, (box, conf, cls) in enumerate(zip(ref_boxes, ref_confs, ref_classes)):
+        if i not in matches:
+            problems.append(f"missing {reference.names[cls]} {conf:.2f} at {box.round(1).tolist()}")
+        elif abs(confs[matches[i]] - conf) > conf_tol:
+            problems.append(f"{reference.names[cls]} confidence {conf:.3f} vs {confs[matches[i]]:.3f}")
+    for j in sorted(set(range(len(confs))) - set(matches.values())):
+        problems.append(f"extra {candidate.names[classes[j]]} {confs[j]:.2f} at {boxes[j].round(1).tolist()}")
+    return problems
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--model", default="yolov8n.pt")
+    ap.add_argument("--source", help="image, folder, glob or video (default: dog.jpg)")
+    ap.add_argument("--backends", nargs="+", default=["onnxruntime", "openvino"])
+    ap.add_argument("--conf", type=float, default=0.5)
+    ap.add_argument("--min-iou", type=float, default=0.9)
+    ap.add_argument("--conf-tol", type=float, default=0.02)
+    args = ap.parse_args()
+
+    images = load_images(args.source, limit=32)
+    reference = load_model(args.model, "torch")
+    expected = [reference.predict(image, conf=args.conf, verbose=False)[0] for image in images]
+
+    failed = False
+    for backend in args.backends:
+        print(f"\n🔍 Comparing {backend} with torch on {len(images)} images...")
+        try:
+            model = load_model(args.model, backend)
+        except Exception as e:
+            print(f"❌ Could not load {backend}: {e}")
+            failed = True
+            continue
+
+        problems = []
+        for n, (image, ref) in enumerate(zip(images, expected)):
+            result = model.predict(image, conf=args.conf, verbose=False)[0]
+            problems.extend(f"image {n}: {p}" for p in compare(ref, result, args.min_iou, args.conf_tol))
+
+        detections = sum(len(r.boxes) for r in expected)
+        if problems:
+            failed = True
+            print(f"❌ {backend}: {len(problems)} mismatches ({detections} torch detections)")
+            for problem in problems[:20]:
+                print(f"   {problem}")
+        else:
+            print(f"✅ {backend} matches torch ({detections} detections)")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
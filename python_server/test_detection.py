@@ -9,6 +9,7 @@ import base64
 import requests
 import json
 import os
+import time
 from pathlib import Path
 
 # Configuration
@@ -17,18 +18,25 @@ BASE_DIR = Path(__file__).parent
 TEST_IMAGES_DIR = BASE_DIR / "test_images"
 OUTPUT_DIR = BASE_DIR / "test_output"
 
-def test_health_endpoint():
-    """Test the health check endpoint"""
+def test_health_endpoint(timeout=180):
+    """Test the health check endpoint, waiting for the models to finish loading"""
     print("\n🔍 Testing /health endpoint...")
     try:
-        response = requests.get(f"{API_URL}/health")
-        if response.status_code == 200:
+        deadline = time.time() + timeout
+        while True:
+            response = requests.get(f"{API_URL}/health")
+            if response.status_code != 200:
+                print(f"❌ Health check failed: {response.status_code}")
+                return False
             data = response.json()
-            print(f"✅ Health check passed: {data}")
-            return True
-        else:
-            print(f"❌ Health check failed: {response.status_code}")
-            return False
+            if data.get('ready', True):
+                print(f"✅ Health check passed: {data}")
+                return True
+            if data.get('vision') == 'error' or time.time() > deadline:
+                print(f"❌ Vision models not ready: {data}")
+                return False
+            print("⏳ Waiting for vision models to load...")
+            time.sleep(2)
     except Exception as e:
         print(f"❌ Health check error: {e}")
         return False
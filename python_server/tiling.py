@@ -0,0 +1,139 @@
+"""
+Region-of-interest crops, overlapping tiles and cross-part box merging.
+
+A frame is turned into "parts": crops fed to the model at native
+resolution, each with the scale and offset that map its boxes back to frame
+coordinates. Boxes from all parts of a frame are then merged with one
+class-aware NMS across parts, which removes the duplicates that overlapping
+tiles produce.
+"""
+
+import math
+
+import numpy as np
+
+STRIDE = 32
+
+
+def parse_rois(rois, width, height):
+    """
+    Normalizes a `roi` option to a list of integer (x1, y1, x2, y2) pixel boxes.
+
+    Accepts one box or a list of boxes as [x1, y1, x2, y2]. Boxes whose
+    values are all <= 1 are fractions of the frame; otherwise pixels. Boxes
+    are clipped to the frame; empty ones are dropped.
+    """
+    if not rois:
+        return []
+    if isinstance(rois[0], (int, float)):
+        rois = [rois]
+    boxes = []
+    for roi in rois:
+        if len(roi) != 4:
+            raise ValueError(f"ROI must be [x1, y1, x2, y2], got {roi}")
+        x1, y1, x2, y2 = (float(v) for v in roi)
+        if max(x1, y1, x2, y2) <= 1.0:
+            x1, x2, y1, y2 = x1 * width, x2 * width, y1 * height, y2 * height
+        x1, x2 = sorted((min(max(int(round(x1)), 0), width), min(max(int(round(x2)), 0), width)))
+        y1, y2 = sorted((min(max(int(round(y1)), 0), height), min(max(int(round(y2)), 0), height)))
+        if x2 > x1 and y2 > y1:
+            boxes.append((x1, y1, x2, y2))
+    return boxes
+
+
+def tile_grid(x1, y1, x2, y2, tile, overlap=0.2):
+    """
+    Tiles of at most `tile` px covering the box, neighbours overlapping by
+    about `overlap` of a tile. A box that fits in one tile is returned as is.
+    """
+    return [(tx, ty, min(tx + tile, x2), min(ty + tile, y2))
+            for ty in _starts(y1, y2, tile, overlap)
+            for tx in _starts(x1, x2, tile, overlap)]
+
+
+def _starts(start, end, tile, overlap):
+    length = end - start
+    if length <= tile:
+        return [start]
+    step = tile * (1.0 - min(max(overlap, 0.0), 0.9))
+    count = math.ceil((length - tile) / step) + 1
+    # Spread the tiles evenly so the last one ends exactly at `end`.
+    return [start + int(round(i * (length - tile) / (count - 1))) for i in range(count)]
+
+
+def input_size(width, height, limit):
+    """Model input side for a crop: its longest side rounded up to the stride, never above `limit`."""
+    return min(limit, -(-max(width, height) // STRIDE) * STRIDE)
+
+
+def crop_tiles(image, boxes, tile, overlap=0.2):
+    """
+    (crop, (x, y) offset, model input size) for every tile of every box.
+    Crops are views into `image`, not copies.
+    """
+    tiles = []
+    for box in boxes:
+        for x1, y1, x2, y2 in tile_grid(*box, tile, overlap):
+            tiles.append((image[y1:y2, x1:x2], (float(x1), float(y1)), input_size(x2 - x1, y2 - y1, tile)))
+    return tiles
+
+
+def merge_parts(arrays, placements, iou=0.5, edge=4.0):
+    """
+    Maps each part's (xyxy, confs, classes) to frame coordinates by its
+    (scale, (x, y) offset, (width, height)) placement and merges them with
+    merge_boxes(). The size is the part image's, in model-input pixels; a
+    box within `edge` frame pixels of its part's border counts as cut by it.
+    """
+    xyxy = np.concatenate([boxes * scale + np.tile(offset, 2)
+                           for (boxes, _, _), (scale, offset, _) in zip(arrays, placements)])
+    confs = np.concatenate([a[1] for a in arrays])
+    classes = np.concatenate([a[2] for a in arrays])
+    if len(arrays) < 2:
+        return xyxy, confs, classes
+    counts = [len(a[1]) for a in arrays]
+    parts = np.repeat(np.arange(len(arrays)), counts)
+    extents = np.repeat(np.array([[x, y, x + width * scale, y + height * scale]
+                                  for scale, (x, y), (width, height) in placements], dtype=np.float32),
+                        counts, axis=0).reshape(-1, 4)
+    at_edge = ((xyxy[:, :2] - extents[:, :2] <= edge) | (extents[:, 2:] - xyxy[:, 2:] <= edge)).any(axis=1)
+    return merge_boxes(xyxy, confs, classes, parts, at_edge, iou)
+
+
+def merge_boxes(xyxy, confs, classes, parts, at_edge=None, iou=0.5, ios=0.8):
+    """
+    Class-aware NMS between boxes of different parts, with the pairwise
+    overlaps computed as one matrix. `parts` gives each box's part index;
+    boxes of the same part were already NMS-ed by the model and are never
+    compared, so nested or touching objects inside one tile survive.
+
+    Boxes overlapping a higher-scoring box of their class from another part
+    by IoU > `iou` are dropped greedily. Then a box that a larger box of its
+    class from another part covers by more than `ios` (intersection over the
+    smaller box) is dropped too, if it touches its own part's border
+    (`at_edge`, every box when None): the piece of an object cut off at a
+    tile edge has a low IoU with the whole object seen by the neighbouring
+    tile, and may even score higher.
+    """
+    if len(confs) < 2:
+        return xyxy, confs, classes
+    order = np.argsort(-confs, kind="stable")
+    boxes, labels, sources = xyxy[order], classes[order], np.asarray(parts)[order]
+
+    top_left = np.maximum(boxes[:, None, :2], boxes[None, :, :2])
+    bottom_right = np.minimum(boxes[:, None, 2:], boxes[None, :, 2:])
+    inter = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+    area = np.prod(boxes[:, 2:] - boxes[:, :2], axis=1)
+    candidates = (labels[:, None] == labels[None, :]) & (sources[:, None] != sources[None, :])
+    suppresses = np.triu((inter > iou * (area[:, None] + area[None, :] - inter)) & candidates, 1)
+    covers = (inter > ios * area[None, :]) & (area[:, None] > area[None, :]) & candidates
+    if at_edge is not None:
+        covers &= np.asarray(at_edge)[order][None, :]
+
+    keep = np.ones(len(order), dtype=bool)
+    for i in range(len(order)):
+        if keep[i]:
+            keep &= ~suppresses[i]
+    keep &= ~(covers & keep[:, None]).any(axis=0)
+    kept = np.sort(order[keep])
+    return xyxy[kept], confs[kept], classes[kept]
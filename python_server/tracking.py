@@ -0,0 +1,142 @@
+"""
+Lightweight SORT-style multi-object tracker for the vision stream.
+
+Each track carries a constant-velocity Kalman filter over
+[cx, cy, area, aspect, vx, vy, varea]. Detections are associated with the
+predicted track boxes by IoU (class-aware, greedy highest-IoU first), so
+labels keep a stable `track_id` across frames. Between full detections the
+tracker can extrapolate boxes on its own, which is what skip-frame mode
+uses to run YOLO only every k frames.
+
+Tracker state is a plain dict of lists and small NumPy arrays so it can be
+stored on the session and threaded through worker processes.
+"""
+
+import numpy as np
+
+# Standard SORT filter parameters.
+_F = np.eye(7)
+_F[0, 4] = _F[1, 5] = _F[2, 6] = 1.0
+_H = np.eye(4, 7)
+_R = np.diag([1.0, 1.0, 10.0, 10.0])
+_Q = np.diag([1.0, 1.0, 1.0, 1.0, 0.01, 0.01, 0.0001])
+_P0 = np.diag([10.0, 10.0, 10.0, 10.0, 1e4, 1e4, 1e4])
+
+
+def iou_matrix(a, b):
+    """Pairwise IoU between (N, 4) and (M, 4) xyxy boxes."""
+    a = np.asarray(a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float32).reshape(-1, 4)
+    top_left = np.maximum(a[:, None, :2], b[None, :, :2])
+    bottom_right = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+    area_a = np.prod(a[:, 2:] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:] - b[:, :2], axis=1)
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-6)
+
+
+def greedy_match(iou, threshold):
+    """Returns {row: col} pairs, highest IoU first, each row/col used once."""
+    matches, used_cols = {}, set()
+    if iou.size == 0:
+        return matches
+    for flat in np.argsort(-iou, axis=None):
+        row, col = divmod(int(flat), iou.shape[1])
+        if iou[row, col] < threshold:
+            break
+        if row in matches or col in used_cols:
+            continue
+        matches[row] = col
+        used_cols.add(col)
+    return matches
+
+
+def box_to_z(box):
+    x1, y1, x2, y2 = box
+    w, h = x2 - x1, y2 - y1
+    return np.array([x1 + w / 2, y1 + h / 2, w * h, w / max(h, 1e-6)])
+
+
+def x_to_box(x):
+    w = np.sqrt(max(x[2] * x[3], 0.0))
+    h = x[2] / w if w > 0 else 0.0
+    return [x[0] - w / 2, x[1] - h / 2, x[0] + w / 2, x[1] + h / 2]
+
+
+class SortTracker:
+    """Stateless SORT logic; per-session state is passed in and returned."""
+
+    def __init__(self, iou_threshold=0.3, max_age=10):
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age
+
+    def new_state(self):
+        return {"tracks": [], "next_id": 1, "since_detection": 0}
+
+    def update(self, state, boxes, confs, classes):
+        """
+        Advances all tracks one frame and associates new detections.
+
+        Returns (tracked, state) where tracked is a list of
+        (track_id, box, conf, class_id) for the detections of this frame.
+        """
+        state = state or self.new_state()
+        tracks = state["tracks"]
+        self._predict(tracks)
+
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        classes = np.asarray(classes, dtype=np.int64).reshape(-1)
+        iou = iou_matrix(boxes, [x_to_box(t["x"]) for t in tracks])
+        if iou.size:
+            iou[classes[:, None] != np.array([t["cls"] for t in tracks])[None, :]] = 0.0
+        matches = greedy_match(iou, self.iou_threshold)
+
+        next_id = state["next_id"]
+        tracked = []
+        for i, box in enumerate(boxes):
+            if i in matches:
+                track = tracks[matches[i]]
+                self._correct(track, box_to_z(box))
+            else:
+                track = {"id": next_id, "cls": int(classes[i]), "x": np.r_[box_to_z(box), 0.0, 0.0, 0.0],
+                         "P": _P0.copy(), "hits": 0, "missed": 0}
+                tracks.append(track)
+                next_id += 1
+            track["hits"] += 1
+            track["missed"] = 0
+            track["conf"] = float(confs[i])
+            tracked.append((track["id"], [float(v) for v in box], track["conf"], track["cls"]))
+
+        state = {"tracks": [t for t in tracks if t["missed"] <= self.max_age], "next_id": next_id,
+                 "since_detection": 0}
+        return tracked, state
+
+    def extrapolate(self, state):
+        """
+        Predicts every track one frame ahead without new detections. Only
+        tracks matched at the last full detection are reported.
+        """
+        if not state:
+            return [], state
+        self._predict(state["tracks"])
+        state["since_detection"] = state.get("since_detection", 0) + 1
+        state["tracks"] = [t for t in state["tracks"] if t["missed"] <= self.max_age]
+        tracked = [(t["id"], x_to_box(t["x"]), t["conf"], t["cls"])
+                   for t in state["tracks"] if t["missed"] == state["since_detection"]]
+        return tracked, state
+
+    def _predict(self, tracks):
+        for track in tracks:
+            x = track["x"]
+            if x[2] + x[6] <= 0:
+                x[6] = 0.0
+            track["x"] = _F @ x
+            track["P"] = _F @ track["P"] @ _F.T + _Q
+            track["missed"] += 1
+
+    def _correct(self, track, z):
+        P = track["P"]
+        S = _H @ P @ _H.T + _R
+        K = P @ _H.T @ np.linalg.inv(S)
+        track["x"] = track["x"] + K @ (z - _H @ track["x"])
+        track["P"] = (np.eye(7) - K @ _H) @ P
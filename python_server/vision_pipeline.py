@@ -0,0 +1,859 @@
+import base64
+import collections
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+import metrics
+from result_codec import ResultCodec
+from tiling import crop_tiles, merge_parts, parse_rois
+from tracking import SortTracker
+
+PERSON_CLASS = 0
+REDUCED_DECODE = ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4), (2, cv2.IMREAD_REDUCED_COLOR_2))
+THUMBNAIL_SIZE = (32, 24)
+
+
+def frame_bytes(image_data):
+    """
+    Returns the raw JPEG bytes of a frame payload.
+
+    Binary Socket.IO attachments are returned as-is; base64 strings
+    (optionally data-URLs) are decoded as a fallback for older clients.
+    """
+    if isinstance(image_data, (bytes, bytearray, memoryview)):
+        return image_data
+    if ',' in image_data:
+        image_data = image_data.split(',', 1)[1]
+    return base64.b64decode(image_data)
+
+
+def decode_frame(image_data):
+    """Decodes a JPEG frame into a BGR image, wrapping binary payloads without copying."""
+    buffer = np.frombuffer(frame_bytes(image_data), dtype=np.uint8)
+    return cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+
+
+def jpeg_size(data):
+    """(width, height) from a JPEG's SOF header without decoding, or None if it is not a JPEG."""
+    if bytes(data[:2]) != b'\xff\xd8':
+        return None
+    i = 2
+    while i + 9 <= len(data):
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:  # fill byte
+            i += 1
+        elif 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            height, width = struct.unpack('>HH', data[i + 5:i + 9])
+            return width, height
+        elif marker == 0x01 or 0xD0 <= marker <= 0xD8:  # markers without a length
+            i += 2
+        else:
+            i += 2 + struct.unpack('>H', data[i + 2:i + 4])[0]
+    return None
+
+
+def decode_reduced(image_data, target_side=None):
+    """
+    Decodes a frame, using libjpeg's DCT scaling (IMREAD_REDUCED_COLOR_2/4/8)
+    when the JPEG is much larger than needed: the largest reduction that
+    keeps the longest side >= target_side. Returns (image, scale back to the
+    original frame).
+    """
+    data = frame_bytes(image_data)
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    size = jpeg_size(data) if target_side else None
+    if size:
+        for factor, flag in REDUCED_DECODE:
+            if max(size) >= factor * target_side:
+                image = cv2.imdecode(buffer, flag)
+                return image, (size[0] / image.shape[1] if image is not None else 1.0)
+    return cv2.imdecode(buffer, cv2.IMREAD_COLOR), 1.0
+
+
+def frame_thumbnail(image_data):
+    """
+    (decoded shape, 32x24 grayscale thumbnail) for static-frame detection, or
+    None if the frame does not decode. JPEGs are decoded at 1/8 scale.
+    """
+    try:
+        buffer = np.frombuffer(frame_bytes(image_data), dtype=np.uint8)
+        gray = cv2.imdecode(buffer, cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    except Exception:
+        return None
+    if gray is None:
+        return None
+    return gray.shape, cv2.resize(gray, THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA)
+
+
+def frame_difference(a, b):
+    """Mean absolute grey-level difference of two thumbnails, or None if they are not comparable."""
+    if a is None or b is None or a[0] != b[0]:
+        return None
+    return float(cv2.absdiff(a[1], b[1]).mean())
+
+
+def to_numpy(values):
+    """Torch tensors (Ultralytics results) or arrays (exported backends) -> ndarray."""
+    if hasattr(values, "cpu"):
+        return values.cpu().numpy()
+    return np.asarray(values)
+
+
+def format_detections(result):
+    """Converts an Ultralytics result into the dicts VisionHUD draws."""
+    boxes = result.boxes
+    if boxes is None or len(boxes) == 0:
+        return []
+    return array_detections(*result_arrays(result), result.names)
+
+
+def array_detections(xyxy, confs, classes, names):
+    """(xyxy, confs, class_ids) arrays -> the dicts VisionHUD draws."""
+    return [
+        {
+            "bbox": [round(float(v), 1) for v in box],
+            "confidence": round(float(conf), 3),
+            "label": names[cls],
+            "id": -1
+        }
+        for box, conf, cls in zip(xyxy, confs, classes)
+    ]
+
+
+def detection_output(detections=None, error=None, state=None, **extra):
+    """Per-frame detector output consumed by DetectionPipeline."""
+    return {"detections": detections or [], "error": error, "state": state, "extra": extra}
+
+
+def result_arrays(result):
+    """Returns (xyxy, confs, class_ids) NumPy arrays from an Ultralytics result."""
+    boxes = result.boxes
+    return (
+        to_numpy(boxes.xyxy),
+        to_numpy(boxes.conf),
+        to_numpy(boxes.cls).astype(int)
+    )
+
+
+def predict_groups(model, inputs, settings):
+    """
+    One batched predict per distinct predict settings; results in input order.
+    settings[i] is a hashable tuple of (keyword, value) pairs for inputs[i].
+    """
+    results = [None] * len(inputs)
+    for setting in dict.fromkeys(settings):
+        indices = [i for i, s in enumerate(settings) if s == setting]
+        group = model.predict([inputs[i] for i in indices], verbose=False, **dict(setting))
+        for i, result in zip(indices, group):
+            results[i] = result
+    return results
+
+
+def predict_by_size(model, inputs, sizes, conf):
+    """predict_groups() keyed on input size alone (None = model default)."""
+    return predict_groups(model, inputs, [(("conf", conf),) + ((("imgsz", size),) if size else ()) for size in sizes])
+
+
+def class_filter(names, allow=None, deny=None):
+    """
+    Sorted tuple of the class ids left by an allow list and a deny list
+    (class names, case-insensitive, or ids), or None when both are empty.
+    """
+    if not allow and not deny:
+        return None
+    ids = {str(name).lower(): cls for cls, name in names.items()}
+
+    def resolve(values):
+        if isinstance(values, (str, int)):
+            values = [values]
+        resolved = set()
+        for value in values:
+            if isinstance(value, int):
+                resolved.add(value)
+            elif str(value).lower() in ids:
+                resolved.add(ids[str(value).lower()])
+            else:
+                raise ValueError(f"Unknown class '{value}'")
+        return resolved
+
+    keep = resolve(allow) if allow else set(names)
+    return tuple(sorted(keep - resolve(deny or [])))
+
+
+def limit_side(image, max_side):
+    """Downscales so the longest side is at most max_side. Returns (image, scale back to original)."""
+    h, w = image.shape[:2]
+    if not max_side or max(h, w) <= max_side:
+        return image, 1.0
+    ratio = max_side / float(max(h, w))
+    resized = cv2.resize(image, (int(round(w * ratio)), int(round(h * ratio))), interpolation=cv2.INTER_AREA)
+    return resized, 1.0 / ratio
+
+
+class LocalDetector:
+    """
+    Decodes frames and runs one batched `model.predict` in the calling thread.
+
+    Detections go through the session's SortTracker state so they carry
+    stable track ids. With the `detect_every` option set to k, YOLO only runs
+    on every k-th frame of a session; in between the tracker extrapolates
+    boxes without even decoding the frame. Frames in `face` mode are passed
+    through the optional IdentityCascade on the session's person tracks.
+    Frames larger than the `max_side` option are downscaled before inference
+    and boxes are mapped back to the original frame coordinates. JPEGs at
+    least twice the model's `input_size` (or `max_side`) are decoded at
+    reduced scale to begin with; `face` frames keep full resolution for the
+    face crops.
+
+    With the `roi` option (one [x1, y1, x2, y2] box or a list, as fractions
+    of the frame or pixels) only those regions are inferred: each is cropped
+    from the full-resolution frame, split into overlapping tiles if larger
+    than `tile_size` (default `input_size`, overlap `tile_overlap` = 0.2),
+    and fed to the model at native resolution without upscaling. `tiled`
+    does the same for the whole frame, for small objects in 1080p/4K input.
+    All tiles of a batch go through one predict call; boxes are mapped back
+    to frame coordinates and merged across tiles with one NMS.
+
+    Class filters (`classes` allow list, `exclude_classes` deny list, by
+    name or id) and a `min_conf` floor are passed into predict, so dropped
+    boxes are masked out before NMS and never serialized. `face` frames only
+    detect people, the one class the IdentityCascade looks at.
+
+    With decode_threads > 1 the JPEGs of a batch are decoded in parallel
+    (cv2.imdecode releases the GIL).
+    """
+
+    def __init__(self, model, conf=0.5, cascade=None, tracker=None, decode_threads=0, input_size=640):
+        self.model = model
+        self.conf = conf
+        self.input_size = input_size
+        self.cascade = cascade
+        self.tracker = tracker or SortTracker()
+        self.decode_pool = ThreadPoolExecutor(decode_threads, "vision-decode") if decode_threads > 1 else None
+
+    def detect(self, frames):
+        """Returns one detection_output() dict for every frame, in order."""
+        outputs = [None] * len(frames)
+        pending = []
+        for i, frame in enumerate(frames):
+            state = frame.get("state") or {}
+            # Options are client input: a bad value fails its own frame, not the whole batch
+            try:
+                if self._should_skip(frame, state):
+                    outputs[i] = self._extrapolate(frame, state)
+                    continue
+            except Exception as e:
+                outputs[i] = detection_output(error=str(e), state=frame.get("state"))
+                continue
+            pending.append(i)
+
+        plans = []  # (frame index, decoded image, parts, predict settings, stage timings in ns)
+        for i, decoded in zip(pending, self._decode([frames[i] for i in pending])):
+            frame = frames[i]
+            try:
+                if isinstance(decoded, Exception):
+                    raise decoded
+                image, decode_scale, timings = decoded
+                if image is None:
+                    raise ValueError("Could not decode frame")
+                parts = self._parts(image, decode_scale, frame.get("options") or {})
+                plans.append((i, image, parts, self._predict_settings(frame), timings))
+            except Exception as e:
+                outputs[i] = detection_output(error=str(e), state=frame.get("state"))
+
+        if plans:
+            inputs, settings = [], []
+            for _, _, frame_parts, setting, _ in plans:
+                for part in frame_parts:
+                    inputs.append(part[0])
+                    settings.append(setting + ((("imgsz", part[3]),) if part[3] else ()))
+            try:
+                results = predict_groups(self.model, inputs, settings)
+            except Exception as e:
+                for i, *_ in plans:
+                    outputs[i] = detection_output(error=str(e), state=frames[i].get("state"))
+                return outputs
+            start = 0
+            for i, image, frame_parts, _, timings in plans:
+                frame_results = results[start:start + len(frame_parts)]
+                start += len(frame_parts)
+                add_speed(timings, frame_results)
+                outputs[i] = self._finish(frames[i], image, frame_parts, frame_results, timings)
+                outputs[i]["timings"] = timings
+        return outputs
+
+    def _parts(self, image, decode_scale, options):
+        """
+        Model inputs for one frame as (image, scale, (x, y) offset, input size
+        or None for the model default). A part's boxes map to frame
+        coordinates as box * scale + offset.
+        """
+        height, width = image.shape[:2]
+        rois = parse_rois(options.get("roi"), width, height)
+        if not rois and options.get("tiled"):
+            rois = [(0, 0, width, height)]
+        if not rois:
+            resized, scale = limit_side(image, options.get("max_side"))
+            return [(resized, scale * decode_scale, (0.0, 0.0), None)]
+        # ROI and tiled frames are decoded at full resolution, so decode_scale is 1
+        tiles = crop_tiles(image, rois, int(options.get("tile_size") or self.input_size),
+                           float(options.get("tile_overlap", 0.2)))
+        return [(crop, 1.0, offset, size) for crop, offset, size in tiles]
+
+    def _predict_settings(self, frame):
+        """Confidence threshold and class filter for a frame, as predict_groups() settings."""
+        options = frame.get("options") or {}
+        setting = (("conf", max(self.conf, float(options.get("min_conf") or 0))),)
+        if frame.get("mode") == "face" and self.cascade is not None:
+            return setting + (("classes", (PERSON_CLASS,)),)
+        classes = class_filter(self.model.names, options.get("classes"), options.get("exclude_classes"))
+        return setting + ((("classes", classes),) if classes is not None else ())
+
+    def _decode(self, frames):
+        """(image, scale, stage timings) or the decode exception for each frame, in order."""
+        payloads = [frame["image"] for frame in frames]
+        targets = [self._decode_target(frame) for frame in frames]
+        if self.decode_pool is None or len(payloads) < 2:
+            return [_try_decode(p, t) for p, t in zip(payloads, targets)]
+        return list(self.decode_pool.map(_try_decode, payloads, targets))
+
+    def _decode_target(self, frame):
+        """Smallest longest-side the decoded frame may have (None = full resolution)."""
+        options = frame.get("options") or {}
+        if frame.get("mode") == "face" or options.get("roi") or options.get("tiled") or not self.input_size:
+            return None
+        max_side = options.get("max_side")
+        try:
+            return min(self.input_size, int(max_side)) if max_side else self.input_size
+        except (TypeError, ValueError):
+            return None  # full resolution; _parts() reports the bad max_side for this frame
+
+    def _should_skip(self, frame, state):
+        every = int((frame.get("options") or {}).get("detect_every", 1))
+        return every > 1 and "tracks" in state and state["frame_index"] % every != 0
+
+    def _finish(self, frame, image, parts, results, timings=None):
+        state = frame.get("state") or {}
+        try:
+            placements = [(scale, offset, crop.shape[1::-1]) for crop, scale, offset, _ in parts]
+            xyxy, confs, classes = merge_parts([result_arrays(result) for result in results], placements)
+            tracked, tracks = self.tracker.update(state.get("tracks"), xyxy, confs, classes)
+            new_state = {"frame_index": state.get("frame_index", 0) + 1, "tracks": tracks,
+                         "identities": state.get("identities")}
+            if frame.get("mode") == "face" and self.cascade is not None:
+                persons = [(tid, box, conf) for tid, box, conf, cls in tracked if cls == PERSON_CLASS]
+                faces, new_state["identities"] = self.cascade.process(
+                    image, persons, new_state["identities"], timings, live_ids={t["id"] for t in tracks["tracks"]})
+                return detection_output(faces, state=new_state)
+            return detection_output(tracked_detections(tracked, results[0].names), state=new_state)
+        except Exception as e:
+            return detection_output(error=str(e), state=frame.get("state"))
+
+    def _extrapolate(self, frame, state):
+        tracked, tracks = self.tracker.extrapolate(state["tracks"])
+        new_state = dict(state, frame_index=state["frame_index"] + 1, tracks=tracks)
+        if frame.get("mode") == "face" and self.cascade is not None:
+            persons = [(tid, box, conf) for tid, box, conf, cls in tracked if cls == PERSON_CLASS]
+            faces, _ = self.cascade.extrapolate(persons, state.get("identities"))
+            return detection_output(faces, state=new_state, predicted=True)
+        return detection_output(tracked_detections(tracked, self.model.names), state=new_state, predicted=True)
+
+
+def _try_decode(payload, target_side=None):
+    """(image, scale, {stage: ns}) for a frame payload, or the decode exception."""
+    try:
+        started = time.perf_counter_ns()
+        data = frame_bytes(payload)
+        unpacked = time.perf_counter_ns()
+        image, scale = decode_reduced(data, target_side)
+        timings = {"imdecode": time.perf_counter_ns() - unpacked}
+        if isinstance(payload, str):
+            timings["base64_decode"] = unpacked - started
+        return image, scale, timings
+    except Exception as e:
+        return e
+
+
+def add_speed(timings, results):
+    """Adds the backends' per-image preprocess/inference/postprocess times (ms) to `timings` (ns)."""
+    for result in results:
+        for stage, ms in (getattr(result, "speed", None) or {}).items():
+            if ms is not None:
+                timings[stage] = timings.get(stage, 0) + int(ms * 1e6)
+
+
+def tracked_detections(tracked, names):
+    """Converts tracker output into the dicts VisionHUD draws (id = track id)."""
+    return [
+        {
+            "bbox": [round(float(v), 1) for v in box],
+            "confidence": round(float(conf), 3),
+            "label": names[cls],
+            "id": track_id,
+            "track_id": track_id
+        }
+        for track_id, box, conf, cls in tracked
+    ]
+
+
+class LatestFrameSlot:
+    """Single-entry mailbox: a new frame replaces the one still waiting."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._frame = None
+
+    def put(self, frame):
+        """Stores a frame. Returns True if an unprocessed frame was replaced."""
+        with self._lock:
+            replaced = self._frame is not None
+            self._frame = frame
+            return replaced
+
+    def has_frame(self):
+        with self._lock:
+            return self._frame is not None
+
+    def take(self):
+        """Removes and returns the waiting frame, or None."""
+        with self._lock:
+            frame, self._frame = self._frame, None
+            return frame
+
+
+class VisionSession:
+    """Per-connection state and counters for a streaming HUD client."""
+
+    def __init__(self, sid, mode='object'):
+        self.sid = sid
+        self.mode = mode
+        self.options = {}
+        self.slot = LatestFrameSlot()
+        self.in_flight = False
+        self.state = None
+        self.control = None
+        self.static_ref = None
+        self.cached_result = None
+        self.cached_run = 0
+        self.codec = None
+        self.received = 0
+        self.dropped = 0
+        self.processed = 0
+        self.skipped = 0
+        self.errors = 0
+        self.bytes_received = 0
+        self.binary_frames = 0
+        self.last_latency_ms = None
+        self.connected_at = time.time()
+
+    def stats(self):
+        return {
+            "sid": self.sid,
+            "mode": self.mode,
+            "options": self.options,
+            "received": self.received,
+            "dropped": self.dropped,
+            "processed": self.processed,
+            "skipped": self.skipped,
+            "errors": self.errors,
+            "bytes_received": self.bytes_received,
+            "binary_frames": self.binary_frames,
+            "drop_rate": round(self.dropped / self.received, 3) if self.received else 0.0,
+            "skip_rate": round(self.skipped / self.received, 3) if self.received else 0.0,
+            "last_latency_ms": self.last_latency_ms,
+            "throttle": self.control["hint"] if self.control else None,
+            "uptime_s": round(time.time() - self.connected_at, 1)
+        }
+
+    def frame_options(self):
+        """The client's options, with max_side lowered to the adaptive controller's cap if smaller."""
+        cap = self.control.get("max_side") if self.control else None
+        if not cap:
+            return self.options
+        requested = self.options.get("max_side")
+        try:
+            return dict(self.options, max_side=min(cap, int(requested)) if requested else cap)
+        except (TypeError, ValueError):
+            return self.options  # reported as a per-frame error by the detector
+
+
+class DetectionPipeline:
+    """
+    Streams `detect_frame` payloads through dedicated inference workers.
+
+    Each session owns one LatestFrameSlot, so at most one frame per client
+    waits for inference and stale frames are dropped instead of queued.
+    Latency therefore stays bounded by a single inference, not a backlog.
+
+    Frames waiting across all clients are micro-batched: the worker gathers
+    up to `max_batch` frames within `batch_deadline_ms` and runs one batched
+    `model.predict`, then fans results back out to each session id.
+
+    With the `static_threshold` option set, each live frame is first reduced
+    to a tiny grayscale thumbnail and compared with the last frame that went
+    through inference. If the mean grey-level difference is within the
+    threshold, the previous `detection_result` is re-emitted right away with
+    `cached: true` and the frame never reaches a detector. After
+    `static_max_skip` cached results in a row, a frame is inferred again.
+
+    Offline images (HTTP /detect, /detect/batch) go through `submit_job`
+    instead: jobs are never dropped, only fill batches after live frames,
+    and at most `max_pending_jobs` wait at once so producers get back-pressure.
+
+    Sessions that set `encoding: "compact"` get their results packed by a
+    result_codec.ResultCodec, seeded with the model's class names `labels`.
+
+    `detectors` is a detector or a list of them (see LocalDetector and
+    process_workers.ProcessInferencePool); each gets its own dispatch thread.
+    A session has at most one frame in flight, so per-session state (e.g.
+    face tracks) is handed to the detector with the frame and stored back
+    from its output in order, even across several worker processes.
+    """
+
+    def __init__(self, detectors, emit_result, max_batch=8, batch_deadline_ms=10, default_options=None,
+                 controller=None, max_pending_jobs=64, labels=None):
+        self.detectors = detectors if isinstance(detectors, list) else [detectors]
+        self.emit_result = emit_result
+        self.labels = list(labels or [])
+        self.max_batch = max(1, int(max_batch))
+        self.batch_deadline = batch_deadline_ms / 1000.0
+        self.default_options = default_options or {}
+        self.controller = controller
+        self.service_ms = None
+        self.sessions = {}
+        self.max_pending_jobs = max(1, int(max_pending_jobs))
+        self.jobs_processed = 0
+        self._jobs = collections.deque()
+        self._ready = collections.deque()
+        self._cond = threading.Condition()
+        self._running = False
+        self._in_flight = 0
+        self._workers = []
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        for i, detector in enumerate(self.detectors):
+            worker = threading.Thread(target=self._run, args=(detector,), name=f"vision-inference-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def warm_up(self, image, runs=2):
+        """
+        Pushes a frame through every detector before serving, so lazy graph
+        compilation and allocator growth don't land on the first client frame.
+        Returns the latency of each detector's first run in ms.
+        """
+        first_ms = []
+        for detector in self.detectors:
+            for run in range(runs):
+                started = time.perf_counter()
+                detector.detect([{"image": image, "mode": "object", "options": {}, "state": None}])
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                if run == 0:
+                    first_ms.append(elapsed_ms)
+            self._record_service_time(elapsed_ms)
+        return first_ms
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        for worker in self._workers:
+            worker.join(timeout=5)
+        self._workers = []
+
+    def open_session(self, sid, mode='object'):
+        with self._cond:
+            session = self.sessions.get(sid)
+            if session is None:
+                session = VisionSession(sid, mode)
+                session.options = dict(self.default_options)
+                self.sessions[sid] = session
+            return session
+
+    def close_session(self, sid):
+        with self._cond:
+            self.sessions.pop(sid, None)
+
+    def set_mode(self, sid, mode):
+        """
+        Applies a `set_mode` message: either a mode string ('face'/'object')
+        or a dict like {"mode": "object", "detect_every": 3} whose extra keys
+        become per-session options. Cached results are dropped, since they
+        were produced under the old mode/options.
+        """
+        session = self.open_session(sid)
+        session.cached_result = None
+        if isinstance(mode, dict):
+            options = dict(mode)
+            session.mode = options.pop("mode", session.mode)
+            session.options = dict(session.options, **options)
+        else:
+            session.mode = mode
+        if session.options.get("encoding") != "compact":
+            session.codec = None
+        elif session.codec is None:
+            session.codec = ResultCodec(self.labels)
+
+    def result_header(self, sid):
+        """The `result_header` message for a compact-encoding session, else None."""
+        session = self.sessions.get(sid)
+        return session.codec.header() if session and session.codec else None
+
+    def submit(self, sid, payload):
+        """Queues a frame for a session, replacing any frame still waiting."""
+        session = self.open_session(sid)
+        image = payload.get("image")
+        try:
+            static = self._static_options(session)
+        except (TypeError, ValueError) as e:
+            # Same as other bad options: this frame gets an error result, nothing is dropped silently
+            with self._cond:
+                session.received += 1
+                session.errors += 1
+            metrics.FRAMES.inc(metrics.mode_label(session.mode), "error")
+            self._send(session, {"detections": [], "timestamp": payload.get("timestamp"), "mode": session.mode,
+                                 "error": f"Invalid static-frame option: {e}"})
+            return
+        frame = {
+            "image": image,
+            "timestamp": payload.get("timestamp"),
+            "received_at": time.perf_counter(),
+            "thumbnail": frame_thumbnail(image) if session.options.get("static_threshold") else None
+        }
+        with self._cond:
+            session.received += 1
+            session.bytes_received += len(image)
+            if not isinstance(image, str):
+                session.binary_frames += 1
+            cached = self._cached_result(session, frame["thumbnail"], *static)
+            dropped = False
+            if cached is not None:
+                session.skipped += 1
+            elif session.slot.put(frame):
+                session.dropped += 1
+                dropped = True
+            elif not session.in_flight:
+                self._ready.append(sid)
+                self._cond.notify()
+        metrics.FRAMES.inc(metrics.mode_label(session.mode), "received")
+        if dropped:
+            metrics.FRAMES.inc(metrics.mode_label(session.mode), "dropped")
+        if cached is not None:
+            metrics.FRAMES.inc(metrics.mode_label(session.mode), "cached")
+            latency_ms = round((time.perf_counter() - frame["received_at"]) * 1000, 1)
+            self._send(session, dict(cached, timestamp=frame["timestamp"], server_latency_ms=latency_ms,
+                                     batch_size=0, cached=True))
+
+    def _static_options(self, session):
+        """(static_threshold, static_max_skip) as numbers; raises ValueError/TypeError on bad values."""
+        threshold = session.options.get("static_threshold")
+        return float(threshold) if threshold else 0.0, int(session.options.get("static_max_skip", 30))
+
+    def _cached_result(self, session, thumbnail, threshold, max_skip):
+        """
+        The session's last result if this frame is unchanged from the one it
+        came from, else None. Only used when the session has no frame waiting
+        or in a detector, so a cached result never overtakes a newer one.
+        """
+        if not threshold or session.cached_result is None:
+            return None
+        if session.in_flight or session.slot.has_frame():
+            return None
+        if session.cached_run >= max_skip:
+            return None
+        difference = frame_difference(session.static_ref, thumbnail)
+        if difference is None or difference > threshold:
+            return None
+        session.cached_run += 1
+        return session.cached_result
+
+    def submit_job(self, image, callback, options=None, timeout=None):
+        """
+        Queues one offline image; callback(output) is called from a dispatch
+        thread with its detection_output(). Blocks while max_pending_jobs are
+        already waiting. Returns False if the pipeline stopped or timed out.
+        """
+        job = {
+            "image": image,
+            "mode": "object",
+            "options": options or {},
+            "state": None,
+            "received_at": time.perf_counter(),
+            "callback": callback
+        }
+        with self._cond:
+            if not self._cond.wait_for(lambda: not self._running or len(self._jobs) < self.max_pending_jobs,
+                                       timeout):
+                return False
+            if not self._running:
+                return False
+            self._jobs.append(job)
+            self._cond.notify_all()
+        return True
+
+    def stats(self):
+        with self._cond:
+            sessions = [s.stats() for s in self.sessions.values()]
+            pending_jobs = len(self._jobs)
+        received = sum(s["received"] for s in sessions)
+        skipped = sum(s["skipped"] for s in sessions)
+        return {
+            "clients": len(sessions),
+            "received": received,
+            "dropped": sum(s["dropped"] for s in sessions),
+            "processed": sum(s["processed"] for s in sessions),
+            "skipped": skipped,
+            "skip_rate": round(skipped / received, 3) if received else 0.0,
+            "jobs_processed": self.jobs_processed,
+            "pending_jobs": pending_jobs,
+            "sessions": sessions
+        }
+
+    def queue_depths(self):
+        """
+        Live queue sizes for /metrics: sessions ready to dispatch, offline
+        jobs waiting, frames in a detector, and open sessions per mode.
+        """
+        with self._cond:
+            modes = collections.Counter(metrics.mode_label(s.mode) for s in self.sessions.values())
+            return {"ready": len(self._ready), "jobs": len(self._jobs), "in_flight": self._in_flight}, modes
+
+    def _next_batch(self):
+        """
+        Collects up to max_batch waiting frames across all sessions, topped
+        up with offline jobs (whose batch entries have session None).
+
+        Blocks until one frame is ready, then keeps gathering until the batch
+        is full or batch_deadline has passed since the first frame arrived.
+        """
+        batch = []
+        with self._cond:
+            while self._running and not self._ready and not self._jobs:
+                self._cond.wait()
+            deadline = time.perf_counter() + self.batch_deadline
+            while self._running and len(batch) < self.max_batch:
+                if self._ready:
+                    session = self.sessions.get(self._ready.popleft())
+                    frame = session.slot.take() if session else None
+                    if frame is not None:
+                        frame["mode"] = session.mode
+                        frame["options"] = session.frame_options()
+                        frame["state"] = session.state
+                        session.in_flight = True
+                        self._in_flight += 1
+                        batch.append((session, frame))
+                    continue
+                if self._jobs:
+                    batch.append((None, self._jobs.popleft()))
+                    self._cond.notify_all()  # room for a blocked submit_job
+                    continue
+                # Every connected client already has a frame in flight; waiting
+                # longer would only add latency.
+                if self._in_flight >= len(self.sessions):
+                    break
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+        return batch
+
+    def _run(self, detector):
+        while self._running:
+            batch = self._next_batch()
+            if batch:
+                self._process_batch(detector, batch)
+
+    def _process_batch(self, detector, batch):
+        start = time.perf_counter()
+        metrics.BATCH_SIZE.observe(len(batch))
+        for _, frame in batch:
+            metrics.STAGE_SECONDS.observe(start - frame["received_at"], "queue_wait")
+        try:
+            outputs = detector.detect([frame for _, frame in batch])
+        except Exception as e:
+            outputs = [detection_output(error=str(e), state=frame["state"]) for _, frame in batch]
+        self._record_service_time((time.perf_counter() - start) * 1000 / len(batch))
+        for (session, frame), output in zip(batch, outputs):
+            if session is None:
+                self.jobs_processed += 1
+                metrics.observe_stages(output.get("timings") or {})
+                try:
+                    frame["callback"](output)
+                except Exception:
+                    pass  # a failing consumer must not take the dispatcher down
+                continue
+            session.state = output["state"]
+            self._release(session)
+            self._emit(session, frame, output, len(batch))
+
+    def _record_service_time(self, per_frame_ms):
+        """EWMA of detector time per frame, used to estimate capacity."""
+        if self.service_ms is None:
+            self.service_ms = per_frame_ms
+        else:
+            self.service_ms += 0.1 * (per_frame_ms - self.service_ms)
+
+    def capacity_fps(self):
+        """Estimated frames/sec all dispatchers can sustain, or None before any batch ran."""
+        if not self.service_ms:
+            return None
+        return len(self.detectors) * 1000.0 / self.service_ms
+
+    def _release(self, session):
+        """Marks a session idle and re-queues it if a newer frame is waiting."""
+        with self._cond:
+            session.in_flight = False
+            self._in_flight -= 1
+            if session.slot.has_frame() and session.sid in self.sessions:
+                self._ready.append(session.sid)
+                self._cond.notify()
+
+    def _emit(self, session, frame, output, batch_size):
+        error = output["error"]
+        if error:
+            session.errors += 1
+        else:
+            session.processed += 1
+        latency_ms = round((time.perf_counter() - frame["received_at"]) * 1000, 1)
+        session.last_latency_ms = latency_ms
+        payload = {
+            "detections": output["detections"],
+            "timestamp": frame["timestamp"],
+            "mode": session.mode,
+            "server_latency_ms": latency_ms,
+            "batch_size": batch_size
+        }
+        payload.update(output.get("extra") or {})
+        if error:
+            payload["error"] = error
+        metrics.observe_stages(output.get("timings") or {})
+        metrics.FRAME_LATENCY_SECONDS.observe(latency_ms / 1000, metrics.mode_label(session.mode))
+        metrics.FRAMES.inc(metrics.mode_label(session.mode), "error" if error else "processed")
+        with self._cond:
+            session.cached_result = None if error else dict(payload)
+            session.static_ref = frame.get("thumbnail")
+            session.cached_run = 0
+        self._send(session, payload)
+        if self.controller:
+            self.controller.observe(self, session, latency_ms)
+
+    def _send(self, session, payload):
+        """Emits a result as JSON, or packed for sessions using the compact encoding."""
+        codec = session.codec
+        if codec:
+            started = time.perf_counter_ns()
+            payload = codec.encode(payload)
+            metrics.STAGE_SECONDS.observe_ns(time.perf_counter_ns() - started, "serialize")
+        started = time.perf_counter_ns()
+        self.emit_result(session.sid, payload)
+        metrics.STAGE_SECONDS.observe_ns(time.perf_counter_ns() - started, "emit")
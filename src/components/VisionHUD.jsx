@@ -3,6 +3,14 @@ import { io } from 'socket.io-client';
 import { Camera, X, Activity } from 'lucide-react';
 import { motion } from 'framer-motion';
 
+// set_mode message for a scan mode. In object mode the server drops 'person'
+// inside inference (you are usually sitting in front of the camera), so those
+// boxes are never drawn, announced or sent over the socket.
+const modeMessage = (mode) => ({
+    mode,
+    exclude_classes: mode === 'object' ? ['person'] : []
+});
+
 const VisionHUD = ({ onClose, onDetect }) => {
     const videoRef = useRef(null);
     const canvasRef = useRef(null);
@@ -15,6 +23,10 @@ const VisionHUD = ({ onClose, onDetect }) => {
     const streamRef = useRef(null);
     const socketRef = useRef(null);
     const scanModeRef = useRef('face');
+    // Server-pushed budget (see 'throttle' event): fps cap, max frame side, JPEG quality
+    const throttleRef = useRef({ targetFps: 15, maxSide: null, quality: 0.5 });
+    const lastSentRef = useRef(0);
+    const frameScalesRef = useRef(new Map());
 
     const handleRegister = async () => {
         if (!videoRef.current || !registerName) return;
@@ -58,7 +70,15 @@ const VisionHUD = ({ onClose, onDetect }) => {
         socketRef.current.on('connect', () => {
             console.log("Connected to Vision Server via Socket.IO");
             // Set initial mode from ref
-            socketRef.current.emit('set_mode', scanModeRef.current);
+            socketRef.current.emit('set_mode', modeMessage(scanModeRef.current));
+        });
+
+        socketRef.current.on('throttle', (hint) => {
+            throttleRef.current = {
+                targetFps: hint.target_fps || 15,
+                maxSide: hint.max_side || null,
+                quality: hint.jpeg_quality || 0.5
+            };
         });
 
         socketRef.current.on('detection_result', (data) => {
@@ -74,15 +94,13 @@ const VisionHUD = ({ onClose, onDetect }) => {
 
             const ctx = canvasRef.current.getContext('2d');
 
-            // Filter out 'person' detections to avoid repetitive announcements
-            const filteredDetections = data.detections.filter(d =>
-                d.label.toLowerCase() !== 'person'
-            );
-
-            drawDetections(ctx, filteredDetections);
+            // Boxes come back in the coordinates of the (possibly downscaled) frame we sent
+            const sentScale = frameScalesRef.current.get(data.timestamp) || 1;
+            frameScalesRef.current.delete(data.timestamp);
+            drawDetections(ctx, data.detections, sentScale);
 
             // Notify parent for TTS announcements
-            const uniqueLabels = [...new Set(filteredDetections.map(d => d.label))];
+            const uniqueLabels = [...new Set(data.detections.map(d => d.label))];
             if (onDetect && uniqueLabels.length > 0) {
                 onDetect(uniqueLabels);
             }
@@ -100,7 +118,7 @@ const VisionHUD = ({ onClose, onDetect }) => {
     useEffect(() => {
         scanModeRef.current = scanMode;
         if (socketRef.current && socketRef.current.connected) {
-            socketRef.current.emit('set_mode', scanMode);
+            socketRef.current.emit('set_mode', modeMessage(scanMode));
         }
     }, [scanMode]);
 
@@ -146,20 +164,38 @@ const VisionHUD = ({ onClose, onDetect }) => {
         if (video.readyState !== 4) return;
         if (video.videoWidth === 0 || video.videoHeight === 0) return;
 
-        // Draw current frame to offscreen canvas
+        // Respect the server's frame-rate budget
+        const { targetFps, maxSide, quality } = throttleRef.current;
+        const now = performance.now();
+        if (now - lastSentRef.current < 1000 / targetFps) return;
+        lastSentRef.current = now;
+
+        // Draw current frame to offscreen canvas, downscaled to the server's max side
+        const scale = maxSide ? Math.min(1, maxSide / Math.max(video.videoWidth, video.videoHeight)) : 1;
         const offscreen = document.createElement('canvas');
-        offscreen.width = video.videoWidth;
-        offscreen.height = video.videoHeight;
+        offscreen.width = Math.round(video.videoWidth * scale);
+        offscreen.height = Math.round(video.videoHeight * scale);
         const offCtx = offscreen.getContext('2d');
-        offCtx.drawImage(video, 0, 0);
+        offCtx.drawImage(video, 0, 0, offscreen.width, offscreen.height);
 
-        const imageBase64 = offscreen.toDataURL('image/jpeg', 0.5); // Quality 0.5 for speed
+        const timestamp = Date.now();
+        if (scale !== 1) {
+            frameScalesRef.current.set(timestamp, scale);
+            if (frameScalesRef.current.size > 64) {
+                frameScalesRef.current.delete(frameScalesRef.current.keys().next().value);
+            }
+        }
 
-        // Emit frame to server
-        socketRef.current.emit('detect_frame', { image: imageBase64, timestamp: Date.now() });
+        // Send the JPEG as a binary attachment (no base64 inflation)
+        offscreen.toBlob((blob) => {
+            if (!blob || !socketRef.current) return;
+            blob.arrayBuffer().then((buffer) => {
+                socketRef.current.emit('detect_frame', { image: buffer, timestamp });
+            });
+        }, 'image/jpeg', quality);
     };
 
-    const drawDetections = (ctx, detections) => {
+    const drawDetections = (ctx, detections, sentScale = 1) => {
         if (!canvasRef.current || !videoRef.current) return;
 
         const video = videoRef.current;
@@ -175,8 +211,8 @@ const VisionHUD = ({ onClose, onDetect }) => {
         }
 
         // Calculate scaling factors (Backend coordinates -> Frontend display size)
-        const scaleX = video.clientWidth / video.videoWidth;
-        const scaleY = video.clientHeight / video.videoHeight;
+        const scaleX = video.clientWidth / (video.videoWidth * sentScale);
+        const scaleY = video.clientHeight / (video.videoHeight * sentScale);
 
         if (!Number.isFinite(scaleX) || !Number.isFinite(scaleY)) return;
 